@@ -3,7 +3,6 @@ import os
 from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config, pool
-from sqlalchemy.engine import Connection
 
 from alembic import context
 
@@ -13,13 +12,14 @@ from alembic import context
 import app.models    # noqa: F401  (so that Base.metadata includes all tables)
 from app.core.config import settings
 from app.db.session import Base
+from app.db.migrate import sync_database_url
 
 # ------------------------------------------------------------------------------
 # 2. Alembic Config object (reads alembic.ini)
 # ------------------------------------------------------------------------------
 config = context.config
 if config.config_file_name is not None:
-    fileConfig(config.config_file_name)
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
 
 # ------------------------------------------------------------------------------
 # 3. Tell Alembic which Metadata to use for 'autogenerate'
@@ -31,18 +31,10 @@ target_metadata = Base.metadata
 # ------------------------------------------------------------------------------
 def get_sync_url() -> str:
     """
-    - If settings.DATABASE_URL starts with "postgresql+asyncpg://", strip "+asyncpg" off.
-    - If it starts with "postgres://", replace with "postgresql://".
-    - Otherwise, assume it is already a valid sync URL.
+    DATABASE_URL with its async driver swapped for the sync one (and
+    "postgres://" normalized), shared with app/db/migrate.py.
     """
-    async_url: str = settings.DATABASE_URL
-
-    if async_url.startswith("postgresql+asyncpg://"):
-        return async_url.replace("postgresql+asyncpg://", "postgresql://", 1)
-    if async_url.startswith("postgres://"):
-        return async_url.replace("postgres://", "postgresql://", 1)
-
-    return async_url
+    return sync_database_url(settings.DATABASE_URL)
 
 
 # Override the sqlalchemy.url in alembic.ini
@@ -71,8 +63,16 @@ def run_migrations_offline() -> None:
 def run_migrations_online() -> None:
     """
     In 'online' mode we construct a synchronous Engine and run migrations
-    directly without any asyncio.
+    directly without any asyncio. `python -m app.db.migrate` passes in the
+    connection that holds its migration lock instead.
     """
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
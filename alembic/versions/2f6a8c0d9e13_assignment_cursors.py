@@ -0,0 +1,34 @@
+"""assignment cursors
+
+Revision ID: 2f6a8c0d9e13
+Revises: 9d3b7e5f1a42
+Create Date: 2026-10-17 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f6a8c0d9e13'
+down_revision: Union[str, None] = '9d3b7e5f1a42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    cursors = op.create_table(
+        'assignment_cursors',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('position', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+    op.bulk_insert(cursors, [{'name': 'round_robin', 'position': 0}])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('assignment_cursors')
@@ -0,0 +1,53 @@
+"""csr workload counters
+
+Revision ID: 7b4e2d9c6f81
+Revises: 2f6a8c0d9e13
+Create Date: 2026-10-17 09:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b4e2d9c6f81'
+down_revision: Union[str, None] = '2f6a8c0d9e13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'csr_workloads',
+        sa.Column('csr_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('open_tickets', sa.Integer(), nullable=False),
+        sa.Column('weighted_load', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['csr_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('csr_id'),
+    )
+    op.create_index('ix_csr_workloads_weighted_load', 'csr_workloads', ['weighted_load', 'open_tickets'], unique=False)
+    op.create_index('ix_csr_workloads_open_tickets', 'csr_workloads', ['open_tickets'], unique=False)
+
+    # Backfill from the tickets that are currently open
+    op.execute(
+        """
+        INSERT INTO csr_workloads (csr_id, open_tickets, weighted_load)
+        SELECT assigned_to_id,
+               COUNT(*),
+               SUM(CASE priority WHEN 'HIGH' THEN 3 WHEN 'MEDIUM' THEN 2 ELSE 1 END)
+        FROM tickets
+        WHERE assigned_to_id IS NOT NULL AND status IN ('OPEN', 'IN_PROGRESS')
+        GROUP BY assigned_to_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_csr_workloads_open_tickets', table_name='csr_workloads')
+    op.drop_index('ix_csr_workloads_weighted_load', table_name='csr_workloads')
+    op.drop_table('csr_workloads')
@@ -0,0 +1,42 @@
+"""ticket and message access-path indexes
+
+Revision ID: 9d3b7e5f1a42
+Revises: c4e8a1f2b7d5
+Create Date: 2026-10-17 09:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3b7e5f1a42'
+down_revision: Union[str, None] = 'c4e8a1f2b7d5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_tickets_user_id_status_created_at', 'tickets', ['user_id', 'status', 'created_at', 'id'], unique=False)
+    op.create_index('ix_tickets_status_created_at', 'tickets', ['status', 'created_at', 'id'], unique=False)
+    op.create_index('ix_tickets_category_created_at', 'tickets', ['category', 'created_at', 'id'], unique=False)
+    op.create_index('ix_tickets_assigned_to_id_status', 'tickets', ['assigned_to_id', 'status'], unique=False)
+    op.create_index(
+        'ix_tickets_unassigned_status_created_at', 'tickets', ['status', 'created_at', 'id'], unique=False,
+        postgresql_where=sa.text('assigned_to_id IS NULL'),
+        sqlite_where=sa.text('assigned_to_id IS NULL'),
+    )
+    op.create_index('ix_messages_ticket_id_timestamp_id', 'messages', ['ticket_id', 'timestamp', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_messages_ticket_id_timestamp_id', table_name='messages')
+    op.drop_index('ix_tickets_unassigned_status_created_at', table_name='tickets')
+    op.drop_index('ix_tickets_assigned_to_id_status', table_name='tickets')
+    op.drop_index('ix_tickets_category_created_at', table_name='tickets')
+    op.drop_index('ix_tickets_status_created_at', table_name='tickets')
+    op.drop_index('ix_tickets_user_id_status_created_at', table_name='tickets')
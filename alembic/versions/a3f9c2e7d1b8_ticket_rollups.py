@@ -0,0 +1,59 @@
+"""ticket dashboard rollups
+
+Revision ID: a3f9c2e7d1b8
+Revises: e5c1a7b3d9f4
+Create Date: 2026-10-17 13:05:00.000000
+
+"""
+from typing import Sequence, Union
+import uuid
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f9c2e7d1b8'
+down_revision: Union[str, None] = 'e5c1a7b3d9f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    rollups = op.create_table(
+        'ticket_rollups',
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('priority', sa.String(), nullable=False),
+        sa.Column('assigned_to_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('tickets', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('status', 'priority', 'assigned_to_id'),
+    )
+
+    # Backfill from the existing tickets; NULL priority and assignee are
+    # stored as '' and the all-ones UUID, and enum names as their lowercase values
+    tickets = sa.table(
+        'tickets',
+        sa.column('status', sa.String()),
+        sa.column('priority', sa.String()),
+        sa.column('assigned_to_id', postgresql.UUID(as_uuid=True)),
+    )
+    result = op.get_bind().execute(
+        sa.select(tickets.c.status, tickets.c.priority, tickets.c.assigned_to_id, sa.func.count())
+        .group_by(tickets.c.status, tickets.c.priority, tickets.c.assigned_to_id)
+    )
+    counts = {}
+    for status, priority, assigned_to_id, count in result:
+        key = ((status or 'OPEN').lower(), (priority or '').lower(), assigned_to_id or uuid.UUID(int=(1 << 128) - 1))
+        counts[key] = counts.get(key, 0) + count
+    if counts:
+        op.bulk_insert(rollups, [
+            {'status': status, 'priority': priority, 'assigned_to_id': assigned_to_id, 'tickets': count}
+            for (status, priority, assigned_to_id), count in counts.items()
+        ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('ticket_rollups')
@@ -0,0 +1,33 @@
+"""replication heartbeat
+
+Revision ID: b6d2f4a8c1e3
+Revises: a3f9c2e7d1b8
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d2f4a8c1e3'
+down_revision: Union[str, None] = 'a3f9c2e7d1b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'replication_heartbeat',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('beat_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('replication_heartbeat')
@@ -0,0 +1,29 @@
+"""ticket keyset pagination indexes
+
+Revision ID: c4e8a1f2b7d5
+Revises: 5a2d1c9e7b30
+Create Date: 2026-10-17 09:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a1f2b7d5'
+down_revision: Union[str, None] = '5a2d1c9e7b30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_tickets_created_at_id', 'tickets', ['created_at', 'id'], unique=False)
+    op.create_index('ix_tickets_user_id_created_at_id', 'tickets', ['user_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tickets_user_id_created_at_id', table_name='tickets')
+    op.drop_index('ix_tickets_created_at_id', table_name='tickets')
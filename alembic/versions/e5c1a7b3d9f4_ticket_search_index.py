@@ -0,0 +1,67 @@
+"""ticket full-text search index
+
+Revision ID: e5c1a7b3d9f4
+Revises: 7b4e2d9c6f81
+Create Date: 2026-10-17 11:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5c1a7b3d9f4'
+down_revision: Union[str, None] = '7b4e2d9c6f81'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        # Generated column, so every insert and update keeps it current
+        op.execute(
+            """
+            ALTER TABLE tickets ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(description, '')), 'B')
+            ) STORED
+            """
+        )
+        op.create_index('ix_tickets_search_vector', 'tickets', ['search_vector'], unique=False, postgresql_using='gin')
+    elif dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE tickets_fts USING fts5("
+            "title, description, content='tickets', content_rowid='rowid', tokenize='porter unicode61')"
+        )
+        op.execute(
+            "CREATE TRIGGER tickets_fts_ai AFTER INSERT ON tickets BEGIN "
+            "INSERT INTO tickets_fts(rowid, title, description) VALUES (new.rowid, new.title, new.description); END"
+        )
+        op.execute(
+            "CREATE TRIGGER tickets_fts_ad AFTER DELETE ON tickets BEGIN "
+            "INSERT INTO tickets_fts(tickets_fts, rowid, title, description) "
+            "VALUES ('delete', old.rowid, old.title, old.description); END"
+        )
+        op.execute(
+            "CREATE TRIGGER tickets_fts_au AFTER UPDATE OF title, description ON tickets BEGIN "
+            "INSERT INTO tickets_fts(tickets_fts, rowid, title, description) "
+            "VALUES ('delete', old.rowid, old.title, old.description); "
+            "INSERT INTO tickets_fts(rowid, title, description) VALUES (new.rowid, new.title, new.description); END"
+        )
+        # Index the tickets that already exist
+        op.execute("INSERT INTO tickets_fts(tickets_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.drop_index('ix_tickets_search_vector', table_name='tickets')
+        op.drop_column('tickets', 'search_vector')
+    elif dialect == 'sqlite':
+        for trigger in ('tickets_fts_au', 'tickets_fts_ad', 'tickets_fts_ai'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS tickets_fts")
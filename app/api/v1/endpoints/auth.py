@@ -14,20 +14,35 @@ from app.schemas.user import (
     LogoutRequest
 )
 from app.models.user import User, UserRole as DBUserRole
-from app.models.token_blacklist import TokenBlacklist
+from app.core.hashing import HashingBusyError
+from app.core.rate_limiting import limit_by_ip, login_per_account, login_per_ip, refresh_per_ip, signup_per_ip
 from app.core.security import (
-    get_password_hash,
-    verify_password,
+    get_password_hash_async,
+    verify_password_async,
+    password_needs_rehash,
     create_access_token,
     create_refresh_token,
     decode_token,
     is_token_blacklisted,
+    revoke_token,
 )
 from app.db.session import get_db
 
 router = APIRouter()
 
-@router.post("/signup", response_model=UserOut, status_code=status.HTTP_201_CREATED)
+def hashing_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many concurrent sign-ins, please retry",
+        headers={"Retry-After": "1"},
+    )
+
+@router.post(
+    "/signup",
+    response_model=UserOut,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(limit_by_ip(signup_per_ip))],
+)
 async def signup(
     user_in: UserCreate, 
     db: AsyncSession = Depends(get_db)
@@ -42,10 +57,15 @@ async def signup(
             detail="User already registered",
         )
 
+    try:
+        hashed_password = await get_password_hash_async(user_in.password)
+    except HashingBusyError:
+        raise hashing_busy()
+
     # Create user with only necessary fields
     new_user = User(
         email=user_in.email,
-        hashed_password=get_password_hash(user_in.password),
+        hashed_password=hashed_password,
         full_name=user_in.full_name,
         role=DBUserRole.USER,
         is_active=True
@@ -64,24 +84,43 @@ async def signup(
             detail="Could not create user"
         )
 
-@router.post("/login", response_model=Token)
+@router.post("/login", response_model=Token, dependencies=[Depends(limit_by_ip(login_per_ip))])
 async def login(
     user_in: UserLogin, db: AsyncSession = Depends(get_db)
 ):
+    # Slow down password guessing against one account from many addresses
+    login_per_account.enforce(user_in.email.lower())
+
     # 1. Verify email/password
     result = await db.execute(select(User).where(User.email == user_in.email))
     user = result.scalars().first()
 
-    if not user or not verify_password(user_in.password, user.hashed_password):
+    try:
+        valid = user is not None and await verify_password_async(user_in.password, user.hashed_password)
+    except HashingBusyError:
+        raise hashing_busy()
+
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    user_id = str(user.id)
+
+    # Upgrade hashes made with an older bcrypt cost while we have the password
+    if password_needs_rehash(user.hashed_password):
+        try:
+            user.hashed_password = await get_password_hash_async(user_in.password)
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.warning(f"Password rehash failed for user {user_id}: {str(e)}")
+
     # 2. Create tokens
-    access_token = create_access_token({"sub": str(user.id)})
-    refresh_token = create_refresh_token({"sub": str(user.id)})
+    access_token = create_access_token({"sub": user_id})
+    refresh_token = create_refresh_token({"sub": user_id})
 
     return Token(
         access_token=access_token,
@@ -89,7 +128,7 @@ async def login(
         token_type="bearer",
     )
 
-@router.post("/refresh", response_model=Token)
+@router.post("/refresh", response_model=Token, dependencies=[Depends(limit_by_ip(refresh_per_ip))])
 async def refresh_access_token(
     token_req: RefreshTokenRequest,
     db: AsyncSession = Depends(get_db)
@@ -116,19 +155,17 @@ async def refresh_access_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # 2. Check if that refresh_token's jti is already blacklisted
-    if await is_token_blacklisted(old_jti, db):
+    # 2. Check if that refresh_token's jti is already blacklisted, in the
+    #    table itself: the cache may not have seen another worker's revocation
+    # 3. Revoke (blacklist) the old refresh token immediately; if a replay
+    #    of it got there first, only one of them gets new tokens
+    if await is_token_blacklisted(old_jti, db, use_cache=False) or not await revoke_token(payload, db):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Refresh token has been revoked",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # 3. Revoke (blacklist) the old refresh token immediately
-    black_entry = TokenBlacklist(jti=old_jti, token_type="refresh")
-    db.add(black_entry)
-    await db.commit()
-
     # 4. Extract user ID ("sub") and ensure user still exists
     try:
         user_id = uuid.UUID(payload.get("sub"))
@@ -181,13 +218,12 @@ async def logout(
             detail="Malformed token: no JTI",
         )
 
-    # 1. If it’s already blacklisted, nothing to do
-    if await is_token_blacklisted(jti, db):
+    # 1. If it’s already blacklisted (per the table, not the cache), nothing to do
+    if await is_token_blacklisted(jti, db, use_cache=False):
         return {"msg": "Token already revoked"}
 
-    # 2. Blacklist this refresh token
-    black_entry = TokenBlacklist(jti=jti, token_type="refresh")
-    db.add(black_entry)
-    await db.commit()
+    # 2. Blacklist this refresh token, unless a concurrent logout just did
+    if not await revoke_token(payload, db):
+        return {"msg": "Token already revoked"}
 
     return {"msg": "Successfully logged out"}
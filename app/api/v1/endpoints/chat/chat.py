@@ -1,53 +1,87 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, Query, status
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.dependencies import get_current_user
-from app.db.session import get_db
-from app.schemas.message import WSMessage, MessageCreate, MessageRead
-from app.models.message import Message
+from app.core.security import get_current_user
+from app.db.session import AsyncSessionLocal, get_db
+from app.schemas.chat import ChatCreate, ChatPage
+from app.core.pagination import InvalidCursor
+from app.core.rate_limiting import chat_frames_per_user
+from app.core.serialization import encode_frame, loaded_values, typed_response
 from app.core.websocket_manager import manager
 from app.models.ticket import Ticket
-import asyncio
+from app.services.chat_history import chat_history
+from app.services.chat_persistence import chat_writer
+from typing import Literal, Optional
+from uuid import UUID
 
 router = APIRouter()
 
+@router.get("/tickets/{ticket_id}/messages", response_model=ChatPage)
+async def get_ticket_messages(
+    ticket_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_user),
+    cursor: Optional[str] = None,
+    direction: Literal["next", "prev"] = "next",
+    limit: int = Query(50, ge=1, le=200)
+):
+    ticket = await db.get(Ticket, ticket_id)
+    if not ticket or current_user.id not in (ticket.user_id, ticket.assigned_to_id):
+        raise HTTPException(status_code=404, detail="Ticket not found")
+    try:
+        items, next_cursor, prev_cursor = await chat_history.page(db, ticket.id, cursor, direction, limit)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return typed_response(ChatPage, {"items": loaded_values(items), "next_cursor": next_cursor, "prev_cursor": prev_cursor})
+
 @router.websocket("/ws/tickets/{ticket_id}")
 async def websocket_endpoint(
     websocket: WebSocket,
-    ticket_id: str,
+    ticket_id: UUID,
     token: str = Query(...),
-    db: AsyncSession = Depends(get_db)
+    last_seen_id: Optional[UUID] = Query(None),
 ):
-    # Authenticate user via token query param
-    user = await get_current_user(token, db)
-    # Verify ticket exists and user is participant (owner or assigned CSR)
-    ticket = await db.get(Ticket, ticket_id)
-    if not ticket or (user.id != ticket.user_id and user.id != ticket.assigned_to_id):
+    # A DB session is held only while the socket is set up, never for its
+    # lifetime; messages are written by chat_writer in its own transactions
+    replay = None
+    async with AsyncSessionLocal() as db:
+        # Authenticate user via token query param (served from the principal cache)
+        try:
+            user = await get_current_user(token, db)
+        except HTTPException:
+            user = None
+        # Verify ticket exists and user is participant (owner or assigned CSR)
+        ticket = await db.get(Ticket, ticket_id) if user else None
+        allowed = ticket is not None and user.id in (ticket.user_id, ticket.assigned_to_id)
+        # Reconnecting clients get every message after the last one they saw,
+        # from the ticket's history buffer and, if they missed more than it
+        # holds, the DB
+        if allowed and last_seen_id is not None:
+            replay = await chat_history.replay(db, ticket.id, last_seen_id)
+    if not allowed:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return
 
-    await manager.connect(ticket_id, websocket)
+    backlog = None
+    if replay is not None:
+        backlog = lambda: [encode_frame(message) for message in replay()]
+
+    await manager.connect(ticket_id, websocket, backlog)
     try:
         while True:
             data = await websocket.receive_text()
+            # Over the limit: drop the frame before parsing or queueing it
+            if chat_frames_per_user.check(str(user.id)):
+                await websocket.send_json({"error": "Too many messages, slow down"})
+                continue
             # parse inbound
-            payload = MessageCreate.parse_raw(data)
-            # persist message
-            msg = Message(
-                ticket_id=payload.ticket_id,
-                sender_id=user.id,
-                content=payload.content
-            )
-            db.add(msg)
-            await db.commit()
-            await db.refresh(msg)
-
-            ws_msg = WSMessage(
-                ticket_id=msg.ticket_id,
-                sender_id=msg.sender_id,
-                content=msg.content,
-                timestamp=msg.timestamp
-            )
-            # broadcast
-            await manager.broadcast(ticket_id, ws_msg.dict())
+            payload = ChatCreate.model_validate_json(data)
+            # persist (group-committed with other connections' messages) and
+            # broadcast, in the order set by CHAT_WRITE_MODE
+            try:
+                await chat_writer.submit(ticket.id, user.id, payload.content)
+            except Exception:
+                await websocket.send_json({"error": "Message could not be saved"})
     except WebSocketDisconnect:
-        manager.disconnect(ticket_id, websocket)
\ No newline at end of file
+        pass
+    finally:
+        manager.disconnect(ticket_id, websocket)
@@ -1,61 +1,192 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from uuid import UUID
-from typing import List, Optional
+from datetime import datetime
+from typing import List, Literal, Optional
 
-from app.schemas.ticket import TicketOut, TicketAssign, TicketUpdateStatus, TicketStatus
-from app.models.ticket import Ticket
+from app.schemas.ticket import (
+    TicketOut,
+    TicketPage,
+    TicketAssign,
+    TicketUpdateStatus,
+    TicketStatus,
+    TicketImportResult,
+    TicketSearchResult,
+    TicketDashboard,
+)
+from app.models.ticket import Ticket, TicketStatus as DBTicketStatus
+from app.core.pagination import InvalidCursor, keyset_paginate
+from app.core.config import settings
+from app.core.serialization import loaded_values, typed_response
 from app.core.security import require_csr, get_current_user
+from app.db.replica import get_read_db
 from app.db.session import get_db
+from app.services.ticket_export import gzip_chunks, iter_export_chunks, naive_utc
+from app.services.ticket_import import import_tickets
+from app.services.ticket_search import SearchUnavailable, search_tickets
+from app.services.ticket_assignment import record_ticket_change, ticket_state
+from app.services.ticket_dashboard import dashboard_snapshot, record_rollup_change
 
 router = APIRouter()
 
-@router.get("/tickets", response_model=List[TicketOut])
+@router.get("/tickets", response_model=TicketPage)
 async def get_all_tickets(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user = Depends(require_csr),
     unassigned: Optional[bool] = False,
     status: Optional[str] = None,
-    skip: int = 0,
-    limit: int = 10
+    category: Optional[str] = None,
+    cursor: Optional[str] = None,
+    direction: Literal["next", "prev"] = "next",
+    limit: int = Query(10, ge=1, le=100)
 ):
     query = select(Ticket)
     if unassigned:
         query = query.where(Ticket.assigned_to_id.is_(None))
     if status:
         query = query.where(Ticket.status == status)
-    result = await db.execute(query.offset(skip).limit(limit))
-    return result.scalars().all()
+    if category:
+        query = query.where(Ticket.category == category)
+    try:
+        items, next_cursor, prev_cursor = await keyset_paginate(
+            db, query, Ticket.created_at, Ticket.id, cursor, direction, limit
+        )
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return typed_response(TicketPage, {"items": loaded_values(items), "next_cursor": next_cursor, "prev_cursor": prev_cursor})
+
+@router.get("/dashboard", response_model=TicketDashboard)
+async def get_dashboard(
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(require_csr)
+):
+    # Served from this worker's snapshot, at most DASHBOARD_CACHE_TTL_SECONDS old
+    return await dashboard_snapshot.get(db)
+
+@router.get("/tickets/search", response_model=TicketSearchResult)
+async def search_all_tickets(
+    q: str = Query(..., min_length=1, max_length=200),
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(require_csr),
+    status: Optional[TicketStatus] = None,
+    category: Optional[str] = None,
+    assigned_to_id: Optional[UUID] = None,
+    unassigned: bool = False,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=1000)
+):
+    """
+    Full-text search over ticket titles and descriptions, best match first.
+    """
+    try:
+        items = await search_tickets(
+            db,
+            q,
+            status=DBTicketStatus(status.value) if status else None,
+            category=category,
+            assigned_to_id=assigned_to_id,
+            unassigned=unassigned,
+            limit=limit,
+            offset=offset,
+        )
+    except SearchUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    return typed_response(TicketSearchResult, {"items": items, "limit": limit, "offset": offset})
+
+@router.post("/tickets/import", response_model=TicketImportResult)
+async def bulk_import_tickets(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(require_csr),
+    format: Literal["jsonl", "csv"] = "jsonl",
+    batch_size: int = Query(settings.TICKET_IMPORT_BATCH_SIZE, ge=1, le=10000)
+):
+    """
+    Stream a JSONL or CSV body of tickets into the database in batches.
+    Rows that fail validation are reported by line number; the rest are
+    inserted and auto-assigned.
+    """
+    return await import_tickets(
+        db,
+        request.stream(),
+        fmt=format,
+        batch_size=batch_size,
+        strategy=settings.TICKET_ASSIGNMENT_STRATEGY,
+    )
+
+@router.get("/tickets/export")
+async def export_tickets(
+    current_user = Depends(require_csr),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    status: Optional[List[TicketStatus]] = Query(None),
+    include_messages: bool = False,
+    gzip: bool = False,
+    batch_size: int = Query(1000, ge=1, le=10000)
+):
+    """
+    Stream every matching ticket as NDJSON (one JSON object per line),
+    oldest first, optionally with its chat messages and gzip-compressed.
+    """
+    # Checked before streaming: once the body starts, the 200 is already sent
+    since, until = naive_utc(since), naive_utc(until)
+    if since is not None and until is not None and since >= until:
+        raise HTTPException(status_code=422, detail="since must be before until")
+    chunks = iter_export_chunks(
+        since=since,
+        until=until,
+        statuses=[DBTicketStatus(s.value) for s in status] if status else None,
+        include_messages=include_messages,
+        batch_size=batch_size,
+    )
+    headers = {"Content-Disposition": 'attachment; filename="tickets.ndjson"'}
+    if gzip:
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type="application/x-ndjson", headers=headers)
 
-@router.post("tickets/{ticket_id}/assign", response_model=TicketOut)
+@router.post("/tickets/{ticket_id}/assign", response_model=TicketOut)
 async def assign_ticket(
     ticket_id: UUID,
     assign_data: TicketAssign,
     db: AsyncSession = Depends(get_db),
     current_user = Depends(require_csr)
 ):
-    ticket = await db.get(Ticket, ticket_id)
+    # Locked until commit, so a concurrent change cannot apply its counter
+    # updates against the same "before" state
+    ticket = await db.get(Ticket, ticket_id, with_for_update=True, populate_existing=True)
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
+    before = ticket_state(ticket)
     ticket.assigned_to_id = assign_data.assignee_id
     if assign_data.priority:
         ticket.priority = assign_data.priority
+    after = ticket_state(ticket)
+    await record_ticket_change(db, before, after)
+    await record_rollup_change(db, before, after)
     await db.commit()
     await db.refresh(ticket)
     return ticket
 
-@router.patch("tickets/{ticket_id}", response_model=TicketOut)
+@router.patch("/tickets/{ticket_id}", response_model=TicketOut)
 async def update_ticket_status(
     ticket_id: UUID,
     update: TicketUpdateStatus,
     db: AsyncSession = Depends(get_db),
     current_user = Depends(require_csr)
 ):
-    ticket = await db.get(Ticket, ticket_id)
+    # Locked until commit, so a concurrent change cannot apply its counter
+    # updates against the same "before" state
+    ticket = await db.get(Ticket, ticket_id, with_for_update=True, populate_existing=True)
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
+    before = ticket_state(ticket)
     ticket.status = update.status
+    after = ticket_state(ticket)
+    await record_ticket_change(db, before, after)
+    await record_rollup_change(db, before, after)
     await db.commit()
     await db.refresh(ticket)
     return ticket
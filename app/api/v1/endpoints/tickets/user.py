@@ -1,15 +1,23 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.schemas.ticket import TicketCreate, TicketOut
-from app.models.ticket import Ticket
+from app.schemas.ticket import TicketCreate, TicketOut, TicketPage
+from app.models.ticket import Ticket, TicketStatus
+from app.core.pagination import InvalidCursor, keyset_paginate
 from app.core.security import get_current_user
+from app.core.rate_limiting import limit_by_user, ticket_create_per_user
+from app.db.replica import get_read_db
 from app.db.session import get_db
+from app.core.config import settings
+from app.core.serialization import loaded_values, typed_response
+from app.services.ticket_assignment import TicketState, assign_csr_to_ticket, record_ticket_change
+from app.services.ticket_dashboard import record_rollup_change
 from sqlalchemy.future import select
-from typing import List, Optional
+from typing import Literal, Optional
+from uuid import UUID
 
 router = APIRouter()
 
-@router.post("/tickets", response_model=TicketOut)
+@router.post("/tickets", response_model=TicketOut, dependencies=[Depends(limit_by_user(ticket_create_per_user))])
 async def create_ticket(
     ticket_in: TicketCreate,
     db: AsyncSession = Depends(get_db),
@@ -17,40 +25,49 @@ async def create_ticket(
 ):
     # Instantiate ticket
     ticket = Ticket(
-        **ticket_in.dict(),
+        **ticket_in.model_dump(),
         user_id=current_user.id,
     )
     # Auto-assign to CSR
-    csr_id = await assign_csr_to_ticket(db, strategy="round_robin")
+    csr_id = await assign_csr_to_ticket(db, strategy=settings.TICKET_ASSIGNMENT_STRATEGY)
+    state = TicketState(csr_id, TicketStatus.OPEN, None)
     if csr_id:
         ticket.assigned_to_id = csr_id
-    
+        await record_ticket_change(db, None, state)
+    await record_rollup_change(db, None, state)
+
     db.add(ticket)
     await db.commit()
     await db.refresh(ticket)
     return ticket
 
-@router.get("/tickets", response_model=List[TicketOut])
+@router.get("/tickets", response_model=TicketPage)
 async def get_my_tickets(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user = Depends(get_current_user),
     status: Optional[str] = Query(None),
     category: Optional[str] = Query(None),
-    skip: int = 0,
-    limit: int = 10
+    cursor: Optional[str] = None,
+    direction: Literal["next", "prev"] = "next",
+    limit: int = Query(10, ge=1, le=100)
 ):
     query = select(Ticket).where(Ticket.user_id == current_user.id)
     if status:
         query = query.where(Ticket.status == status)
     if category:
         query = query.where(Ticket.category == category)
-    result = await db.execute(query.offset(skip).limit(limit))
-    return result.scalars().all()
+    try:
+        items, next_cursor, prev_cursor = await keyset_paginate(
+            db, query, Ticket.created_at, Ticket.id, cursor, direction, limit
+        )
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return typed_response(TicketPage, {"items": loaded_values(items), "next_cursor": next_cursor, "prev_cursor": prev_cursor})
 
-@router.get("tickets/{ticket_id}", response_model=TicketOut)
+@router.get("/tickets/{ticket_id}", response_model=TicketOut)
 async def get_ticket(
     ticket_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user = Depends(get_current_user)
 ):
     ticket = await db.get(Ticket, ticket_id)
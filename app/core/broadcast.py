@@ -0,0 +1,394 @@
+"""
+Cross-worker fan-out for chat rooms.
+
+Every worker delivers a published frame to its own sockets straight away and
+hands it to a backend, which relays it to the other workers. Each worker then
+writes only to the sockets it holds.
+
+Relaying is best effort. Whenever frames may not have reached every worker,
+the backend reports it through `lost(room)`, on every worker that may have
+missed them: `room` is the room whose frames were dropped, or None when any
+room's may have been (a worker was cut off from the others for a while).
+
+Backends:
+  - "memory":   single process, nothing to relay (the default)
+  - "local":    workers on one host, relayed through a Unix-socket broker run
+                by whichever worker holds the broker lock
+  - "postgres": workers anywhere, relayed with LISTEN/NOTIFY (needs asyncpg)
+"""
+import asyncio
+import fcntl
+import os
+import struct
+from abc import ABC, abstractmethod
+from typing import Callable, Optional, Set
+
+from app.core.config import settings
+from app.core.logging import logger
+
+# deliver(room, data) writes a frame to this worker's sockets in that room
+Deliver = Callable[[str, str], None]
+# lost(room) is told that frames of `room` (None: of any room) may be missing
+Lost = Callable[[Optional[str]], None]
+
+# Relayed in place of a room name to tell the other workers about dropped
+# frames; the frame's data is the room, or empty for all rooms
+LOST_ROOM = "\x00lost"
+# Rooms with dropped frames remembered until they can be announced; beyond
+# this many, all rooms are announced as lost
+MAX_LOST_ROOMS = 1000
+
+_HEADER = struct.Struct("!I")
+
+
+def _encode(room: str, data: str) -> bytes:
+    return f"{room}\n{data}".encode("utf-8")
+
+
+def _decode(payload: bytes):
+    room, _, data = payload.decode("utf-8").partition("\n")
+    return room, data
+
+
+class BroadcastBackend(ABC):
+    """
+    Relays frames between workers. `publish` must not wait on slow peers.
+    """
+
+    lost: Lost = staticmethod(lambda room: None)
+
+    async def start(self, deliver: Deliver, lost: Optional[Lost] = None) -> None:
+        self.deliver = deliver
+        if lost is not None:
+            self.lost = lost
+
+    def _dropped(self, room: str) -> None:
+        """
+        Record that a frame of `room` was not relayed.
+        """
+        self.unrelayed += 1
+        if len(self._lost_rooms) >= MAX_LOST_ROOMS:
+            self._lost_rooms = {""}
+        elif "" not in self._lost_rooms:
+            self._lost_rooms.add(room)
+
+    def _announcements(self) -> list:
+        """
+        Take the pending lost-room notices, as (room, data) frames to relay.
+        """
+        rooms, self._lost_rooms = self._lost_rooms, set()
+        return [(LOST_ROOM, "")] if "" in rooms else [(LOST_ROOM, room) for room in rooms]
+
+    def _received(self, room: str, data: str) -> None:
+        if room == LOST_ROOM:
+            self.lost(data or None)
+        else:
+            self.deliver(room, data)
+
+    @abstractmethod
+    async def publish(self, room: str, data: str) -> None:
+        """
+        Hand a frame already delivered locally to the other workers.
+        """
+
+    async def stop(self) -> None:
+        pass
+
+
+class InProcessBackend(BroadcastBackend):
+    """
+    Single-worker deployments: there is nobody to relay to.
+    """
+
+    async def publish(self, room: str, data: str) -> None:
+        pass
+
+
+class LocalSocketBackend(BroadcastBackend):
+    """
+    Relays frames between the workers of one host through a Unix socket.
+
+    The worker that holds an exclusive flock on `<path>.lock` runs the
+    broker; the lock is released by the kernel if that worker dies, and the
+    others race to take over. Every worker, the broker's included, connects
+    as a client. The broker forwards each frame to every client except its
+    sender. Frames are length-prefixed.
+    """
+
+    def __init__(self, path: str, retry_interval: float = 0.5, max_client_buffer: int = 8 << 20):
+        self.path = path
+        self.retry_interval = retry_interval
+        self.max_client_buffer = max_client_buffer
+        self._lock_fd: Optional[int] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._clients: Set[asyncio.StreamWriter] = set()
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+        # rooms whose frames the other workers missed, still to be announced
+        self._lost_rooms: Set[str] = set()
+        self.relayed = 0
+        self.unrelayed = 0
+
+    async def start(self, deliver: Deliver, lost: Optional[Lost] = None) -> None:
+        await super().start(deliver, lost)
+        self._task = asyncio.create_task(self._run())
+
+    async def publish(self, room: str, data: str) -> None:
+        writer = self._writer
+        if writer is None or writer.is_closing():
+            self._dropped(room)
+            return
+        if writer.transport.get_write_buffer_size() > self.max_client_buffer:
+            # Broker is not keeping up; deliver locally only
+            self._dropped(room)
+            return
+        for frame in self._announcements() + [(room, data)]:
+            self._write(writer, *frame)
+        self.relayed += 1
+
+    def _write(self, writer: asyncio.StreamWriter, room: str, data: str) -> None:
+        payload = _encode(room, data)
+        writer.write(_HEADER.pack(len(payload)) + payload)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        if self._writer is not None:
+            self._writer.close()
+        if self._server is not None:
+            self._server.close()
+            for client in list(self._clients):
+                client.close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def _try_become_broker(self) -> bool:
+        if self._lock_fd is None:
+            fd = os.open(self.path + ".lock", os.O_CREAT | os.O_RDWR, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                return False
+            self._lock_fd = fd
+        return True
+
+    async def _serve(self) -> None:
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._handle_client, path=self.path)
+        logger.info(f"Chat broadcast broker listening on {self.path} (pid {os.getpid()})")
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._clients.add(writer)
+        try:
+            while True:
+                header = await reader.readexactly(_HEADER.size)
+                payload = await reader.readexactly(_HEADER.unpack(header)[0])
+                frame = header + payload
+                for client in list(self._clients):
+                    if client is writer:
+                        continue
+                    if client.transport.get_write_buffer_size() > self.max_client_buffer:
+                        logger.warning("Dropping stalled chat broadcast client")
+                        self._clients.discard(client)
+                        client.close()
+                        continue
+                    client.write(frame)
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            # Client went away, or the broker is shutting down
+            pass
+        finally:
+            self._clients.discard(writer)
+            writer.close()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if self._server is None and self._try_become_broker():
+                    await self._serve()
+                reader, self._writer = await asyncio.open_unix_connection(self.path)
+                # Frames relayed while we were not connected never reached us,
+                # and the others have yet to hear about the ones we dropped
+                self.lost(None)
+                for frame in self._announcements():
+                    self._write(self._writer, *frame)
+                while True:
+                    header = await reader.readexactly(_HEADER.size)
+                    payload = await reader.readexactly(_HEADER.unpack(header)[0])
+                    self._received(*_decode(payload))
+            except asyncio.CancelledError:
+                raise
+            except (OSError, asyncio.IncompleteReadError):
+                # Broker missing or gone: retry, possibly taking over as broker
+                pass
+            except Exception as e:
+                logger.error(f"Chat broadcast relay failed: {str(e)}")
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            await asyncio.sleep(self.retry_interval)
+
+
+class PostgresNotifyBackend(BroadcastBackend):
+    """
+    Relays frames through PostgreSQL LISTEN/NOTIFY, for workers spread over
+    several hosts. NOTIFY payloads are limited to just under 8000 bytes;
+    larger frames are only delivered locally. One sender task issues the
+    NOTIFYs in publish order, so `publish` never waits on the database.
+
+    The LISTEN and NOTIFY connections are reopened whenever either drops
+    (checked by a ping every `keepalive_interval` seconds while idle),
+    retrying with backoff from `retry_interval` up to `max_retry_interval`.
+    Each outage is logged and counted in `outages`; frames published
+    meanwhile are queued, up to `max_pending`, and sent on reconnect.
+    """
+
+    MAX_PAYLOAD = 7999
+
+    def __init__(
+        self,
+        dsn: str,
+        channel: str,
+        max_pending: int = 10000,
+        retry_interval: float = 0.5,
+        max_retry_interval: float = 30.0,
+        keepalive_interval: float = 5.0,
+    ):
+        self.dsn = dsn
+        self.channel = channel
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        self.keepalive_interval = keepalive_interval
+        self._connect = None
+        self._listen = None
+        self._notify = None
+        self._notify_pid: Optional[int] = None
+        self._outbox: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._task: Optional[asyncio.Task] = None
+        self._lost_rooms: Set[str] = set()
+        self.connected = False
+        self.relayed = 0
+        self.unrelayed = 0
+        self.outages = 0
+
+    async def start(self, deliver: Deliver, lost: Optional[Lost] = None) -> None:
+        try:
+            import asyncpg
+        except ImportError as e:
+            raise RuntimeError("The postgres broadcast backend requires asyncpg") from e
+        await super().start(deliver, lost)
+        self._connect = asyncpg.connect
+        self._task = asyncio.create_task(self._run())
+
+    def _on_notify(self, connection, pid: int, channel: str, payload: str) -> None:
+        # Our own frames were already delivered locally when published
+        if pid == self._notify_pid:
+            return
+        self._received(*_decode(payload.encode("utf-8")))
+
+    async def publish(self, room: str, data: str) -> None:
+        payload = _encode(room, data)
+        if len(payload) > self.MAX_PAYLOAD:
+            self._dropped(room)
+            return
+        try:
+            self._outbox.put_nowait(payload.decode("utf-8"))
+        except asyncio.QueueFull:
+            self._dropped(room)
+
+    async def _open(self) -> None:
+        self._listen = await self._connect(self.dsn)
+        self._notify = await self._connect(self.dsn)
+        self._notify_pid = self._notify.get_server_pid()
+        await self._listen.add_listener(self.channel, self._on_notify)
+
+    async def _close(self) -> None:
+        for connection in (self._listen, self._notify):
+            if connection is not None and not connection.is_closed():
+                try:
+                    await asyncio.wait_for(connection.close(), timeout=self.retry_interval)
+                except Exception:
+                    connection.terminate()
+        self._listen = self._notify = self._notify_pid = None
+
+    async def _run(self) -> None:
+        delay = self.retry_interval
+        while True:
+            try:
+                await self._open()
+                # Frames NOTIFYed while LISTEN was down never reached us
+                self.lost(None)
+                if self.outages:
+                    logger.info(f"Chat broadcast reconnected to PostgreSQL after {self.outages} outage(s)")
+                self.connected = True
+                delay = self.retry_interval
+                await self._send()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self.connected or not self.outages:
+                    # Once per outage, not once per retry
+                    self.outages += 1
+                    logger.error(f"Chat broadcast lost PostgreSQL, relaying paused until it reconnects: {str(e)}")
+            self.connected = False
+            await self._close()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_retry_interval)
+
+    async def _send(self) -> None:
+        """
+        Issue queued NOTIFYs until a connection drops, then raise.
+        """
+        while True:
+            notices = self._announcements()
+            try:
+                for room, data in notices:
+                    await self._notify.execute("SELECT pg_notify($1, $2)", self.channel, _encode(room, data).decode("utf-8"))
+            except Exception:
+                # Announce them after reconnecting
+                self._lost_rooms.update(data for _, data in notices)
+                raise
+            try:
+                payload = await asyncio.wait_for(self._outbox.get(), timeout=self.keepalive_interval)
+            except asyncio.TimeoutError:
+                # Idle: make sure LISTEN is still there to hear the others
+                await asyncio.wait_for(self._listen.fetchval("SELECT 1"), timeout=self.keepalive_interval)
+                continue
+            try:
+                await self._notify.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+                self.relayed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._dropped(_decode(payload.encode("utf-8"))[0])
+                if self._notify.is_closed():
+                    raise
+                logger.error(f"Chat broadcast NOTIFY failed: {str(e)}")
+            if self._listen.is_closed():
+                raise ConnectionError("LISTEN connection closed")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        await self._close()
+
+
+def _plain_postgres_dsn(url: str) -> str:
+    for prefix in ("postgresql+asyncpg://", "postgres://"):
+        if url.startswith(prefix):
+            return url.replace(prefix, "postgresql://", 1)
+    return url
+
+
+def create_backend(name: str = settings.WS_BROADCAST_BACKEND) -> BroadcastBackend:
+    if name == "memory":
+        return InProcessBackend()
+    if name == "local":
+        return LocalSocketBackend(settings.WS_BROKER_SOCKET)
+    if name == "postgres":
+        return PostgresNotifyBackend(_plain_postgres_dsn(settings.DATABASE_URL), settings.WS_NOTIFY_CHANNEL)
+    raise ValueError(f"Unknown broadcast backend: {name}")
@@ -1,3 +1,4 @@
+from typing import Dict, Optional
 from pydantic_settings import BaseSettings, Field
 
 class Settings(BaseSettings):
@@ -6,12 +7,141 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+
+    # Optional read replica for the query-only ticket routes. A user's reads
+    # stay on the primary for READ_AFTER_WRITE_SECONDS after they write, and
+    # all reads do while the replica lags by more than
+    # READ_REPLICA_MAX_LAG_SECONDS or fails its probe, run every
+    # READ_REPLICA_PROBE_INTERVAL_SECONDS (keep it below the max lag). Recent
+    # writers are kept in a table shared by the workers of a host; without
+    # READ_AFTER_WRITE_PATH (e.g. /dev/shm/sts-writers) only by workers
+    # forked from a preloaded app
+    READ_REPLICA_URL: Optional[str] = None
+    READ_AFTER_WRITE_SECONDS: float = 5.0
+    READ_AFTER_WRITE_PATH: str = ""
+    READ_AFTER_WRITE_SLOTS: int = 65536
+    READ_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    READ_REPLICA_PROBE_INTERVAL_SECONDS: float = 1.0
+
+    # SQL instrumentation: statements slower than DB_SLOW_QUERY_MS are logged
+    # by fingerprint, DB_LOG_SAMPLE_RATE of all statements are logged in full
+    # (parameter types and lengths only, never values),
+    # and DB_DEBUG_HEADERS adds per-request query totals to responses.
+    # DB_ECHO is SQLAlchemy's own log of every statement
+    DB_ECHO: bool = False
+    DB_SLOW_QUERY_MS: float = 200.0
+    DB_LOG_SAMPLE_RATE: float = 0.0
+    DB_DEBUG_HEADERS: bool = False
     
     # Security
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int         # 15 minutes for access‐tokens
     REFRESH_TOKEN_EXPIRE_DAYS: int # 30 days for refresh‐tokens
     ALGORITHM: str
+
+    # Revocation cache: how often each worker pulls new blacklist rows, and how
+    # long it may go without a successful sync before falling back to the DB
+    REVOCATION_SYNC_INTERVAL_SECONDS: float = 5.0
+    REVOCATION_MAX_STALENESS_SECONDS: float = 30.0
+
+    # Authenticated-principal cache (id, role, is_active keyed by token subject)
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 60.0
+
+    # Verified-token cache: claims of tokens whose signature was already
+    # checked, kept until the token expires or for at most the TTL
+    TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_CACHE_TTL_SECONDS: float = 900.0
+
+    # Password hashing: bcrypt runs on a dedicated "thread" or "process" pool.
+    # Set BCRYPT_TARGET_MS to calibrate the cost at startup instead of using
+    # BCRYPT_ROUNDS; logins rehash passwords stored with a lower cost (never
+    # a higher one, so lowering the cost only affects new hashes).
+    PASSWORD_HASH_EXECUTOR: str = "thread"
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    BCRYPT_ROUNDS: int = 12
+    BCRYPT_TARGET_MS: Optional[float] = None
+
+    # Ticket assignment: strategy for new tickets ("round_robin", "random" or
+    # "least_loaded"), how long a worker may use its cached CSR roster, and
+    # how often CSR workload counters are checked against the tickets table
+    TICKET_ASSIGNMENT_STRATEGY: str = "round_robin"
+    ASSIGNMENT_PRIORITY_WEIGHTED: bool = True
+    CSR_ROSTER_TTL_SECONDS: float = 30.0
+    WORKLOAD_RECONCILE_INTERVAL_SECONDS: float = 600.0
+
+    # Bulk ticket import: rows per multi-row INSERT/commit, and how many
+    # per-row errors a single import reports back
+    TICKET_IMPORT_BATCH_SIZE: int = 1000
+    TICKET_IMPORT_MAX_ERRORS: int = 1000
+
+    # WebSocket fan-out: frames queued per connection, how long one send may
+    # take, and what to do with a client whose queue is full ("disconnect",
+    # "drop_oldest" or "drop_newest")
+    WS_SEND_QUEUE_SIZE: int = 100
+    WS_SEND_TIMEOUT_SECONDS: float = 10.0
+    WS_SLOW_CONSUMER_POLICY: str = "disconnect"
+
+    # Cross-worker chat fan-out: "memory" (single worker), "local" (workers on
+    # one host, relayed through a Unix-socket broker) or "postgres" (LISTEN/NOTIFY)
+    WS_BROADCAST_BACKEND: str = "memory"
+    WS_BROKER_SOCKET: str = "/tmp/sts-broadcast.sock"
+    WS_NOTIFY_CHANNEL: str = "sts_chat"
+
+    # Chat persistence: "durable" broadcasts a message once it is committed,
+    # "broadcast_first" broadcasts on receipt and writes in the background.
+    # Messages are group-committed in batches of up to CHAT_WRITE_BATCH_SIZE,
+    # waiting at most CHAT_WRITE_FLUSH_SECONDS for a batch to fill
+    CHAT_WRITE_MODE: str = "durable"
+    CHAT_WRITE_BATCH_SIZE: int = 200
+    CHAT_WRITE_FLUSH_SECONDS: float = 0.005
+    CHAT_WRITE_MAX_PENDING: int = 10000
+
+    # Chat history: the newest CHAT_HISTORY_SIZE messages of up to
+    # CHAT_HISTORY_TICKETS recently active tickets are kept in memory,
+    # reloaded from the DB every CHAT_HISTORY_TTL_SECONDS. Only with a
+    # cross-worker WS_BROADCAST_BACKEND, which keeps them complete
+    CHAT_HISTORY_SIZE: int = 200
+    CHAT_HISTORY_TICKETS: int = 5000
+    CHAT_HISTORY_TTL_SECONDS: float = 600.0
+
+    # Ticket search ranks at most this many of the newest matches, so very
+    # common words cost the same as rare ones (0 ranks every match)
+    TICKET_SEARCH_RANK_WINDOW: int = 5000
+
+    # CSR dashboard: how long each worker serves its snapshot of the ticket
+    # rollups before reading them again
+    DASHBOARD_CACHE_TTL_SECONDS: float = 2.0
+
+    # Metrics (/metrics): how often each worker checks how late its event
+    # loop runs timers
+    METRICS_LOOP_LAG_INTERVAL_SECONDS: float = 0.5
+
+    # Logging: records are formatted ("json" or "text") and written by a
+    # background thread; at most LOG_QUEUE_SIZE wait, the rest are dropped.
+    # LOG_SAMPLE_RATES keeps that fraction of a logger's records below
+    # WARNING, e.g. {"sqlalchemy.engine": 0.01}; each call site may log
+    # LOG_ERROR_BURST errors per LOG_ERROR_WINDOW_SECONDS
+    LOG_FORMAT: str = "json"
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_SAMPLE_RATES: Dict[str, float] = {}
+    LOG_ERROR_BURST: int = 10
+    LOG_ERROR_WINDOW_SECONDS: float = 60.0
+
+    # Rate limits ("<count>/<second|minute|hour>", empty to disable), kept
+    # in a token-bucket table shared by the workers of a host. Without
+    # RATE_LIMIT_PATH (e.g. /dev/shm/sts-ratelimit) the table is shared only
+    # by workers forked from a preloaded app
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_PATH: str = ""
+    RATE_LIMIT_SLOTS: int = 65536
+    RATE_LIMIT_LOGIN_PER_IP: str = "30/minute"
+    RATE_LIMIT_LOGIN_PER_ACCOUNT: str = "10/minute"
+    RATE_LIMIT_SIGNUP_PER_IP: str = "10/hour"
+    RATE_LIMIT_REFRESH_PER_IP: str = "60/minute"
+    RATE_LIMIT_TICKET_CREATE_PER_USER: str = "30/minute"
+    RATE_LIMIT_CHAT_FRAMES_PER_USER: str = "10/second"
     
     # === App Settings ===
     API_BASE_URL: str = Field(..., env="API_BASE_URL")
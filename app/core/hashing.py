@@ -0,0 +1,120 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Optional
+
+import bcrypt
+
+from app.core.config import settings
+from app.core.logging import logger
+
+MIN_BCRYPT_ROUNDS = 10
+MAX_BCRYPT_ROUNDS = 16
+
+
+class HashingBusyError(Exception):
+    """
+    Raised when more password hashes are queued than PASSWORD_HASH_MAX_PENDING.
+    """
+
+
+def _hashpw(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+
+
+def _checkpw(password: bytes, hashed: bytes) -> bool:
+    return bcrypt.checkpw(password, hashed)
+
+
+def calibrate_rounds(target_ms: float) -> int:
+    """
+    Pick the highest bcrypt cost whose hash still takes about `target_ms` on
+    this machine. Each extra round doubles the work.
+    """
+    rounds = MIN_BCRYPT_ROUNDS
+    started = time.perf_counter()
+    _hashpw(b"calibration", rounds)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    while rounds < MAX_BCRYPT_ROUNDS and elapsed_ms * 2 <= target_ms:
+        rounds += 1
+        elapsed_ms *= 2
+    return rounds
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated, bounded executor so hashing never blocks the
+    event loop. At most `max_pending` hashes may be queued or running;
+    beyond that callers get HashingBusyError instead of an ever-growing queue.
+    """
+
+    def __init__(self, kind: str, workers: int, max_pending: int, rounds: int):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown password hash executor: {kind}")
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self.pending = 0
+        self._executor: Optional[Executor] = None
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                # Imported on first use: it pulls in multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    async def _run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            raise HashingBusyError()
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        hashed = await self._run(_hashpw, password.encode("utf-8"), self.rounds)
+        return hashed.decode("utf-8")
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(
+            _checkpw, password.encode("utf-8"), hashed_password.encode("utf-8")
+        )
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """
+        True when the stored hash was made with a lower cost than the one
+        currently configured. Never downwards: with BCRYPT_TARGET_MS each
+        worker calibrates on its own and may settle a round apart from the
+        others, which must not make logins flip hashes back and forth.
+        """
+        try:
+            return int(hashed_password.split("$")[2]) < self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def calibrate(self, target_ms: float) -> None:
+        self.rounds = calibrate_rounds(target_ms)
+        logger.info(f"bcrypt cost calibrated to {self.rounds} rounds for ~{target_ms} ms")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    kind=settings.PASSWORD_HASH_EXECUTOR,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    rounds=settings.BCRYPT_ROUNDS,
+)
@@ -1,6 +1,27 @@
+"""
+Logging for the app and SQLAlchemy, off the event loop.
+
+Loggers only put records on a bounded queue; a listener thread formats
+them (JSON or text) and does the file and console I/O. Records carry the
+request id and route of the request that logged them. Per-logger sampling
+and a per-call-site rate limit on errors run before a record is queued, so
+discarded records cost next to nothing.
+"""
+import atexit
+import json
 import logging
-from logging.handlers import TimedRotatingFileHandler
 import os
+import queue
+import random
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
 
 # Ensure logs directory exists
 LOG_DIR = "logs"
@@ -8,26 +29,263 @@ os.makedirs(LOG_DIR, exist_ok=True)
 
 LOG_FILE_PATH = os.path.join(LOG_DIR, "app.log")
 
-# Formatter
-formatter = logging.Formatter(
-    "%(asctime)s - %(levelname)s - %(name)s - %(message)s"
-)
+# Loggers routed through the queue. SQLAlchemy's engine logger is included so
+# DB_ECHO does not install its own synchronous stdout handler.
+QUEUED_LOGGERS = ("app_logger", "sqlalchemy.engine.Engine")
+
+
+class RequestContext:
+    """
+    The request being handled, for log records. The route is read from the
+    ASGI scope when a record is made, as it is only known after routing.
+    """
+
+    __slots__ = ("request_id", "scope")
+
+    def __init__(self, request_id: str, scope: dict):
+        self.request_id = request_id
+        self.scope = scope
+
+    @property
+    def route(self) -> Optional[str]:
+        route = self.scope.get("route")
+        return route.path if route is not None else None
+
+
+_request_context: ContextVar[Optional[RequestContext]] = ContextVar("log_request_context", default=None)
+
+
+class RequestContextMiddleware:
+    """
+    Pure ASGI middleware giving every HTTP request and WebSocket a request id
+    (the client's X-Request-ID if it sent one), echoed in the response
+    headers and attached to every record logged while handling it.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", ()):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        if not request_id:
+            request_id = uuid.uuid4().hex
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (b"x-request-id", request_id.encode("latin-1"))]}
+            await send(message)
+
+        token = _request_context.set(RequestContext(request_id, scope))
+        try:
+            await self.app(scope, receive, send_with_id if scope["type"] == "http" else send)
+        finally:
+            _request_context.reset(token)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of the records below WARNING from the loggers in
+    `rates` (by logger name prefix, e.g. {"sqlalchemy.engine": 0.01}).
+    Warnings and errors are always kept.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        # longest prefix first, so the most specific rate wins
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+        self._by_logger: Dict[str, float] = {}
+
+    def _rate(self, name: str) -> float:
+        rate = self._by_logger.get(name)
+        if rate is None:
+            rate = next(
+                (rate for prefix, rate in self.rates if name == prefix or name.startswith(prefix + ".")),
+                1.0,
+            )
+            self._by_logger[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Let at most `burst` ERROR-or-worse records per call site through every
+    `window` seconds, so a failure repeated on every request does not flood
+    the logs. The first record let through after some were held back says
+    how many (`suppressed`).
+    """
+
+    def __init__(self, burst: int, window: float):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        # (pathname, lineno) -> [window start, records in window, suppressed]
+        self._sites: Dict[Tuple[str, int], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.ERROR or self.burst <= 0:
+            return True
+        now = time.monotonic()
+        key = (record.pathname, record.lineno)
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None or now - site[0] >= self.window:
+                suppressed = site[2] if site is not None else 0
+                self._sites[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+            if site[1] < self.burst:
+                site[1] += 1
+                return True
+            site[2] += 1
+            return False
+
 
-# File handler - rotates daily
-file_handler = TimedRotatingFileHandler(
-    LOG_FILE_PATH, when="midnight", interval=1, backupCount=7, encoding="utf-8"
-)
-file_handler.setFormatter(formatter)
-file_handler.setLevel(logging.ERROR)  # Only log errors and above to file
+class ContextQueueHandler(QueueHandler):
+    """
+    Puts records on the queue as they are, only stamped with the request
+    context; unlike QueueHandler it does not format them first, since that
+    would run on the caller's thread. Never blocks: records that do not fit
+    in a full queue are counted and dropped.
+    """
 
-# Console handler
-console_handler = logging.StreamHandler()
-console_handler.setFormatter(formatter)
-console_handler.setLevel(logging.INFO)  # Info and above to console
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        context = _request_context.get()
+        if context is not None:
+            record.request_id = context.request_id
+            record.route = context.route
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: time, level, logger, message, the request id
+    and route when logged during a request, and the traceback if any.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in ("request_id", "route", "suppressed"):
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        request_id = getattr(record, "request_id", None)
+        if request_id is not None:
+            line = f"{line} [request_id={request_id} route={getattr(record, 'route', None)}]"
+        suppressed = getattr(record, "suppressed", None)
+        if suppressed:
+            line = f"{line} ({suppressed} similar suppressed)"
+        return line
+
+
+def _formatter() -> logging.Formatter:
+    if settings.LOG_FORMAT == "json":
+        return JsonFormatter()
+    return TextFormatter("%(asctime)s - %(levelname)s - %(name)s - %(message)s")
+
+
+def _output_handlers() -> list:
+    formatter = _formatter()
+
+    # File handler - rotates daily
+    file_handler = TimedRotatingFileHandler(
+        LOG_FILE_PATH, when="midnight", interval=1, backupCount=7, encoding="utf-8"
+    )
+    file_handler.setFormatter(formatter)
+    file_handler.setLevel(logging.ERROR)  # Only log errors and above to file
+
+    # Console handler
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
+    console_handler.setLevel(logging.INFO)  # Info and above to console
+    return [file_handler, console_handler]
+
+
+queue_handler = ContextQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+queue_handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATES))
+queue_handler.addFilter(RateLimitFilter(settings.LOG_ERROR_BURST, settings.LOG_ERROR_WINDOW_SECONDS))
+
+_listener: Optional[QueueListener] = None
+
+
+def start_listener() -> None:
+    """
+    Start the thread that drains the queue into the file and console.
+    """
+    global _listener
+    if _listener is None:
+        _listener = QueueListener(queue_handler.queue, *_output_handlers(), respect_handler_level=True)
+        _listener.start()
+
+
+def stop_listener() -> None:
+    """
+    Write out everything queued so far and stop the listener thread.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def _restart_in_child() -> None:
+    # Forked workers (gunicorn --preload) inherit the queue but not the
+    # listener thread; start over with a fresh queue and listener
+    global _listener
+    _listener = None
+    queue_handler.queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    start_listener()
+
+
+for name in QUEUED_LOGGERS:
+    queued = logging.getLogger(name)
+    queued.addHandler(queue_handler)
+    queued.propagate = False
 
 # Main logger
 logger = logging.getLogger("app_logger")
 logger.setLevel(logging.DEBUG)  # Capture all levels
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
-logger.propagate = False
+
+start_listener()
+atexit.register(stop_listener)
+os.register_at_fork(after_in_child=_restart_in_child)
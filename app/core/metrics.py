@@ -0,0 +1,286 @@
+"""
+Process metrics in the Prometheus text format, served on `/metrics`.
+
+Request metrics are recorded by MetricsMiddleware; everything else (open
+WebSockets, pool usage) is read from its owner when scraped, so it costs
+nothing between scrapes. Each worker keeps and serves its own numbers.
+"""
+import asyncio
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from app.core.config import settings
+from app.core.logging import logger
+
+# Seconds; request latency and pool checkout wait
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Seconds the event loop ran late
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# Route label for requests that matched no route, so scanners probing
+# random paths cannot create unbounded series
+UNMATCHED = "unmatched"
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram. `observe` is one bisect and two additions.
+    """
+
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        # one per bound plus +Inf; not cumulative until rendered
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    """
+    The metrics of this worker. Histograms and counters are keyed by label
+    values; gauges are callbacks that return `{label values: value}` and run
+    only when the metrics are rendered (a callback may also report a
+    counter kept elsewhere).
+    """
+
+    def __init__(self):
+        # name -> (help, label names, buckets, {label values: Histogram})
+        self._histograms: Dict[str, tuple] = {}
+        # name -> (help, label names, {label values: count})
+        self._counters: Dict[str, tuple] = {}
+        # name -> (help, label names, callback, type)
+        self._gauges: Dict[str, tuple] = {}
+
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS) -> Dict[tuple, Histogram]:
+        """
+        Register a histogram and return its series dict; use
+        `registry.observe` (or the dict directly on hot paths).
+        """
+        entry = self._histograms.setdefault(name, (help, labels, tuple(buckets), {}))
+        return entry[3]
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Dict[tuple, int]:
+        entry = self._counters.setdefault(name, (help, labels, {}))
+        return entry[2]
+
+    def gauge(
+        self,
+        name: str,
+        help: str,
+        labels: Tuple[str, ...],
+        callback: Callable[[], Dict[tuple, float]],
+        type: str = "gauge",
+    ) -> None:
+        self._gauges[name] = (help, labels, callback, type)
+
+    def observe(self, name: str, value: float, *label_values: str) -> None:
+        _, _, buckets, series = self._histograms[name]
+        hist = series.get(label_values)
+        if hist is None:
+            hist = series[label_values] = Histogram(buckets)
+        hist.observe(value)
+
+    def inc(self, name: str, *label_values: str, amount: int = 1) -> None:
+        series = self._counters[name][2]
+        series[label_values] = series.get(label_values, 0) + amount
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for name, (help, label_names, callback, type) in self._gauges.items():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {type}")
+            try:
+                values = callback()
+            except Exception as e:
+                logger.warning(f"Metric {name} failed: {str(e)}")
+                continue
+            for label_values, value in values.items():
+                lines.append(f"{name}{_labels(dict(zip(label_names, label_values)))} {_number(value)}")
+
+        for name, (help, label_names, series) in self._counters.items():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} counter")
+            for label_values, value in list(series.items()):
+                lines.append(f"{name}{_labels(dict(zip(label_names, label_values)))} {value}")
+
+        for name, (help, label_names, _, series) in self._histograms.items():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} histogram")
+            for label_values, hist in list(series.items()):
+                labels = dict(zip(label_names, label_values))
+                cumulative = 0
+                for bound, count in zip(hist.bounds + (float("inf"),), hist.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels({**labels, 'le': _number(bound)})} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(hist.sum)}")
+                lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+# singleton
+metrics = MetricsRegistry()
+
+REQUEST_SECONDS = "http_request_duration_seconds"
+REQUESTS = "http_requests_total"
+IN_FLIGHT = "http_requests_in_flight"
+POOL_WAIT_SECONDS = "db_pool_checkout_seconds"
+LOOP_LAG_SECONDS = "event_loop_lag_seconds"
+
+_request_seconds = metrics.histogram(
+    REQUEST_SECONDS, "HTTP request latency until the response body is sent", ("method", "route")
+)
+_requests = metrics.counter(REQUESTS, "HTTP responses by status code", ("method", "route", "status"))
+_in_flight = 0
+metrics.gauge(IN_FLIGHT, "HTTP requests being handled", (), lambda: {(): _in_flight})
+metrics.histogram(POOL_WAIT_SECONDS, "Time to get a connection from the SQLAlchemy pool")
+metrics.histogram(LOOP_LAG_SECONDS, "How late the event loop ran a timer", buckets=LAG_BUCKETS)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording latency, status and in-flight count per
+    HTTP request, labelled by route template (`/tickets/{ticket_id}`), not
+    by raw path.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        global _in_flight
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        _in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            _in_flight -= 1
+            # FastAPI puts the matched route in the scope while routing
+            route = scope.get("route")
+            key = (scope["method"], route.path if route is not None else UNMATCHED)
+            hist = _request_seconds.get(key)
+            if hist is None:
+                hist = _request_seconds[key] = Histogram(LATENCY_BUCKETS)
+            hist.observe(elapsed)
+            count_key = key + (str(status_code),)
+            _requests[count_key] = _requests.get(count_key, 0) + 1
+
+
+def instrument_pool(engine) -> None:
+    """
+    Time every connection checkout from `engine`'s pool, including any wait
+    for a free connection, into `db_pool_checkout_seconds`. Survives
+    `engine.dispose()`, which replaces the pool. Safe to call more than once.
+    """
+    target = getattr(engine, "sync_engine", engine)
+    if getattr(target, "_checkout_timed", False):
+        return
+    raw_connection = target.raw_connection
+
+    def timed_raw_connection():
+        started = time.perf_counter()
+        try:
+            return raw_connection()
+        finally:
+            metrics.observe(POOL_WAIT_SECONDS, time.perf_counter() - started)
+
+    target.raw_connection = timed_raw_connection
+    target._checkout_timed = True
+
+    def pool_usage() -> Dict[tuple, float]:
+        pool = target.pool
+        usage = {}
+        for state, method in (("checked_out", "checkedout"), ("idle", "checkedin"), ("overflow", "overflow")):
+            if hasattr(pool, method):
+                usage[(state,)] = getattr(pool, method)()
+        return usage
+
+    metrics.gauge("db_pool_connections", "SQLAlchemy pool connections by state", ("state",), pool_usage)
+
+
+async def monitor_event_loop_lag(interval: float = settings.METRICS_LOOP_LAG_INTERVAL_SECONDS) -> None:
+    """
+    Background loop measuring how much later than asked a sleep wakes up.
+    Anything blocking the loop (sync I/O, CPU-heavy work) shows up here.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        metrics.observe(LOOP_LAG_SECONDS, max(0.0, loop.time() - started - interval))
+
+
+def websocket_gauges(manager) -> None:
+    """
+    Report `manager`'s open sockets and drop counters, totalled over rooms
+    (per-room series would grow with every ticket).
+    """
+
+    def connections() -> Dict[tuple, float]:
+        return {(): sum(len(room) for room in manager.active_connections.values())}
+
+    def rooms() -> Dict[tuple, float]:
+        return {(): len(manager.active_connections)}
+
+    def dropped() -> Dict[tuple, float]:
+        return {
+            ("message",): manager.total_dropped_messages,
+            ("connection",): manager.total_dropped_connections,
+        }
+
+    metrics.gauge("websocket_connections", "Open chat WebSockets in this worker", (), connections)
+    metrics.gauge("websocket_rooms", "Tickets with at least one open chat WebSocket", (), rooms)
+    metrics.gauge(
+        "websocket_dropped_total", "Frames and slow clients dropped since start", ("kind",), dropped, type="counter"
+    )
+
+
+def cache_gauges(name: str, cache) -> None:
+    """
+    Report a TTLCache's lookups by result and its hit ratio since start as
+    `<name>_lookups_total` and `<name>_hit_ratio`.
+    """
+
+    def lookups() -> Dict[tuple, float]:
+        return {("hit",): cache.hits, ("miss",): cache.misses}
+
+    def hit_ratio() -> Dict[tuple, float]:
+        total = cache.hits + cache.misses
+        return {(): cache.hits / total if total else 0.0}
+
+    metrics.gauge(f"{name}_lookups_total", f"{name} lookups by result", ("result",), lookups, type="counter")
+    metrics.gauge(f"{name}_hit_ratio", f"Share of {name} lookups answered from the cache", (), hit_ratio)
@@ -0,0 +1,110 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+
+class InvalidCursor(ValueError):
+    """
+    Raised when a client sends a cursor we did not issue.
+    """
+
+
+def encode_cursor(created_at: datetime, id: UUID) -> str:
+    """
+    Opaque, URL-safe cursor pointing at one row's (created_at, id) key.
+    """
+    raw = json.dumps([created_at.isoformat(), str(id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), UUID(id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(str(e)) from e
+
+
+async def keyset_paginate(
+    db: AsyncSession,
+    query: Select,
+    created_col,
+    id_col,
+    cursor: Optional[str] = None,
+    direction: str = "next",
+    limit: int = 10,
+) -> Tuple[List[Any], Optional[str], Optional[str]]:
+    """
+    Page `query` newest-first over (created_col, id_col) without OFFSET.
+
+    "next" returns the `limit` rows older than the cursor (or the newest rows
+    when there is no cursor); "prev" returns the `limit` rows newer than it.
+    Returns (items, next_cursor, prev_cursor); a cursor is None when there is
+    nothing further in that direction.
+    """
+    if direction not in ("next", "prev"):
+        raise InvalidCursor(f"Unknown direction: {direction}")
+
+    if cursor is not None:
+        created_at, id = decode_cursor(cursor)
+        if direction == "next":
+            query = query.where(or_(
+                created_col < created_at,
+                and_(created_col == created_at, id_col < id),
+            ))
+        else:
+            query = query.where(or_(
+                created_col > created_at,
+                and_(created_col == created_at, id_col > id),
+            ))
+
+    if direction == "next":
+        query = query.order_by(created_col.desc(), id_col.desc())
+    else:
+        query = query.order_by(created_col.asc(), id_col.asc())
+
+    result = await db.execute(query.limit(limit + 1))
+    rows = list(result.scalars().all())
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if direction == "prev":
+        rows.reverse()
+
+    if not rows:
+        return rows, None, None
+
+    next_cursor, prev_cursor = page_cursors(
+        (getattr(rows[0], created_col.key), getattr(rows[0], id_col.key)),
+        (getattr(rows[-1], created_col.key), getattr(rows[-1], id_col.key)),
+        direction,
+        cursor is not None,
+        has_more,
+    )
+    return rows, next_cursor, prev_cursor
+
+
+def page_cursors(
+    first: Tuple[datetime, UUID],
+    last: Tuple[datetime, UUID],
+    direction: str,
+    has_cursor: bool,
+    has_more: bool,
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    (next_cursor, prev_cursor) for a non-empty newest-first page whose first
+    and last rows have the given keys.
+    """
+    if direction == "next":
+        next_cursor = encode_cursor(*last) if has_more else None
+        prev_cursor = encode_cursor(*first) if has_cursor else None
+    else:
+        next_cursor = encode_cursor(*last)
+        prev_cursor = encode_cursor(*first) if has_more else None
+    return next_cursor, prev_cursor
@@ -1,4 +1,162 @@
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+"""
+Token-bucket rate limiting shared by every worker on a host.
 
-limiter = Limiter(key_func=get_remote_address)
+Buckets live in a shared memory table (app.core.shared_table): a file
+under /dev/shm when RATE_LIMIT_PATH is set, otherwise one that workers
+forked from a preloaded app (gunicorn --preload) inherit. A check is a
+hash, a lock and a few struct reads; no I/O, no DB.
+
+Limits are written "<count>/<second|minute|hour>": a bucket of `count`
+tokens refilled evenly over the period. An empty limit disables the rule.
+"""
+import math
+import time
+from typing import Callable, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import metrics
+from app.core.security import decode_token
+from app.core.shared_table import VALUE, SharedSlotTable
+
+PERIODS = {"second": 1.0, "minute": 60.0, "hour": 3600.0}
+
+
+def parse_limit(spec: str) -> Optional[Tuple[float, float]]:
+    """
+    "<count>/<period>" as (tokens per second, bucket size); None if empty.
+    """
+    if not spec or not spec.strip():
+        return None
+    count, _, period = spec.strip().partition("/")
+    seconds = PERIODS.get(period.strip().rstrip("s"))
+    if seconds is None or int(count) <= 0:
+        raise ValueError(f"Invalid rate limit: {spec!r}")
+    return int(count) / seconds, float(count)
+
+
+class SharedTokenBuckets(SharedSlotTable):
+    """
+    Token buckets in a shared slot table: each slot holds the tokens left
+    and when they were counted. A key evicted from a full group starts
+    over with a full bucket.
+    """
+
+    def __init__(self, slots: int, path: str = "", idle_after: float = 3600.0):
+        super().__init__(slots, path, idle_after, prefix="sts-ratelimit-")
+
+    def take(self, key: str, rate: float, capacity: float, now: Optional[float] = None) -> float:
+        """
+        Take a token from `key`'s bucket. Returns 0 if there was one,
+        otherwise the seconds until there will be.
+        """
+        now = time.monotonic() if now is None else now
+        with self.slot(key, now) as offset:
+            tokens, updated = VALUE.unpack_from(self._map, offset)
+            if updated > now:
+                # Counted before a reboot reset the clock
+                tokens = capacity
+            else:
+                tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens >= 1.0:
+                VALUE.pack_into(self._map, offset, tokens - 1.0, now)
+                return 0.0
+            VALUE.pack_into(self._map, offset, tokens, now)
+            return (1.0 - tokens) / rate
+
+
+def _create_buckets() -> SharedTokenBuckets:
+    try:
+        return SharedTokenBuckets(settings.RATE_LIMIT_SLOTS, settings.RATE_LIMIT_PATH)
+    except OSError as e:
+        logger.warning(f"Rate limit table at {settings.RATE_LIMIT_PATH} unavailable, limiting per worker: {str(e)}")
+        return SharedTokenBuckets(settings.RATE_LIMIT_SLOTS)
+
+
+# singleton
+buckets = _create_buckets()
+
+RATE_LIMITED = "rate_limited_total"
+metrics.counter(RATE_LIMITED, "Requests and chat frames rejected by a rate limit", ("limit",))
+
+
+class RateLimit:
+    """
+    A named limit applied per key (client IP, user id, account).
+    """
+
+    def __init__(self, name: str, spec: str):
+        self.name = name
+        parsed = parse_limit(spec)
+        self.rate, self.capacity = parsed if parsed is not None else (0.0, 0.0)
+
+    @property
+    def enabled(self) -> bool:
+        return settings.RATE_LIMIT_ENABLED and self.rate > 0
+
+    def check(self, key: str) -> float:
+        """
+        0 if `key` may go ahead, otherwise the seconds it should wait.
+        """
+        if not self.enabled:
+            return 0.0
+        wait = buckets.take(f"{self.name}:{key}", self.rate, self.capacity)
+        if wait:
+            metrics.inc(RATE_LIMITED, self.name)
+        return wait
+
+    def enforce(self, key: str) -> None:
+        """
+        Raise 429 Too Many Requests if `key` is over the limit.
+        """
+        wait = self.check(key)
+        if wait:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please retry later",
+                headers={"Retry-After": str(max(1, math.ceil(wait)))},
+            )
+
+
+login_per_ip = RateLimit("login_ip", settings.RATE_LIMIT_LOGIN_PER_IP)
+login_per_account = RateLimit("login_account", settings.RATE_LIMIT_LOGIN_PER_ACCOUNT)
+signup_per_ip = RateLimit("signup_ip", settings.RATE_LIMIT_SIGNUP_PER_IP)
+refresh_per_ip = RateLimit("refresh_ip", settings.RATE_LIMIT_REFRESH_PER_IP)
+ticket_create_per_user = RateLimit("ticket_create", settings.RATE_LIMIT_TICKET_CREATE_PER_USER)
+chat_frames_per_user = RateLimit("chat_frames", settings.RATE_LIMIT_CHAT_FRAMES_PER_USER)
+
+
+def client_ip(request: Request) -> str:
+    # Behind a proxy, run the server with its forwarded-allow-ips option so
+    # request.client is the real client
+    return request.client.host if request.client else "unknown"
+
+
+def limit_by_ip(limit: RateLimit) -> Callable:
+    """
+    Dependency rejecting clients over `limit`, keyed by IP. Use it in the
+    route's `dependencies=[...]` so it runs before any other dependency.
+    """
+
+    async def dependency(request: Request) -> None:
+        limit.enforce(client_ip(request))
+
+    return dependency
+
+
+def limit_by_user(limit: RateLimit) -> Callable:
+    """
+    Dependency rejecting users over `limit`, keyed by the subject of their
+    bearer token (signature checked, no DB lookup), or by IP without a
+    valid token. Use it in the route's `dependencies=[...]`.
+    """
+
+    async def dependency(request: Request) -> None:
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        payload = decode_token(token) if scheme.lower() == "bearer" and token else None
+        subject = payload.get("sub") if payload else None
+        limit.enforce(f"user:{subject}" if subject else f"ip:{client_ip(request)}")
+
+    return dependency
@@ -0,0 +1,137 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.db.session import AsyncSessionLocal
+from app.models.token_blacklist import TokenBlacklist
+
+# Revoked tokens are only interesting until they expire; rows loaded from the
+# table carry no expiry, so keep them for the longest token lifetime we issue.
+MAX_TOKEN_LIFETIME = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+
+# Rows written by other workers may land with a slightly older timestamp than
+# the newest one we have already seen, so every sync re-reads a small overlap.
+SYNC_OVERLAP = timedelta(seconds=2)
+
+
+class RevocationCache:
+    """
+    Process-local mirror of the token_blacklist table, keyed by jti.
+
+    Once loaded it answers "is this jti revoked?" without touching the
+    database. Revocations made by other workers are picked up by `sync`,
+    so they become visible here within one sync interval. If the mirror
+    has not been loaded, or has not synced for longer than `max_staleness`
+    seconds, `lookup` returns None and the caller must ask the database.
+    """
+
+    def __init__(self, max_staleness: float, default_ttl: timedelta = MAX_TOKEN_LIFETIME):
+        self.max_staleness = max_staleness
+        self.default_ttl = default_ttl
+        # maps jti to the unix time after which the entry can be dropped
+        self._entries: Dict[str, float] = {}
+        self._watermark: Optional[datetime] = None
+        self._synced_at: Optional[float] = None
+        self.hits = 0
+        self.db_fallbacks = 0
+
+    @property
+    def ready(self) -> bool:
+        if self._synced_at is None:
+            return False
+        return time.monotonic() - self._synced_at <= self.max_staleness
+
+    def add(self, jti: str, expires_at: Optional[float] = None) -> None:
+        """
+        Record a revoked jti. `expires_at` is the token's `exp` claim; when
+        unknown the entry lives for the longest token lifetime.
+        """
+        if expires_at is None:
+            expires_at = time.time() + self.default_ttl.total_seconds()
+        current = self._entries.get(jti)
+        if current is None or expires_at > current:
+            self._entries[jti] = expires_at
+
+    def lookup(self, jti: str) -> Optional[bool]:
+        """
+        Return True/False when the cache can answer, None when the caller
+        has to fall back to the database.
+        """
+        if not self.ready:
+            self.db_fallbacks += 1
+            return None
+        self.hits += 1
+        expires_at = self._entries.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def prune(self) -> None:
+        now = time.time()
+        expired = [jti for jti, expires_at in self._entries.items() if expires_at <= now]
+        for jti in expired:
+            del self._entries[jti]
+
+    async def load(self, db: AsyncSession) -> None:
+        """
+        Replace the cache contents with every revocation that can still
+        refer to a live token.
+        """
+        self._entries.clear()
+        self._watermark = None
+        await self.sync(db)
+
+    async def sync(self, db: AsyncSession) -> None:
+        """
+        Pull revocations written since the last sync (by any worker). The
+        first sync reads everything that is not yet past its lifetime.
+        """
+        started = time.monotonic()
+        if self._watermark is None:
+            since = datetime.utcnow() - self.default_ttl
+        else:
+            since = self._watermark - SYNC_OVERLAP
+        query = select(TokenBlacklist.jti, TokenBlacklist.blacklisted_at).where(
+            TokenBlacklist.blacklisted_at >= since
+        )
+        result = await db.execute(query)
+
+        for jti, blacklisted_at in result.all():
+            expires_at = blacklisted_at + self.default_ttl
+            self.add(jti, (expires_at - datetime(1970, 1, 1)).total_seconds())
+            if self._watermark is None or blacklisted_at > self._watermark:
+                self._watermark = blacklisted_at
+
+        self.prune()
+        self._synced_at = started
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "db_fallbacks": self.db_fallbacks,
+            "ready": self.ready,
+        }
+
+
+revocation_cache = RevocationCache(max_staleness=settings.REVOCATION_MAX_STALENESS_SECONDS)
+
+
+async def run_revocation_sync(interval: float = settings.REVOCATION_SYNC_INTERVAL_SECONDS) -> None:
+    """
+    Background loop that keeps `revocation_cache` in step with the table.
+    If the startup load failed, the first successful sync fills the cache.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with AsyncSessionLocal() as db:
+                await revocation_cache.sync(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Revocation cache sync failed: {str(e)}")
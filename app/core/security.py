@@ -1,14 +1,22 @@
 import bcrypt
+import hashlib
 import jwt
+import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from uuid import uuid4
+from uuid import UUID, uuid4
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.hashing import password_hasher
+from app.core.revocation import revocation_cache
 from app.db.session import get_db
 from app.models.token_blacklist import TokenBlacklist
 from app.models.user import User, UserRole
@@ -16,19 +24,67 @@ from app.models.user import User, UserRole
 ALGORITHM = settings.ALGORITHM
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
+@dataclass(frozen=True)
+class Principal:
+    """
+    The authenticated caller: only the user fields authorization looks at.
+    """
+    id: UUID
+    role: UserRole
+    is_active: bool
+
+# Principals keyed by the token "sub" claim, so repeat callers skip the users query
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+# Claims of verified tokens keyed by a digest of the token, so a client
+# reusing its access token skips the signature check; never holds a token
+# past its exp
+token_cache = TTLCache(
+    maxsize=settings.TOKEN_CACHE_SIZE,
+    ttl=settings.TOKEN_CACHE_TTL_SECONDS,
+)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_principal(mapper, connection, target: User) -> None:
+    principal_cache.invalidate(str(target.id))
+
 def get_password_hash(password: str) -> str:
     """
-    Hash a plain password using bcrypt.
+    Hash a plain password using bcrypt. Blocks; async code should use
+    get_password_hash_async instead.
     """
-    hashed = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt())
+    hashed = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=password_hasher.rounds))
     return hashed.decode("utf-8")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
-    Check a plaintext password against the hashed version.
+    Check a plaintext password against the hashed version. Blocks; async
+    code should use verify_password_async instead.
     """
     return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
 
+async def get_password_hash_async(password: str) -> str:
+    """
+    Hash a plain password on the password-hash executor.
+    """
+    return await password_hasher.hash(password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Check a password on the password-hash executor.
+    """
+    return await password_hasher.verify(plain_password, hashed_password)
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    True when the hash was made with a lower bcrypt cost than the current one.
+    """
+    return password_hasher.needs_rehash(hashed_password)
+
 def create_access_token(data: dict) -> str:
     """
     Create a JWT access token (short‐lived). Includes:
@@ -62,32 +118,98 @@ def create_refresh_token(data: dict) -> str:
 def decode_token(token: str) -> dict | None:
     """
     Decode a JWT (access or refresh). Returns payload or None if invalid.
+    Tokens seen before are answered from token_cache; revocation is not
+    part of decoding, so callers still check the jti either way.
     """
+    key = hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+    payload = token_cache.get(key)
+    if payload is not None:
+        return dict(payload)
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except jwt.PyJWTError:
         return None
+    # Invalid tokens are not cached: they cost a verification either way,
+    # and caching them would let garbage evict real entries
+    exp = payload.get("exp")
+    ttl = exp - time.time() if isinstance(exp, (int, float)) else None
+    if ttl is None or ttl > 0:
+        token_cache.set(key, dict(payload), ttl)
+    return payload
 
-async def is_token_blacklisted(jti: str, db: AsyncSession) -> bool:
+async def is_token_blacklisted(jti: str, db: AsyncSession, use_cache: bool = True) -> bool:
     """
-    Check the TokenBlacklist table to see if this jti has been revoked.
+    Check whether this jti has been revoked. Answered from the in-memory
+    revocation cache when it is warm, otherwise from the TokenBlacklist table.
+    Pass `use_cache=False` where a stale answer would let a token be used
+    twice (refresh, logout): the cache misses other workers' revocations
+    until its next sync.
     """
+    revoked = revocation_cache.lookup(jti) if use_cache else None
+    if revoked is not None:
+        return revoked
+
     result = await db.execute(
         select(TokenBlacklist).where(TokenBlacklist.jti == jti)
     )
-    return result.scalars().first() is not None
+    revoked = result.scalars().first() is not None
+    if revoked:
+        revocation_cache.add(jti)
+    return revoked
+
+async def revoke_token(payload: dict, db: AsyncSession) -> bool:
+    """
+    Blacklist a decoded token by its jti and record it in the local
+    revocation cache. Other workers pick it up on their next sync.
+    Returns False if the token was already revoked, e.g. by a concurrent
+    request replaying it on another worker.
+    """
+    black_entry = TokenBlacklist(jti=payload["jti"], token_type=payload.get("type"))
+    db.add(black_entry)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        revoked = False
+    else:
+        revoked = True
+    revocation_cache.add(payload["jti"], payload.get("exp"))
+    return revoked
+
+async def load_principal(user_id: str, db: AsyncSession) -> Principal | None:
+    """
+    Return the Principal for a "sub" claim, from the cache when possible.
+    """
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+
+    try:
+        user_uuid = UUID(user_id)
+    except ValueError:
+        return None
+
+    result = await db.execute(
+        select(User.id, User.role, User.is_active).where(User.id == user_uuid)
+    )
+    row = result.first()
+    if row is None:
+        return None
+
+    principal = Principal(id=row.id, role=row.role, is_active=bool(row.is_active))
+    principal_cache.set(user_id, principal)
+    return principal
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db),
-) -> User:
+) -> Principal:
     """
     Dependency that:
       1. Decodes the access‐token
       2. Verifies its type is "access"
       3. Checks that its jti is not blacklisted
-      4. Loads the user from DB
+      4. Loads the user's Principal (cached, DB on miss)
     Raises 401 if anything is invalid.
     """
     payload = decode_token(token)
@@ -114,22 +236,25 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    from sqlalchemy import select
-
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalars().first()
+    user = await load_principal(user_id, db)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User is inactive",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
 
     return user
 
 async def require_csr(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: Principal = Depends(get_current_user)
+) -> Principal:
     """
     Ensure the current user has CSR role.
     """
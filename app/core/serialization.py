@@ -0,0 +1,78 @@
+from functools import lru_cache
+from typing import Any, Iterable, List, Tuple
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+from sqlalchemy import inspect
+
+
+@lru_cache(maxsize=None)
+def type_adapter(tp: Any) -> TypeAdapter:
+    """
+    One TypeAdapter per response type, so its validator and serializer are
+    built once per process rather than per request.
+    """
+    return TypeAdapter(tp)
+
+
+def dump_json(tp: Any, value: Any) -> bytes:
+    """
+    Validate `value` as `tp` (ORM objects are read by attribute) and encode
+    it straight to JSON bytes, without an intermediate dict of JSON-safe
+    values.
+    """
+    adapter = type_adapter(tp)
+    return adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+
+
+@lru_cache(maxsize=None)
+def _column_keys(cls: type) -> Tuple[str, ...]:
+    return tuple(inspect(cls).column_attrs.keys())
+
+
+def loaded_values(objects: Iterable[Any]) -> List[Any]:
+    """
+    The loaded column values of ORM objects, as their instance dicts, for
+    `dump_json`. Validating those skips a trip through SQLAlchemy's
+    instrumented attributes per field, which otherwise costs more than the
+    validation itself. Objects with expired or deferred columns (and
+    anything that is not an ORM object) are passed through unchanged.
+    """
+    values = []
+    for obj in objects:
+        state = getattr(obj, "__dict__", None)
+        if state is not None and "_sa_instance_state" in state and all(
+            key in state for key in _column_keys(type(obj))
+        ):
+            values.append(state)
+        else:
+            values.append(obj)
+    return values
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse encoded by pydantic-core instead of the json module. Also
+    handles UUIDs, datetimes and enums that reach it unconverted.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
+
+
+def typed_response(tp: Any, value: Any, status_code: int = 200) -> Response:
+    """
+    Response for `value` serialized as `tp` in one pass. Returning it from
+    an endpoint skips FastAPI's own response_model validation and encoding;
+    keep `response_model` on the route for the OpenAPI schema.
+    """
+    return Response(dump_json(tp, value), status_code=status_code, media_type="application/json")
+
+
+def encode_frame(message: Any) -> str:
+    """
+    Text of a WebSocket frame. UUIDs and datetimes are written as strings
+    (datetimes in ISO 8601), the same as in REST responses.
+    """
+    return to_json(message).decode("utf-8")
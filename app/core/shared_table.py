@@ -0,0 +1,100 @@
+"""
+Fixed-size hash table in memory shared by every worker on a host.
+
+The table is a file under /dev/shm when a path is given, otherwise an
+unlinked temporary file created at import, which workers forked from a
+preloaded app (gunicorn --preload) inherit. Each key hashes to a group of
+slots guarded by its own byte-range lock, so an access is a hash, a lock
+and a few struct reads; no I/O, no DB.
+
+A slot holds two doubles, the second being when the slot was last
+written (time.monotonic, which all processes of a host share).
+"""
+import fcntl
+import hashlib
+import math
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+# A group is the key digests of its slots, then each slot's value
+GROUP_SLOTS = 8
+_KEYS = struct.Struct(f"<{GROUP_SLOTS}Q")
+VALUE = struct.Struct("<dd")
+_GROUP_BYTES = _KEYS.size + VALUE.size * GROUP_SLOTS
+
+
+def _digest(key: str) -> int:
+    # Not hash(): it differs between processes
+    value = int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+    return value or 1  # 0 marks an empty slot
+
+
+class SharedSlotTable:
+    """
+    A key lives in one of the GROUP_SLOTS slots of its group. When the
+    group is full, a slot idle for `idle_after` seconds or, failing that,
+    the least recently written one is taken over, so a flood of distinct
+    keys costs the evicted keys their value rather than unbounded memory.
+    """
+
+    def __init__(self, slots: int, path: str = "", idle_after: float = 3600.0, prefix: str = "sts-table-"):
+        self.groups = max(1, slots // GROUP_SLOTS)
+        self.idle_after = idle_after
+        size = self.groups * _GROUP_BYTES
+        if path:
+            self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        else:
+            directory = "/dev/shm" if os.path.isdir("/dev/shm") else None
+            self._fd, temp_path = tempfile.mkstemp(prefix=prefix, dir=directory)
+            os.unlink(temp_path)
+        if os.fstat(self._fd).st_size < size:
+            os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size, mmap.MAP_SHARED)
+        # record locks only exclude other processes
+        self._thread_lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, key: str, now: float, claim: bool = True) -> Iterator[Optional[int]]:
+        """
+        Lock `key`'s group and yield the offset of its value (unpack and
+        pack it with VALUE). A key without a slot is given one, holding
+        (inf, now), or with `claim=False` yields None.
+        """
+        digest = _digest(key)
+        start = (digest % self.groups) * _GROUP_BYTES
+        with self._thread_lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, _GROUP_BYTES, start)
+            try:
+                yield self._find(digest, start, now, claim)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, _GROUP_BYTES, start)
+
+    def _find(self, digest: int, start: int, now: float, claim: bool) -> Optional[int]:
+        values = start + _KEYS.size
+        keys = _KEYS.unpack_from(self._map, start)
+        if digest in keys:
+            return values + keys.index(digest) * VALUE.size
+        if not claim:
+            return None
+
+        victim, victim_updated = 0, math.inf
+        for slot, key in enumerate(keys):
+            updated = VALUE.unpack_from(self._map, values + slot * VALUE.size)[1]
+            if key == 0 or now - updated >= self.idle_after:
+                victim = slot
+                break
+            if updated < victim_updated:
+                victim, victim_updated = slot, updated
+        struct.pack_into("<Q", self._map, start + victim * 8, digest)
+        offset = values + victim * VALUE.size
+        VALUE.pack_into(self._map, offset, math.inf, now)
+        return offset
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
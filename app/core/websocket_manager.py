@@ -1,27 +1,207 @@
-import json
-from typing import Dict, List
-from fastapi import WebSocket
+import asyncio
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+from fastapi import WebSocket, status
+
+from app.core.broadcast import BroadcastBackend, create_backend
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.serialization import encode_frame
+
+# What to do when a connection's send queue is full
+SLOW_CONSUMER_POLICIES = ("disconnect", "drop_oldest", "drop_newest")
+
+
+class Connection:
+    """
+    One accepted socket plus its bounded outbound queue. A dedicated writer
+    task drains the queue, so a slow client only ever delays itself.
+    """
+
+    __slots__ = ("ticket_id", "websocket", "queue", "writer", "backlog")
+
+    def __init__(self, ticket_id: str, websocket: WebSocket, queue_size: int):
+        self.ticket_id = ticket_id
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.writer: asyncio.Task | None = None
+        # frames sent before anything from the queue, e.g. a history replay
+        self.backlog: List[str] = []
+
 
 class ConnectionManager:
-    def __init__(self):
-        # maps ticket_id to list of WebSocket connections
-        self.active_connections: Dict[str, List[WebSocket]] = {}
+    def __init__(
+        self,
+        queue_size: int = settings.WS_SEND_QUEUE_SIZE,
+        send_timeout: float = settings.WS_SEND_TIMEOUT_SECONDS,
+        slow_consumer_policy: str = settings.WS_SLOW_CONSUMER_POLICY,
+        backend: BroadcastBackend | None = None,
+    ):
+        if slow_consumer_policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow consumer policy: {slow_consumer_policy}")
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.slow_consumer_policy = slow_consumer_policy
+        # maps ticket_id to the connections in that room, keyed by socket
+        self.active_connections: Dict[str, Dict[WebSocket, Connection]] = {}
+        # frames dropped and clients disconnected per open room, for metrics;
+        # a room's counts move to the totals below once it empties
+        self.dropped_messages: Dict[str, int] = defaultdict(int)
+        self.dropped_connections: Dict[str, int] = defaultdict(int)
+        self._closed_dropped_messages = 0
+        self._closed_dropped_connections = 0
+        # relays frames to the sockets held by other workers
+        self.backend = backend or create_backend()
+        # called with (ticket_id, data) for every frame relayed from another
+        # worker, before it is delivered here
+        self.relay_listeners: List[Callable[[str, str], None]] = []
+        # called with a ticket_id (None: any ticket) whose relayed frames
+        # may not all have reached this worker
+        self.lost_listeners: List[Callable[[Optional[str]], None]] = []
+
+    async def start(self):
+        await self.backend.start(self._deliver_relayed, self._relay_lost)
+
+    async def stop(self):
+        await self.backend.stop()
 
-    async def connect(self, ticket_id: str, websocket: WebSocket):
+    async def connect(
+        self, ticket_id: str, websocket: WebSocket, backlog: Optional[Callable[[], List[str]]] = None
+    ):
+        """
+        Accept the socket and join the ticket's room. `backlog` is called
+        just before joining and its frames are sent ahead of any broadcast,
+        so a replay neither misses nor repeats a frame broadcast meanwhile.
+        """
         await websocket.accept()
-        conns = self.active_connections.setdefault(str(ticket_id), [])
-        conns.append(websocket)
+        conn = Connection(str(ticket_id), websocket, self.queue_size)
+        if backlog is not None:
+            conn.backlog = backlog()
+        conn.writer = asyncio.create_task(self._write(conn))
+        self.active_connections.setdefault(conn.ticket_id, {})[websocket] = conn
 
     def disconnect(self, ticket_id: str, websocket: WebSocket):
-        conns = self.active_connections.get(str(ticket_id), [])
-        if websocket in conns:
-            conns.remove(websocket)
+        room = self.active_connections.get(str(ticket_id))
+        if not room:
+            return
+        conn = room.pop(websocket, None)
+        if not room:
+            del self.active_connections[str(ticket_id)]
+            self._closed_dropped_messages += self.dropped_messages.pop(str(ticket_id), 0)
+            self._closed_dropped_connections += self.dropped_connections.pop(str(ticket_id), 0)
+        if conn is not None and conn.writer is not None and conn.writer is not asyncio.current_task():
+            conn.writer.cancel()
 
     async def broadcast(self, ticket_id: str, message: dict):
-        conns = self.active_connections.get(str(ticket_id), [])
-        data = json.dumps(message, default=str)
-        for connection in conns:
-            await connection.send_text(data)
+        """
+        Serialize `message` once, queue it for every connection on the
+        ticket in this worker and hand it to the backend for the others.
+        Never waits on a client.
+        """
+        data = encode_frame(message)
+        self.broadcast_text(ticket_id, data)
+        await self.backend.publish(str(ticket_id), data)
+
+    def _deliver_relayed(self, ticket_id: str, data: str):
+        for listener in self.relay_listeners:
+            listener(ticket_id, data)
+        self.broadcast_text(ticket_id, data)
+
+    def _relay_lost(self, ticket_id: Optional[str]):
+        for listener in self.lost_listeners:
+            listener(ticket_id)
+
+    def broadcast_text(self, ticket_id: str, data: str):
+        room = self.active_connections.get(str(ticket_id))
+        if not room:
+            return
+        for conn in list(room.values()):
+            self._enqueue(conn, data)
+
+    def _enqueue(self, conn: Connection, data: str):
+        try:
+            conn.queue.put_nowait(data)
+            return
+        except asyncio.QueueFull:
+            pass
+
+        if self.slow_consumer_policy == "drop_newest":
+            self.dropped_messages[conn.ticket_id] += 1
+        elif self.slow_consumer_policy == "drop_oldest":
+            conn.queue.get_nowait()
+            conn.queue.put_nowait(data)
+            self.dropped_messages[conn.ticket_id] += 1
+        else:
+            self._drop(conn, "send queue full")
+
+    def _drop(self, conn: Connection, reason: str):
+        """
+        Forget a connection that cannot keep up (or is dead) and close it in
+        the background.
+        """
+        room = self.active_connections.get(conn.ticket_id)
+        if not room or room.get(conn.websocket) is not conn:
+            return
+        logger.warning(f"Dropping WebSocket on ticket {conn.ticket_id}: {reason}")
+        self.dropped_connections[conn.ticket_id] += 1
+        self.disconnect(conn.ticket_id, conn.websocket)
+        asyncio.create_task(self._close(conn.websocket))
+
+    async def _close(self, websocket: WebSocket):
+        try:
+            await asyncio.wait_for(
+                websocket.close(code=status.WS_1013_TRY_AGAIN_LATER), timeout=self.send_timeout
+            )
+        except Exception:
+            pass
+
+    async def _write(self, conn: Connection):
+        backlog, conn.backlog = conn.backlog, []
+        for data in backlog:
+            if not await self._send(conn, data):
+                return
+        while True:
+            data = await conn.queue.get()
+            if not await self._send(conn, data):
+                return
+
+    async def _send(self, conn: Connection, data: str) -> bool:
+        try:
+            await asyncio.wait_for(conn.websocket.send_text(data), timeout=self.send_timeout)
+            return True
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            self._drop(conn, "send timed out")
+        except Exception as e:
+            self._drop(conn, f"send failed: {e.__class__.__name__}")
+        return False
+
+    @property
+    def total_dropped_messages(self) -> int:
+        return self._closed_dropped_messages + sum(self.dropped_messages.values())
+
+    @property
+    def total_dropped_connections(self) -> int:
+        return self._closed_dropped_connections + sum(self.dropped_connections.values())
+
+    def stats(self) -> Dict[str, dict]:
+        """
+        Per-room connection count, queued frames and drop counters, for the
+        rooms with open connections.
+        """
+        stats = {}
+        for ticket_id, room in self.active_connections.items():
+            conns = room.values()
+            depths = [conn.queue.qsize() for conn in conns]
+            stats[ticket_id] = {
+                "connections": len(depths),
+                "queue_depth": sum(depths),
+                "max_queue_depth": max(depths, default=0),
+                "dropped_messages": self.dropped_messages.get(ticket_id, 0),
+                "dropped_connections": self.dropped_connections.get(ticket_id, 0),
+            }
+        return stats
 
 # singleton
-manager = ConnectionManager()
\ No newline at end of file
+manager = ConnectionManager()
@@ -0,0 +1,216 @@
+import random
+import re
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from hashlib import blake2b
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.core.logging import logger
+
+
+class QueryStats:
+    """
+    Statements run, and time spent running them, within one request.
+    """
+
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("db_query_stats", default=None)
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """
+    Count every statement run in this context (and tasks started from it)
+    into a fresh QueryStats.
+    """
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r"\b\d+(?:\.\d+)?\b")
+# pyformat, format, numeric ($1) and named (:name, but not ::casts) placeholders
+_PARAMS = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<!:):\w+")
+_IN_LISTS = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    """
+    `statement` with literals and parameters replaced by `?` and IN lists
+    collapsed, so the same query with different values groups together.
+    """
+    normalized = _STRINGS.sub("?", statement)
+    normalized = _PARAMS.sub("?", normalized)
+    normalized = _NUMBERS.sub("?", normalized)
+    normalized = _IN_LISTS.sub("IN (?...)", normalized)
+    return _SPACE.sub(" ", normalized).strip()
+
+
+def fingerprint_id(fingerprint: str) -> str:
+    return blake2b(fingerprint.encode("utf-8"), digest_size=6).hexdigest()
+
+
+class SlowQueryLog:
+    """
+    Statements slower than `threshold_ms`, logged as they happen and
+    aggregated per fingerprint. Keeps the `max_fingerprints` most recently
+    seen fingerprints.
+    """
+
+    def __init__(self, threshold_ms: float, max_fingerprints: int = 200):
+        self.threshold_ms = threshold_ms
+        self.max_fingerprints = max_fingerprints
+        # fingerprint -> [count, total seconds, max seconds]
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+
+    def record(self, statement: str, seconds: float) -> None:
+        key = fingerprint(statement)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = [0, 0.0, 0.0]
+            while len(self._entries) > self.max_fingerprints:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(key)
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+        logger.warning(f"Slow query {seconds * 1000:.1f}ms [{fingerprint_id(key)}]: {key}")
+
+    def stats(self, top: int = 10) -> list:
+        ranked = sorted(self._entries.items(), key=lambda item: item[1][1], reverse=True)[:top]
+        return [
+            {
+                "id": fingerprint_id(key),
+                "fingerprint": key,
+                "count": count,
+                "total_ms": round(total * 1000, 1),
+                "max_ms": round(longest * 1000, 1),
+            }
+            for key, (count, total, longest) in ranked
+        ]
+
+
+# singleton
+slow_query_log = SlowQueryLog(threshold_ms=settings.DB_SLOW_QUERY_MS)
+
+# Fraction of all statements logged in full, with the shape of their
+# parameters (never the values: they include password hashes and chat text)
+sample_rate = settings.DB_LOG_SAMPLE_RATE
+
+
+def _shape(value) -> str:
+    if value is None:
+        return "None"
+    if isinstance(value, (str, bytes)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+def describe_parameters(parameters, executemany: bool = False) -> str:
+    """
+    The types (and, for strings and bytes, lengths) of a statement's bound
+    parameters, e.g. `(str[24], int, None)`; an executemany is described
+    by its row count and first row.
+    """
+    if executemany and isinstance(parameters, (list, tuple)):
+        if not parameters:
+            return "0 rows"
+        return f"{len(parameters)} rows of {describe_parameters(parameters[0])}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {_shape(value)}" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(_shape(value) for value in parameters) + ")"
+    return _shape(parameters)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+    if elapsed * 1000 >= slow_query_log.threshold_ms:
+        slow_query_log.record(statement, elapsed)
+    if sample_rate and random.random() < sample_rate:
+        logger.info(f"SQL {elapsed * 1000:.1f}ms: {statement} {describe_parameters(parameters, executemany)}")
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute
+    started = context.connection.info.get("query_started") if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+def instrument(engine) -> None:
+    """
+    Attach the timing listeners to `engine` (sync or async). Safe to call
+    more than once.
+    """
+    target: Engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+    if event.contains(target, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(target, "before_cursor_execute", _before_cursor_execute)
+    event.listen(target, "after_cursor_execute", _after_cursor_execute)
+    event.listen(target, "handle_error", _handle_error)
+
+
+class QueryStatsMiddleware:
+    """
+    Pure ASGI middleware that tracks the statements each HTTP request runs.
+    With `headers`, responses carry the totals as of the moment they start
+    (X-DB-Query-Count, X-DB-Time-Ms); meant for debugging, not production.
+    """
+
+    def __init__(self, app, headers: bool = settings.DB_DEBUG_HEADERS):
+        self.app = app
+        self.headers = headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+            if not self.headers:
+                await self.app(scope, receive, send)
+                return
+
+            async def send_with_totals(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-db-query-count", str(stats.count).encode("latin-1")))
+                    headers.append((b"x-db-time-ms", f"{stats.seconds * 1000:.1f}".encode("latin-1")))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_with_totals)
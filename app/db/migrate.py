@@ -0,0 +1,121 @@
+"""
+Database migrations, run once per deploy instead of by every worker.
+
+    python -m app.db.migrate                      # upgrade to head
+    python -m app.db.migrate upgrade --revision <rev>
+    python -m app.db.migrate current
+
+Concurrent runs (several containers starting at once) serialize on a
+migration lock, so only the first applies DDL and the rest find nothing
+left to do.
+"""
+import argparse
+import contextlib
+import fcntl
+import os
+import tempfile
+import time
+from typing import Iterator, Optional
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, pool, text
+from sqlalchemy.engine import Connection
+
+from app.core.config import settings
+from app.core.logging import logger
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "alembic.ini")
+
+# Any fixed 64-bit value; every process that migrates must use the same one
+ADVISORY_LOCK_KEY = 0x5354534D49475241
+
+
+def sync_database_url(url: Optional[str] = None) -> str:
+    """
+    The synchronous driver URL for `url` (DATABASE_URL by default), which
+    is what Alembic runs on.
+    """
+    url = url or settings.DATABASE_URL
+    if url.startswith("postgresql+asyncpg://"):
+        return url.replace("postgresql+asyncpg://", "postgresql://", 1)
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql://", 1)
+    if url.startswith("sqlite+aiosqlite://"):
+        return url.replace("sqlite+aiosqlite://", "sqlite://", 1)
+    return url
+
+
+@contextlib.contextmanager
+def migration_lock(connection: Connection) -> Iterator[None]:
+    """
+    Hold an exclusive, cross-process lock while migrating. PostgreSQL uses a
+    session-level advisory lock on `connection`; SQLite an flock on a file
+    next to the database. Both are released if the process dies.
+    """
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+        connection.commit()
+        try:
+            yield
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": ADVISORY_LOCK_KEY})
+            connection.commit()
+    elif dialect == "sqlite":
+        database = connection.engine.url.database
+        if database and database != ":memory:":
+            path = f"{database}.migrate.lock"
+        else:
+            path = os.path.join(tempfile.gettempdir(), "sts-migrate.lock")
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+    else:
+        logger.warning(f"No migration lock for {dialect}; make sure only one process migrates")
+        yield
+
+
+def upgrade(revision: str = "head", url: Optional[str] = None) -> float:
+    """
+    Upgrade the database to `revision` under the migration lock. Returns
+    the seconds taken, including any wait for the lock.
+    """
+    config = Config(ALEMBIC_INI)
+    engine = create_engine(sync_database_url(url), poolclass=pool.NullPool, future=True)
+    started = time.perf_counter()
+    try:
+        with engine.connect() as connection, migration_lock(connection):
+            # alembic/env.py migrates on this connection instead of opening its own
+            config.attributes["connection"] = connection
+            command.upgrade(config, revision)
+    finally:
+        engine.dispose()
+    return time.perf_counter() - started
+
+
+def current(url: Optional[str] = None) -> None:
+    config = Config(ALEMBIC_INI)
+    engine = create_engine(sync_database_url(url), poolclass=pool.NullPool, future=True)
+    try:
+        with engine.connect() as connection:
+            config.attributes["connection"] = connection
+            command.current(config)
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Database migrations")
+    parser.add_argument("command", nargs="?", default="upgrade", choices=["upgrade", "current"])
+    parser.add_argument("--revision", default="head")
+    args = parser.parse_args()
+
+    if args.command == "current":
+        current()
+    else:
+        elapsed = upgrade(args.revision)
+        print(f"Database at {args.revision} ({elapsed:.2f}s)")
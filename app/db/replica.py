@@ -0,0 +1,255 @@
+"""
+Read-replica routing for query-only routes.
+
+Routes that only read take their session from `get_read_db`, which hands
+out a replica session unless:
+
+  - no replica is configured (READ_REPLICA_URL),
+  - the caller wrote something within READ_AFTER_WRITE_SECONDS, so they
+    always see their own writes,
+  - the replica is behind by more than READ_REPLICA_MAX_LAG_SECONDS, is
+    unreachable, or has not been probed recently.
+
+In those cases the request reads from the primary, through `get_db`.
+
+Lag comes from a heartbeat row the probe stamps on the primary and reads
+back from the replica. This works for any database and replication
+method, with a resolution of one probe interval. Recent writers are
+remembered in a table shared by the workers of a host
+(app.core.shared_table), so a user whose next read lands on another
+worker still reads from the primary.
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Optional
+
+from fastapi import Depends
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import metrics
+from app.core.security import Principal, decode_token, get_current_user
+from app.core.shared_table import VALUE, SharedSlotTable
+from app.db.session import AsyncSessionLocal, ReadSessionLocal, get_db
+from app.models.replication import ReplicationHeartbeat
+
+HEARTBEAT_ID = 1
+
+# Requests that may write; anything else is assumed to be a read
+SAFE_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+
+
+async def write_heartbeat(db: AsyncSession) -> None:
+    """
+    Stamp the heartbeat row with the current time, creating it if needed.
+    """
+    now = datetime.utcnow()
+    result = await db.execute(
+        update(ReplicationHeartbeat).where(ReplicationHeartbeat.id == HEARTBEAT_ID).values(beat_at=now)
+    )
+    if result.rowcount == 0:
+        # First beat: create the row, unless another worker just did
+        try:
+            async with db.begin_nested():
+                await db.execute(insert(ReplicationHeartbeat).values(id=HEARTBEAT_ID, beat_at=now))
+        except IntegrityError:
+            pass
+    await db.commit()
+
+
+class RecentWriters(SharedSlotTable):
+    """
+    When each user last wrote, in a shared slot table. A user evicted from
+    a full group (only possible with more than the table's slots of writers
+    within `window`) reads from the replica early.
+    """
+
+    def __init__(self, window: float, slots: int, path: str = ""):
+        super().__init__(slots, path, idle_after=window, prefix="sts-writers-")
+        self.window = window
+
+    def record(self, user_id: str, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        with self.slot(user_id, now) as offset:
+            VALUE.pack_into(self._map, offset, now, now)
+
+    def wrote_recently(self, user_id: str, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        with self.slot(user_id, now, claim=False) as offset:
+            if offset is None:
+                return False
+            written_at = VALUE.unpack_from(self._map, offset)[0]
+        # A write stamped after `now` predates a reboot that reset the clock
+        return 0 <= now - written_at < self.window
+
+
+def _create_writers() -> RecentWriters:
+    try:
+        return RecentWriters(settings.READ_AFTER_WRITE_SECONDS, settings.READ_AFTER_WRITE_SLOTS, settings.READ_AFTER_WRITE_PATH)
+    except OSError as e:
+        logger.warning(
+            f"Recent writers table at {settings.READ_AFTER_WRITE_PATH} unavailable, tracking per worker: {str(e)}"
+        )
+        return RecentWriters(settings.READ_AFTER_WRITE_SECONDS, settings.READ_AFTER_WRITE_SLOTS)
+
+
+class ReplicaRouter:
+    """
+    Decides, per request, whether the replica may serve a read. The replica
+    counts as available only while the last probe succeeded within three
+    intervals and measured a lag of at most `max_lag` seconds; until the
+    first probe, reads go to the primary.
+    """
+
+    def __init__(
+        self,
+        primary,
+        replica,
+        max_lag: float,
+        probe_interval: float,
+        recent_writers: RecentWriters,
+    ):
+        self.primary = primary
+        # None when no replica is configured
+        self.replica = replica
+        self.max_lag = max_lag
+        self.probe_interval = probe_interval
+        self._recent_writers = recent_writers
+        self.lag: Optional[float] = None
+        self.error: Optional[str] = None
+        self._probed_at: Optional[float] = None
+        self._was_available = False
+
+    @property
+    def available(self) -> bool:
+        if self.replica is None or self.lag is None or self._probed_at is None:
+            return False
+        if time.monotonic() - self._probed_at > 3 * self.probe_interval:
+            return False
+        return self.lag <= self.max_lag
+
+    def record_write(self, user_id: str) -> None:
+        self._recent_writers.record(user_id)
+
+    def use_replica(self, user_id: Optional[str]) -> bool:
+        """
+        Whether a read by `user_id` (None if anonymous) may go to the replica.
+        """
+        if not self.available:
+            return False
+        return user_id is None or not self._recent_writers.wrote_recently(user_id)
+
+    async def probe(self) -> None:
+        """
+        Read the heartbeat from the replica, then stamp a new one on the
+        primary. The lag is how old the replica's heartbeat is: replication
+        delay plus up to one probe interval. A failure on either side
+        leaves the replica unavailable until a probe succeeds.
+        """
+        try:
+            async with self.replica() as db:
+                beat_at = (
+                    await db.execute(select(ReplicationHeartbeat.beat_at).where(ReplicationHeartbeat.id == HEARTBEAT_ID))
+                ).scalar_one_or_none()
+            async with self.primary() as db:
+                await write_heartbeat(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.lag, self.error = None, str(e)
+        else:
+            # No heartbeat yet: the replica has not caught up with the first one.
+            # Clocks of the workers stamping it may be slightly ahead of ours
+            self.lag = max(0.0, (datetime.utcnow() - beat_at).total_seconds()) if beat_at is not None else None
+            self.error = None
+            self._probed_at = time.monotonic()
+
+        available = self.available
+        if available != self._was_available:
+            if available:
+                logger.info(f"Read replica available (lag {self.lag:.1f}s)")
+            else:
+                reason = self.error or ("lag unknown" if self.lag is None else f"lag {self.lag:.1f}s")
+                logger.warning(f"Read replica unavailable ({reason}), reading from the primary")
+            self._was_available = available
+
+    def stats(self) -> dict:
+        return {
+            "configured": self.replica is not None,
+            "available": self.available,
+            "lag_seconds": self.lag,
+            "error": self.error,
+        }
+
+
+# singleton
+replica_router = ReplicaRouter(
+    AsyncSessionLocal,
+    ReadSessionLocal,
+    max_lag=settings.READ_REPLICA_MAX_LAG_SECONDS,
+    probe_interval=settings.READ_REPLICA_PROBE_INTERVAL_SECONDS,
+    recent_writers=_create_writers(),
+)
+
+READS = "db_reads_total"
+metrics.counter(READS, "Query-only requests by the database that served them", ("target",))
+metrics.gauge(
+    "db_replica_lag_seconds", "Read replica lag at the last probe", (),
+    lambda: {(): replica_router.lag} if replica_router.lag is not None else {},
+)
+
+
+async def run_replica_probe(interval: float = settings.READ_REPLICA_PROBE_INTERVAL_SECONDS) -> None:
+    """
+    Background loop probing the replica's health and lag.
+    """
+    while True:
+        await replica_router.probe()
+        await asyncio.sleep(interval)
+
+
+async def get_read_db(
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> AsyncSession:
+    """
+    Session for a query-only route: the replica's when `replica_router`
+    allows it for this user, otherwise the request's primary session.
+    """
+    if not replica_router.use_replica(str(current_user.id)):
+        metrics.inc(READS, "primary")
+        yield db
+        return
+    metrics.inc(READS, "replica")
+    async with replica_router.replica() as session:
+        yield session
+
+
+class ReadYourWritesMiddleware:
+    """
+    Pure ASGI middleware recording, when a request that may write finishes,
+    that its bearer token's user wrote, so `get_read_db` keeps that user on
+    the primary for the read-after-write window.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS or replica_router.replica is None:
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            for name, value in scope.get("headers", ()):
+                if name == b"authorization":
+                    scheme, _, token = value.decode("latin-1").partition(" ")
+                    payload = decode_token(token) if scheme.lower() == "bearer" and token else None
+                    if payload and payload.get("sub"):
+                        replica_router.record_write(payload["sub"])
+                    break
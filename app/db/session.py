@@ -1,16 +1,18 @@
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from app.core.config import settings
+from app.db.instrumentation import instrument
 
 
 engine = create_async_engine(
     settings.DATABASE_URL,
     future=True,
-    echo=True, # Set to False in production
+    echo=settings.DB_ECHO,
     pool_size=20,
     max_overflow=10,
     pool_timeout=30,
 )
+instrument(engine)
 
 AsyncSessionLocal = sessionmaker(
     bind=engine, 
@@ -20,6 +22,27 @@ AsyncSessionLocal = sessionmaker(
     autoflush=False,
 )
 
+# Read replica for query-only routes, if configured; see app/db/replica.py
+read_engine = None
+ReadSessionLocal = None
+if settings.READ_REPLICA_URL:
+    read_engine = create_async_engine(
+        settings.READ_REPLICA_URL,
+        future=True,
+        echo=settings.DB_ECHO,
+        pool_size=20,
+        max_overflow=10,
+        pool_timeout=30,
+    )
+    instrument(read_engine)
+    ReadSessionLocal = sessionmaker(
+        bind=read_engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
+    )
+
 Base = declarative_base()
 
 async def get_db() -> AsyncSession:
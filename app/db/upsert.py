@@ -0,0 +1,40 @@
+from typing import Any, Dict
+
+from sqlalchemy import Table, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def upsert_increment(
+    db: AsyncSession,
+    table: Table,
+    keys: Dict[str, Any],
+    increments: Dict[str, int],
+) -> None:
+    """
+    Add `increments` to the counter columns of the row identified by `keys`,
+    creating the row (with the increments as initial values) if it does not
+    exist. A single atomic statement on PostgreSQL and SQLite.
+    """
+    dialect = db.bind.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(table).values(**keys, **increments)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={name: table.c[name] + stmt.excluded[name] for name in increments},
+        )
+        await db.execute(stmt)
+        return
+
+    # Generic fallback: update, then insert if nothing matched
+    where = [table.c[name] == value for name, value in keys.items()]
+    result = await db.execute(
+        update(table)
+        .where(*where)
+        .values({name: table.c[name] + delta for name, delta in increments.items()})
+    )
+    if result.rowcount == 0:
+        await db.execute(insert(table).values(**keys, **increments))
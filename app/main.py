@@ -1,25 +1,132 @@
+import time
+# Measured from here, so the "import" phase covers the whole app import
+_import_started = time.perf_counter()
+
+import asyncio
+from contextlib import contextmanager
 from fastapi import FastAPI
-from app.db.session import engine, Base
+from fastapi.responses import PlainTextResponse
+from app.db.session import engine, Base, AsyncSessionLocal
+from app.db.instrumentation import QueryStatsMiddleware, slow_query_log
+from app.db.replica import ReadYourWritesMiddleware, replica_router, run_replica_probe
 from app.core.config import settings
-from app.core.logging import logger
+from app.core.logging import RequestContextMiddleware, logger, queue_handler
+from app.core.metrics import (
+    MetricsMiddleware, cache_gauges, instrument_pool, metrics, monitor_event_loop_lag, websocket_gauges,
+)
+from app.core.serialization import FastJSONResponse
+from app.core.hashing import password_hasher
+from app.core.websocket_manager import manager
+from app.services.chat_persistence import chat_writer
+from app.core.revocation import revocation_cache, run_revocation_sync
+from app.core.security import principal_cache, token_cache
+from app.services.ticket_assignment import run_workload_reconciliation
 from app.api.v1.router import api_router
-from alembic.config import Config
-from alembic import command
-
-alembic_cfg = Config("alembic.ini")
 
-command.upgrade(alembic_cfg, "head")
+# Migrations are not run here: every worker would run them while booting,
+# racing the others on DDL. Deploys run `python -m app.db.migrate` first.
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     description='STS API',
     version='1.0',
-    
+    default_response_class=FastJSONResponse,
 )
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(RequestContextMiddleware)
+# Added last so it is outermost and times everything else
+app.add_middleware(MetricsMiddleware)
+
+instrument_pool(engine)
+websocket_gauges(manager)
+cache_gauges("token_cache", token_cache)
+cache_gauges("principal_cache", principal_cache)
+metrics.gauge(
+    "log_records_dropped_total", "Log records dropped because the log queue was full", (),
+    lambda: {(): queue_handler.dropped}, type="counter",
+)
+
+background_tasks = []
+
+# Milliseconds spent in each startup phase of this worker
+startup_timings = {"import": round((time.perf_counter() - _import_started) * 1000, 1)}
+
+@contextmanager
+def startup_phase(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        startup_timings[name] = round((time.perf_counter() - started) * 1000, 1)
+
+@app.on_event("startup")
+async def start_revocation_cache():
+    with startup_phase("revocation_cache"):
+        try:
+            async with AsyncSessionLocal() as db:
+                await revocation_cache.load(db)
+        except Exception as e:
+            logger.warning(f"Revocation cache load failed, using DB lookups: {str(e)}")
+    background_tasks.append(asyncio.create_task(run_revocation_sync()))
+
+@app.on_event("startup")
+async def start_replica_probe():
+    if replica_router.replica is not None:
+        background_tasks.append(asyncio.create_task(run_replica_probe()))
+
+@app.on_event("startup")
+async def start_workload_reconciliation():
+    if settings.WORKLOAD_RECONCILE_INTERVAL_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(run_workload_reconciliation()))
+
+@app.on_event("startup")
+async def start_event_loop_lag_monitor():
+    background_tasks.append(asyncio.create_task(monitor_event_loop_lag()))
+
+@app.on_event("startup")
+async def calibrate_password_hashing():
+    if settings.BCRYPT_TARGET_MS:
+        with startup_phase("bcrypt_calibration"):
+            await asyncio.to_thread(password_hasher.calibrate, settings.BCRYPT_TARGET_MS)
+
+@app.on_event("startup")
+async def start_chat_broadcast():
+    with startup_phase("chat_broadcast"):
+        await manager.start()
+        chat_writer.start()
+
+# Registered last, so it runs after the other startup handlers
+@app.on_event("startup")
+async def report_startup_timings():
+    total = sum(startup_timings.values())
+    phases = ", ".join(f"{name}={ms}ms" for name, ms in startup_timings.items())
+    logger.info(f"Worker started in {total:.1f}ms ({phases})")
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    for task in background_tasks:
+        task.cancel()
+    background_tasks.clear()
+    await chat_writer.stop()
+    await manager.stop()
+    password_hasher.shutdown()
 
 @app.get("/health")
 def health_check():
-    return {"status": "Development"}
\ No newline at end of file
+    return {
+        "status": "Development",
+        "revocation_cache": revocation_cache.stats(),
+        "token_cache": token_cache.stats(),
+        "chat_writer": chat_writer.stats(),
+        "startup_ms": startup_timings,
+        "slow_queries": slow_query_log.stats(),
+        "read_replica": replica_router.stats(),
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -1,4 +1,7 @@
 from app.models.user import User
 from app.models.token_blacklist import TokenBlacklist
 from app.models.ticket import Ticket
-from app.models.chat import Chat
\ No newline at end of file
+from app.models.chat import Chat
+from app.models.assignment import AssignmentCursor, CSRWorkload
+from app.models.dashboard import TicketRollup
+from app.models.replication import ReplicationHeartbeat
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, String, BigInteger, Integer, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.session import Base
+
+class AssignmentCursor(Base):
+    """
+    Persisted rotation position for round-robin assignment, shared by all
+    workers. Advanced with a single atomic UPDATE ... RETURNING.
+    """
+    __tablename__ = "assignment_cursors"
+
+    name = Column(String, primary_key=True)
+    position = Column(BigInteger, nullable=False, default=0)
+
+class CSRWorkload(Base):
+    """
+    Open-ticket counters per CSR, maintained incrementally whenever a
+    ticket is assigned, reassigned or changes status. `weighted_load`
+    weights each open ticket by its priority.
+    """
+    __tablename__ = "csr_workloads"
+    __table_args__ = (
+        Index("ix_csr_workloads_weighted_load", "weighted_load", "open_tickets"),
+        Index("ix_csr_workloads_open_tickets", "open_tickets"),
+    )
+
+    csr_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    open_tickets = Column(Integer, nullable=False, default=0)
+    weighted_load = Column(Integer, nullable=False, default=0)
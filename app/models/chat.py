@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -8,6 +8,10 @@ from app.db.session import Base
 
 class Chat(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        # Chat history for one ticket, in order
+        Index("ix_messages_ticket_id_timestamp_id", "ticket_id", "timestamp", "id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     ticket_id = Column(UUID(as_uuid=True), ForeignKey("tickets.id"), nullable=False)
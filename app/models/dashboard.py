@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String, Integer
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.session import Base
+
+class TicketRollup(Base):
+    """
+    Ticket counts per (status, priority, assignee) cell, maintained
+    incrementally in the same transaction as every ticket create, assign
+    and status change. Dashboards sum these cells instead of scanning
+    tickets, so their cost depends on the number of CSRs, never on the
+    number of tickets.
+
+    Primary key columns cannot be NULL, so an unset priority is stored as
+    "" and an unassigned ticket under the all-ones UUID.
+    """
+    __tablename__ = "ticket_rollups"
+
+    status = Column(String, primary_key=True)
+    priority = Column(String, primary_key=True)
+    assigned_to_id = Column(UUID(as_uuid=True), primary_key=True)
+    tickets = Column(Integer, nullable=False, default=0)
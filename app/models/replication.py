@@ -0,0 +1,14 @@
+from sqlalchemy import Column, DateTime, Integer
+
+from app.db.session import Base
+
+class ReplicationHeartbeat(Base):
+    """
+    A single row the replica probe stamps on the primary every interval.
+    Reading it back from the replica tells how far behind the replica is,
+    whatever the database or replication method.
+    """
+    __tablename__ = "replication_heartbeat"
+
+    id = Column(Integer, primary_key=True)
+    beat_at = Column(DateTime, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Enum, ForeignKey, DateTime
+from sqlalchemy import DDL, Column, String, Enum, ForeignKey, DateTime, Index, event, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -20,6 +20,25 @@ class TicketPriority(str, enum.Enum):
 
 class Ticket(Base):
     __tablename__ = "tickets"
+    __table_args__ = (
+        # Keyset pagination over (created_at, id), globally and per owner
+        Index("ix_tickets_created_at_id", "created_at", "id"),
+        Index("ix_tickets_user_id_created_at_id", "user_id", "created_at", "id"),
+        # Owner listing filtered by status
+        Index("ix_tickets_user_id_status_created_at", "user_id", "status", "created_at", "id"),
+        # CSR listing filtered by status or category
+        Index("ix_tickets_status_created_at", "status", "created_at", "id"),
+        Index("ix_tickets_category_created_at", "category", "created_at", "id"),
+        # Per-assignee open work (workload, "my tickets")
+        Index("ix_tickets_assigned_to_id_status", "assigned_to_id", "status"),
+        # CSR unassigned queue; only the few unassigned rows are indexed
+        Index(
+            "ix_tickets_unassigned_status_created_at",
+            "status", "created_at", "id",
+            postgresql_where=text("assigned_to_id IS NULL"),
+            sqlite_where=text("assigned_to_id IS NULL"),
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title = Column(String, nullable=False)
@@ -36,3 +55,38 @@ class Ticket(Base):
 
     user = relationship("User", foreign_keys=[user_id])
     assigned_to = relationship("User", foreign_keys=[assigned_to_id])
+    chat = relationship("Chat", back_populates="ticket")
+
+
+# Full-text search over title and description; see app/services/ticket_search.py.
+# The same DDL is applied to migrated databases by the ticket search migration.
+#
+# PostgreSQL: a generated, weighted tsvector column with a GIN index. It is not
+# mapped on the model, so the model stays portable.
+POSTGRES_SEARCH_DDL = [
+    "ALTER TABLE tickets ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_tickets_search_vector ON tickets USING gin (search_vector)",
+]
+
+# SQLite: an external-content FTS5 table kept in sync by triggers
+SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS tickets_fts USING fts5("
+    "title, description, content='tickets', content_rowid='rowid', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS tickets_fts_ai AFTER INSERT ON tickets BEGIN "
+    "INSERT INTO tickets_fts(rowid, title, description) VALUES (new.rowid, new.title, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS tickets_fts_ad AFTER DELETE ON tickets BEGIN "
+    "INSERT INTO tickets_fts(tickets_fts, rowid, title, description) "
+    "VALUES ('delete', old.rowid, old.title, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS tickets_fts_au AFTER UPDATE OF title, description ON tickets BEGIN "
+    "INSERT INTO tickets_fts(tickets_fts, rowid, title, description) "
+    "VALUES ('delete', old.rowid, old.title, old.description); "
+    "INSERT INTO tickets_fts(rowid, title, description) VALUES (new.rowid, new.title, new.description); END",
+]
+
+for statement in POSTGRES_SEARCH_DDL:
+    event.listen(Ticket.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+for statement in SQLITE_SEARCH_DDL:
+    event.listen(Ticket.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(Ticket.__table__, "before_drop", DDL("DROP TABLE IF EXISTS tickets_fts").execute_if(dialect="sqlite"))
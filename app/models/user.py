@@ -3,6 +3,7 @@ from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.session import Base
+import enum
 import uuid
 
 class UserRole(str, enum.Enum):
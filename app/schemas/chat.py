@@ -1,8 +1,10 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
+from typing import List, Optional
 from uuid import UUID
 
 class WSChat(BaseModel):
+    id: UUID
     ticket_id: UUID
     sender_id: UUID
     content: str
@@ -19,5 +21,9 @@ class ChatRead(BaseModel):
     content: str
     timestamp: datetime
 
-    class Config:
-        orm_mode = True
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class ChatPage(BaseModel):
+    items: List[ChatRead]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
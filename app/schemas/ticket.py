@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Dict, List, Optional
 from enum import Enum
 from uuid import UUID
 from datetime import datetime
@@ -39,5 +39,45 @@ class TicketOut(TicketBase):
     assigned_to_id: Optional[UUID]
     created_at: datetime
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+class TicketPage(BaseModel):
+    items: List[TicketOut]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+class TicketSearchHit(TicketOut):
+    rank: float
+
+class TicketSearchResult(BaseModel):
+    items: List[TicketSearchHit]
+    limit: int
+    offset: int
+
+class AssigneeTicketCounts(BaseModel):
+    assigned_to_id: Optional[UUID]  # None for unassigned tickets
+    total: int
+    open: int
+
+class TicketDashboard(BaseModel):
+    total: int
+    by_status: Dict[str, int]
+    by_priority: Dict[str, int]  # "unset" for tickets without a priority
+    by_assignee: List[AssigneeTicketCounts]
+    as_of: datetime
+
+class TicketImportRow(TicketBase):
+    user_id: UUID
+    status: TicketStatus = TicketStatus.OPEN
+    priority: Optional[TicketPriority] = None
+    assigned_to_id: Optional[UUID] = None
+    created_at: Optional[datetime] = None
+
+class TicketImportError(BaseModel):
+    line: int
+    error: str
+
+class TicketImportResult(BaseModel):
+    inserted: int = 0
+    failed: int = 0
+    errors: List[TicketImportError] = []
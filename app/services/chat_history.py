@@ -0,0 +1,240 @@
+from bisect import bisect_left
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+from uuid import UUID
+
+from pydantic import ValidationError
+from sqlalchemy import and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.pagination import decode_cursor, keyset_paginate, page_cursors
+from app.core.websocket_manager import manager
+from app.models.chat import Chat
+from app.schemas.chat import WSChat
+
+Key = Tuple[datetime, UUID]
+
+
+def _key(message: dict) -> Key:
+    return message["timestamp"], message["id"]
+
+
+class TicketHistory:
+    """
+    The most recent messages of one ticket, oldest first, bounded to
+    `capacity`. The buffer always reaches up to the newest message;
+    `complete` means it also reaches back to the first one.
+    """
+
+    __slots__ = ("capacity", "keys", "messages", "complete")
+
+    def __init__(self, capacity: int, messages: List[dict], complete: bool):
+        self.capacity = capacity
+        self.messages = messages
+        self.keys = [_key(m) for m in messages]
+        self.complete = complete
+
+    def add(self, message: dict) -> None:
+        key = _key(message)
+        if not self.keys or key > self.keys[-1]:
+            self.keys.append(key)
+            self.messages.append(message)
+        else:
+            # Relayed from another worker slightly out of order
+            index = bisect_left(self.keys, key)
+            if index < len(self.keys) and self.keys[index] == key:
+                return
+            if index == 0 and not self.complete:
+                return
+            self.keys.insert(index, key)
+            self.messages.insert(index, message)
+        if len(self.keys) > self.capacity:
+            del self.keys[0]
+            del self.messages[0]
+            self.complete = False
+
+    def since(self, last_seen_id: UUID) -> Optional[List[dict]]:
+        """
+        Messages after `last_seen_id`, or None if the buffer cannot tell:
+        the message is older than the buffer (or unknown to it), so some of
+        the messages after it may be missing here.
+        """
+        for index in range(len(self.messages) - 1, -1, -1):
+            if self.messages[index]["id"] == last_seen_id:
+                return self.messages[index + 1:]
+        if self.complete:
+            # The buffer holds every message, so the id is not this ticket's
+            return list(self.messages)
+        return None
+
+    def page(self, cursor: Optional[Key], direction: str, limit: int) -> Optional[Tuple[List[dict], bool]]:
+        """
+        A newest-first page as keyset_paginate would return it, plus whether
+        there is more in that direction, or None if the buffer cannot tell.
+        """
+        if direction == "next":
+            end = len(self.keys) if cursor is None else bisect_left(self.keys, cursor)
+            if end <= limit and not self.complete:
+                return None
+            start = max(0, end - limit)
+            return self.messages[start:end][::-1], start > 0
+        if cursor is None or (self.keys and cursor < self.keys[0] and not self.complete):
+            return None
+        start = bisect_left(self.keys, cursor)
+        if start < len(self.keys) and self.keys[start] == cursor:
+            start += 1
+        end = min(len(self.keys), start + limit)
+        return self.messages[start:end][::-1], end < len(self.keys)
+
+
+class ChatHistory:
+    """
+    Per-ticket ring buffers of recent messages for the tickets chatted on
+    lately, so reconnect replays and the first pages of history rarely
+    touch the database.
+
+    Buffers are filled from the DB on first use and kept current by every
+    message this worker broadcasts or receives from other workers. They
+    are dropped whenever the broadcast backend reports relayed messages
+    lost, and reloaded after `ttl` seconds to bound any other drift.
+
+    That only holds if every message reaches every worker, so by default
+    buffering is enabled only with a cross-worker broadcast backend. With
+    "memory", another worker's messages would never reach this worker's
+    buffers; history is then read from the DB on every request.
+    """
+
+    def __init__(
+        self,
+        size: int = settings.CHAT_HISTORY_SIZE,
+        tickets: int = settings.CHAT_HISTORY_TICKETS,
+        ttl: float = settings.CHAT_HISTORY_TTL_SECONDS,
+        enabled: bool = settings.WS_BROADCAST_BACKEND != "memory",
+    ):
+        self.size = size
+        self.enabled = enabled
+        self._buffers = TTLCache(maxsize=tickets, ttl=ttl)
+        self.db_pages = 0
+
+    def add(self, message: dict) -> None:
+        buffer = self._buffers.peek(str(message["ticket_id"]))
+        if buffer is not None:
+            buffer.add(message)
+
+    def on_relayed(self, room: str, data: str) -> None:
+        if self._buffers.peek(room) is None:
+            return
+        try:
+            self.add(WSChat.model_validate_json(data).model_dump())
+        except ValidationError:
+            pass
+
+    def on_lost(self, room: Optional[str]) -> None:
+        """
+        Drop the buffers that may be missing relayed messages (all of them
+        if `room` is None), so they are reloaded from the DB.
+        """
+        if room is None:
+            self._buffers.clear()
+        else:
+            self._buffers.invalidate(room)
+
+    async def load(self, db: AsyncSession, ticket_id: UUID) -> TicketHistory:
+        """
+        The ticket's buffer, loaded from the DB if needed. When buffering is
+        disabled it is loaded every time and not kept.
+        """
+        buffer = self._buffers.get(str(ticket_id)) if self.enabled else None
+        if buffer is not None:
+            return buffer
+        messages = Chat.__table__
+        result = await db.execute(
+            select(messages.c.id, messages.c.ticket_id, messages.c.sender_id, messages.c.content, messages.c.timestamp)
+            .where(messages.c.ticket_id == ticket_id)
+            .order_by(messages.c.timestamp.desc(), messages.c.id.desc())
+            .limit(self.size)
+        )
+        rows = [dict(row._mapping) for row in result]
+        rows.reverse()
+        buffer = TicketHistory(self.size, rows, complete=len(rows) < self.size)
+        if self.enabled:
+            self._buffers.set(str(ticket_id), buffer)
+        return buffer
+
+    async def replay(self, db: AsyncSession, ticket_id: UUID, last_seen_id: UUID) -> Callable[[], List[dict]]:
+        """
+        For a client reconnecting after `last_seen_id`: a callable returning
+        every message since, to be called when it rejoins the room (see
+        ConnectionManager.connect). Messages older than the buffer are read
+        from the DB now, the rest come from the buffer when called. An
+        unknown `last_seen_id` replays the newest messages.
+        """
+        buffer = await self.load(db, ticket_id)
+        if buffer.since(last_seen_id) is not None:
+            return lambda: buffer.since(last_seen_id) or []
+
+        messages = Chat.__table__
+        last_seen = (
+            await db.execute(
+                select(messages.c.timestamp, messages.c.id)
+                .where(messages.c.ticket_id == ticket_id, messages.c.id == last_seen_id)
+            )
+        ).first()
+        if last_seen is None:
+            return lambda: list(buffer.messages)
+        result = await db.execute(
+            select(messages.c.id, messages.c.ticket_id, messages.c.sender_id, messages.c.content, messages.c.timestamp)
+            .where(
+                messages.c.ticket_id == ticket_id,
+                or_(
+                    messages.c.timestamp > last_seen.timestamp,
+                    and_(messages.c.timestamp == last_seen.timestamp, messages.c.id > last_seen.id),
+                ),
+            )
+            .order_by(messages.c.timestamp, messages.c.id)
+        )
+        missed = [dict(row._mapping) for row in result]
+        if not missed:
+            return lambda: []
+
+        def backlog() -> List[dict]:
+            # plus anything newer than the DB read, if the buffer has it
+            return missed + (buffer.since(missed[-1]["id"]) or [])
+
+        return backlog
+
+    async def page(
+        self,
+        db: AsyncSession,
+        ticket_id: UUID,
+        cursor: Optional[str] = None,
+        direction: str = "next",
+        limit: int = 50,
+    ) -> Tuple[list, Optional[str], Optional[str]]:
+        """
+        keyset_paginate over the ticket's messages, newest first, served from
+        the buffer whenever it holds the whole page.
+        """
+        key = decode_cursor(cursor) if cursor is not None else None
+        served = (await self.load(db, ticket_id)).page(key, direction, limit) if self.enabled else None
+        if served is not None:
+            items, has_more = served
+            if not items:
+                return items, None, None
+            return (items, *page_cursors(_key(items[0]), _key(items[-1]), direction, key is not None, has_more))
+
+        self.db_pages += 1
+        return await keyset_paginate(
+            db, select(Chat).where(Chat.ticket_id == ticket_id), Chat.timestamp, Chat.id, cursor, direction, limit
+        )
+
+    def stats(self) -> dict:
+        return {**self._buffers.stats(), "enabled": self.enabled, "db_pages": self.db_pages}
+
+# singleton, kept current with messages relayed from other workers
+chat_history = ChatHistory()
+manager.relay_listeners.append(chat_history.on_relayed)
+manager.lost_listeners.append(chat_history.on_lost)
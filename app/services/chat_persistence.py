@@ -0,0 +1,230 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.websocket_manager import manager
+from app.db.session import AsyncSessionLocal
+from app.models.chat import Chat
+from app.services.chat_history import ChatHistory, chat_history
+
+# "durable": broadcast once the message is committed
+# "broadcast_first": broadcast on receipt, persist in the background
+WRITE_MODES = ("durable", "broadcast_first")
+
+Publish = Callable[[str, dict], Awaitable[None]]
+
+
+class ChatWriter:
+    """
+    Group-commits chat messages from every connection.
+
+    Messages are queued with an id and timestamp assigned here, and a single
+    writer task inserts them in batches of up to `batch_size`, waiting at
+    most `flush_interval` seconds for a batch to fill. Since one task writes
+    (and, in durable mode, broadcasts) in queue order, messages on a ticket
+    are always seen in the order they were received.
+    """
+
+    def __init__(
+        self,
+        mode: str = settings.CHAT_WRITE_MODE,
+        batch_size: int = settings.CHAT_WRITE_BATCH_SIZE,
+        flush_interval: float = settings.CHAT_WRITE_FLUSH_SECONDS,
+        max_pending: int = settings.CHAT_WRITE_MAX_PENDING,
+        retries: int = 3,
+        session_factory=AsyncSessionLocal,
+        publish: Optional[Publish] = None,
+        history: Optional[ChatHistory] = None,
+    ):
+        if mode not in WRITE_MODES:
+            raise ValueError(f"Unknown chat write mode: {mode}")
+        self.mode = mode
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.retries = retries
+        self.session_factory = session_factory
+        self.publish = publish or manager.broadcast
+        self.history = history or chat_history
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._last_timestamp = datetime.min
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+
+    def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Flush whatever is queued, then stop the writer task.
+        """
+        if self._task is None:
+            return
+        if self._loop is asyncio.get_running_loop():
+            await self._queue.join()
+        self._task.cancel()
+        self._task = None
+
+    def _next_timestamp(self) -> datetime:
+        # History is ordered by (timestamp, id); keep timestamps strictly
+        # increasing so ties never reorder messages
+        now = datetime.utcnow()
+        if now <= self._last_timestamp:
+            now = self._last_timestamp + timedelta(microseconds=1)
+        self._last_timestamp = now
+        return now
+
+    async def submit(self, ticket_id, sender_id, content: str) -> dict:
+        """
+        Queue a message for persistence and return it as a chat frame.
+
+        In durable mode this waits until the message is committed (and it
+        has been broadcast), raising if it could not be saved. In
+        broadcast_first mode it is broadcast straight away and written in
+        the background.
+        """
+        self.start()
+        record = {
+            "id": uuid.uuid4(),
+            "ticket_id": uuid.UUID(str(ticket_id)),
+            "sender_id": uuid.UUID(str(sender_id)),
+            "content": content,
+            "timestamp": self._next_timestamp(),
+        }
+        # Built here with exactly WSChat's fields and types, so it is sent
+        # as is rather than validated into a model and dumped again
+        message = dict(record)
+
+        if self.mode == "broadcast_first":
+            await self._queue.put((record, message, None))
+            await self._publish(message)
+            return message
+
+        done = asyncio.get_running_loop().create_future()
+        await self._queue.put((record, message, done))
+        await done
+        return message
+
+    async def _next_batch(self) -> List[Tuple[dict, dict, Optional[asyncio.Future]]]:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _insert(self, batch) -> Optional[Exception]:
+        """
+        Insert a batch in one transaction; the error if it failed.
+        """
+        try:
+            async with self.session_factory() as db:
+                await db.execute(insert(Chat), [record for record, _, _ in batch])
+                await db.commit()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            return e
+        return None
+
+    async def _isolate(self, batch, error: Exception) -> list:
+        """
+        Bisect a batch that failed with `error` until the rows that fail on
+        their own are found, inserting the rest. Returns (item, error) for
+        each row that could not be saved.
+        """
+        if len(batch) == 1:
+            return [(batch[0], error)]
+        failed = []
+        half = len(batch) // 2
+        for part in (batch[:half], batch[half:]):
+            part_error = await self._insert(part)
+            if part_error is not None:
+                failed += await self._isolate(part, part_error)
+        return failed
+
+    async def _flush(self, batch) -> None:
+        error: Optional[Exception] = None
+        for attempt in range(self.retries + 1):
+            error = await self._insert(batch)
+            if error is None:
+                break
+            logger.warning(f"Chat batch of {len(batch)} failed (attempt {attempt + 1}): {str(error)}")
+            if attempt < self.retries:
+                await asyncio.sleep(min(0.05 * 2 ** attempt, 1.0))
+
+        self.batches += 1
+        failed = {}
+        if error is not None:
+            # One bad row must not cost the unrelated messages batched with it
+            # (in broadcast_first mode already delivered to their clients)
+            failed = {id(item): row_error for item, row_error in await self._isolate(batch, error)}
+            self.failed += len(failed)
+            logger.error(
+                f"Dropping {len(failed)} of {len(batch)} chat messages after {self.retries + 1} attempts: {str(error)}"
+            )
+
+        self.written += len(batch) - len(failed)
+        for item in batch:
+            _, message, done = item
+            if id(item) in failed:
+                if done is not None and not done.done():
+                    done.set_exception(failed[id(item)])
+                continue
+            if done is None:
+                continue
+            await self._publish(message)
+            if not done.done():
+                done.set_result(None)
+
+    async def _publish(self, message: dict) -> None:
+        # The history buffer and local sockets see the message together, so
+        # a reconnect replay never misses or repeats it
+        self.history.add(message)
+        try:
+            await self.publish(str(message["ticket_id"]), message)
+        except Exception as e:
+            logger.error(f"Chat broadcast failed: {str(e)}")
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
+
+# singleton
+chat_writer = ChatWriter()
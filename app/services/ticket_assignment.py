@@ -1,43 +1,397 @@
+import asyncio
+import heapq
 import random
+import time
+from collections import defaultdict
+from typing import Iterable, List, NamedTuple, Optional
+from uuid import UUID
+
+from sqlalchemy import case, event, func, inspect, insert, text, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.db.session import AsyncSessionLocal, engine
+from app.db.upsert import upsert_increment
+from app.models.assignment import AssignmentCursor, CSRWorkload
+from app.models.ticket import Ticket, TicketPriority, TicketStatus
 from app.models.user import User, UserRole
-from app.models.ticket import Ticket
 
-async def assign_csr_to_ticket(
-    db: AsyncSession,
-    strategy: str = "round_robin"
-) -> str:
+ROUND_ROBIN = "round_robin"
+
+# Any fixed 64-bit value; held by whichever worker is reconciling workloads
+RECONCILE_LOCK_KEY = 0x5354535245434F4E
+
+# Tickets in these states count towards a CSR's workload
+OPEN_STATUSES = (TicketStatus.OPEN, TicketStatus.IN_PROGRESS)
+
+# Relative effort of an open ticket by priority, for weighted least-loaded
+PRIORITY_WEIGHTS = {
+    None: 1,
+    TicketPriority.LOW: 1,
+    TicketPriority.MEDIUM: 2,
+    TicketPriority.HIGH: 3,
+}
+
+
+class CSRRoster:
     """
-    Select a CSR to assign a ticket, using either 'random' or 'round_robin'.
-    Returns the chosen CSR's user_id (UUID).
+    Cached, ordered list of active CSR ids.
+
+    Dropped whenever this worker changes a CSR row (see the mapper events
+    below) and otherwise refreshed every `ttl` seconds, which bounds how long
+    role changes made by other workers take to show up.
     """
-    # Fetch all CSRs
-    result = await db.execute(
-        select(User).where(User.role == UserRole.CSR)
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._ids: Optional[List[UUID]] = None
+        self._loaded_at = 0.0
+
+    def invalidate(self) -> None:
+        self._ids = None
+
+    async def get(self, db: AsyncSession) -> List[UUID]:
+        if self._ids is None or time.monotonic() - self._loaded_at > self.ttl:
+            result = await db.execute(
+                select(User.id)
+                .where(User.role == UserRole.CSR, User.is_active.is_not(False))
+                .order_by(User.id)
+            )
+            self._ids = list(result.scalars().all())
+            self._loaded_at = time.monotonic()
+        return self._ids
+
+
+csr_roster = CSRRoster(ttl=settings.CSR_ROSTER_TTL_SECONDS)
+
+
+@event.listens_for(User, "after_insert")
+@event.listens_for(User, "after_delete")
+def _csr_added_or_removed(mapper, connection, target: User) -> None:
+    if target.role == UserRole.CSR:
+        csr_roster.invalidate()
+
+
+@event.listens_for(User, "after_update")
+def _csr_changed(mapper, connection, target: User) -> None:
+    state = inspect(target)
+    if state.attrs.role.history.has_changes() or state.attrs.is_active.history.has_changes():
+        csr_roster.invalidate()
+
+
+async def advance_cursor(db: AsyncSession, count: int = 1, name: str = ROUND_ROBIN) -> int:
+    """
+    Atomically move the named rotation cursor forward by `count` and return
+    its new position; callers take it modulo the roster size. Concurrent
+    callers, in any worker, always receive disjoint ranges of positions.
+
+    The cursor row is bumped in its own short transaction on a separate
+    connection, so its row lock is released at once instead of being held
+    until the caller's ticket transaction commits, which would serialize
+    every ticket creation. A ticket that then fails to save only skips a
+    slot in the rotation. SQLite allows one writer at a time anyway, so
+    there the bump joins the caller's transaction rather than wait on it.
+    """
+    stmt = (
+        update(AssignmentCursor)
+        .where(AssignmentCursor.name == name)
+        .values(position=AssignmentCursor.position + count)
+        .returning(AssignmentCursor.position)
     )
-    csrs = result.scalars().all()
-    if not csrs:
+    if db.bind.dialect.name == "sqlite":
+        return await _advance_cursor(db, stmt, name, count)
+    async with db.bind.begin() as conn:
+        return await _advance_cursor(conn, stmt, name, count)
+
+
+async def _advance_cursor(db, stmt, name: str, count: int) -> int:
+    position = (await db.execute(stmt)).scalar_one_or_none()
+    if position is not None:
+        return position
+
+    # First use of this cursor: create it, unless another worker just did
+    try:
+        async with db.begin_nested():
+            await db.execute(insert(AssignmentCursor).values(name=name, position=count))
+        return count
+    except IntegrityError:
+        return (await db.execute(stmt)).scalar_one()
+
+
+class TicketState(NamedTuple):
+    """
+    The ticket fields that decide whose workload a ticket counts towards.
+    """
+    assigned_to_id: Optional[UUID]
+    status: Optional[TicketStatus]
+    priority: Optional[TicketPriority]
+
+
+def ticket_state(ticket: Ticket) -> TicketState:
+    return TicketState(ticket.assigned_to_id, ticket.status, ticket.priority)
+
+
+def _load_of(state: Optional[TicketState]):
+    if state is None or state.assigned_to_id is None:
+        return None
+    # New tickets get their OPEN default only at insert time
+    if (state.status or TicketStatus.OPEN) not in OPEN_STATUSES:
         return None
+    return state.assigned_to_id, PRIORITY_WEIGHTS[state.priority]
 
-    if strategy == "random":
-        return random.choice(csrs).id
 
-    # Round-robin: look at last assigned ticket
+async def record_ticket_change(
+    db: AsyncSession,
+    before: Optional[TicketState],
+    after: Optional[TicketState],
+) -> None:
+    """
+    Move a ticket's contribution between CSR workload counters. Pass
+    `before=None` for a new ticket. Runs in the caller's transaction, so the
+    counters commit (or roll back) together with the ticket change.
+    """
+    old, new = _load_of(before), _load_of(after)
+    if old == new:
+        return
+    if old is not None:
+        await upsert_increment(
+            db, CSRWorkload.__table__, {"csr_id": old[0]},
+            {"open_tickets": -1, "weighted_load": -old[1]},
+        )
+    if new is not None:
+        await upsert_increment(
+            db, CSRWorkload.__table__, {"csr_id": new[0]},
+            {"open_tickets": 1, "weighted_load": new[1]},
+        )
+
+
+async def record_new_tickets(db: AsyncSession, states: Iterable[TicketState]) -> None:
+    """
+    Add many new tickets to the workload counters with one upsert per CSR.
+    """
+    totals = defaultdict(lambda: [0, 0])
+    for state in states:
+        load = _load_of(state)
+        if load is not None:
+            totals[load[0]][0] += 1
+            totals[load[0]][1] += load[1]
+    for csr_id, (count, weight) in totals.items():
+        await upsert_increment(
+            db, CSRWorkload.__table__, {"csr_id": csr_id},
+            {"open_tickets": count, "weighted_load": weight},
+        )
+
+
+async def least_loaded_csr(db: AsyncSession, weighted: bool = True) -> Optional[UUID]:
+    """
+    The active CSR with the smallest workload counter. CSRs without a
+    counter row yet have no open tickets. Cost depends on the number of
+    CSRs, never on the number of tickets.
+    """
+    open_tickets = func.coalesce(CSRWorkload.open_tickets, 0)
+    weighted_load = func.coalesce(CSRWorkload.weighted_load, 0)
+    order = (weighted_load, open_tickets) if weighted else (open_tickets,)
     result = await db.execute(
-        select(Ticket.assigned_to_id)
-        .where(Ticket.assigned_to_id.is_not(None))
-        .order_by(Ticket.created_at.desc())
+        select(User.id)
+        .outerjoin(CSRWorkload, CSRWorkload.csr_id == User.id)
+        .where(User.role == UserRole.CSR, User.is_active.is_not(False))
+        .order_by(*order, User.id)
         .limit(1)
     )
-    last_assigned_id = result.scalars().first()
+    return result.scalars().first()
+
+
+async def _csr_loads(db: AsyncSession, weighted: bool) -> List[tuple]:
+    result = await db.execute(
+        select(
+            User.id,
+            func.coalesce(CSRWorkload.weighted_load if weighted else CSRWorkload.open_tickets, 0),
+        )
+        .outerjoin(CSRWorkload, CSRWorkload.csr_id == User.id)
+        .where(User.role == UserRole.CSR, User.is_active.is_not(False))
+    )
+    return [(load, csr_id) for csr_id, load in result.all()]
+
+
+async def assign_csrs(
+    db: AsyncSession,
+    count: int,
+    strategy: str = "round_robin",
+) -> List[Optional[UUID]]:
+    """
+    Choose CSRs for `count` new tickets at once, with a fixed number of
+    statements whatever `count` is. Used by bulk import.
+    """
+    if count <= 0:
+        return []
+
+    if strategy == "least_loaded":
+        # Greedily hand each new (unprioritised) ticket to the lightest CSR
+        heap = await _csr_loads(db, weighted=settings.ASSIGNMENT_PRIORITY_WEIGHTED)
+        if not heap:
+            return [None] * count
+        heapq.heapify(heap)
+        chosen = []
+        for _ in range(count):
+            load, csr_id = heapq.heappop(heap)
+            chosen.append(csr_id)
+            heapq.heappush(heap, (load + PRIORITY_WEIGHTS[None], csr_id))
+        return chosen
+
+    csr_ids = await csr_roster.get(db)
+    if not csr_ids:
+        return [None] * count
+
+    if strategy == "random":
+        return [random.choice(csr_ids) for _ in range(count)]
+
+    position = await advance_cursor(db, count)
+    first = position - count
+    return [csr_ids[(first + k) % len(csr_ids)] for k in range(count)]
+
+
+def _open_load():
+    """Open ticket count and weighted load, for grouping or filtering by CSR."""
+    weight = case(
+        *((Ticket.priority == priority, w) for priority, w in PRIORITY_WEIGHTS.items() if priority),
+        else_=PRIORITY_WEIGHTS[None],
+    )
+    return (
+        select(func.count(), func.coalesce(func.sum(weight), 0))
+        .where(Ticket.assigned_to_id.is_not(None), Ticket.status.in_(OPEN_STATUSES))
+    )
+
+
+async def _reconcile_csr(db: AsyncSession, csr_id: UUID) -> bool:
+    """
+    Lock one CSR's counter row, recount its open tickets and correct the
+    counter. Commits, releasing the row lock. Returns whether it changed.
+    """
+    locked = (
+        select(CSRWorkload)
+        .where(CSRWorkload.csr_id == csr_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    row = (await db.execute(locked)).scalar_one_or_none()
+    if row is None:
+        await upsert_increment(
+            db, CSRWorkload.__table__, {"csr_id": csr_id}, {"open_tickets": 0, "weighted_load": 0}
+        )
+        row = (await db.execute(locked)).scalar_one()
+
+    result = await db.execute(_open_load().where(Ticket.assigned_to_id == csr_id))
+    count, load = result.one()
+    changed = (row.open_tickets, row.weighted_load) != (count, int(load))
+    if changed:
+        row.open_tickets, row.weighted_load = count, int(load)
+    await db.commit()
+    return changed
+
+
+async def _reconcile_all(db: AsyncSession) -> int:
+    # Spot drift from a snapshot, without locking anything
+    result = await db.execute(_open_load().add_columns(Ticket.assigned_to_id).group_by(Ticket.assigned_to_id))
+    actual = {csr_id: (count, int(load)) for count, load, csr_id in result.all()}
+    result = await db.execute(select(CSRWorkload.csr_id, CSRWorkload.open_tickets, CSRWorkload.weighted_load))
+    counters = {csr_id: (count, load) for csr_id, count, load in result.all()}
+    await db.commit()
+
+    fixed = 0
+    for csr_id in set(actual) | set(counters):
+        if counters.get(csr_id) != actual.get(csr_id, (0, 0)):
+            fixed += await _reconcile_csr(db, csr_id)
+    return fixed
+
+
+async def reconcile_workloads(db: AsyncSession) -> int:
+    """
+    Recompute every CSR workload counter from the tickets table and fix any
+    that drifted. Returns how many counters were corrected. Commits.
+
+    The full count runs without locks and only picks out the counters that
+    look wrong. Each of those is then corrected in its own short transaction
+    that locks just that counter row and recounts that CSR's tickets, so a
+    ticket change committing meanwhile either lands before the recount or
+    waits for the row and applies its increment on top of it. On PostgreSQL
+    only one worker reconciles at a time; the others skip the round and
+    return 0.
+    """
+    if db.bind.dialect.name != "postgresql":
+        return await _reconcile_all(db)
+
+    # A session-level lock, held on its own connection across the
+    # per-row transactions
+    async with db.bind.connect() as conn:
+        locked = await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": RECONCILE_LOCK_KEY})
+        if not locked.scalar():
+            return 0
+        await conn.commit()
+        try:
+            return await _reconcile_all(db)
+        finally:
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": RECONCILE_LOCK_KEY})
+            await conn.commit()
+
+
+async def run_workload_reconciliation(
+    interval: float = settings.WORKLOAD_RECONCILE_INTERVAL_SECONDS,
+) -> None:
+    """
+    Background loop that periodically repairs workload counter drift. Every
+    worker runs it; each round, one of them does the work.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with AsyncSessionLocal() as db:
+                fixed = await reconcile_workloads(db)
+            if fixed:
+                logger.warning(f"Workload reconciliation corrected {fixed} CSR counters")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Workload reconciliation failed: {str(e)}")
+
+
+async def assign_csr_to_ticket(
+    db: AsyncSession,
+    strategy: str = "round_robin"
+) -> Optional[UUID]:
+    """
+    Select a CSR to assign a ticket, using 'random', 'round_robin' or
+    'least_loaded'. Returns the chosen CSR's user_id (UUID), or None when
+    there are no CSRs.
+    """
+    if strategy == "least_loaded":
+        return await least_loaded_csr(db, weighted=settings.ASSIGNMENT_PRIORITY_WEIGHTED)
+
+    csr_ids = await csr_roster.get(db)
+    if not csr_ids:
+        return None
+
+    if strategy == "random":
+        return random.choice(csr_ids)
+
+    # Round-robin: one atomic cursor bump picks the next slot in the rotation
+    position = await advance_cursor(db)
+    return csr_ids[(position - 1) % len(csr_ids)]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ticket assignment maintenance")
+    parser.add_argument("command", choices=["reconcile"])
+    parser.parse_args()
 
-    # Build list of CSR IDs
-    csr_ids = [csr.id for csr in csrs]
-    if last_assigned_id in csr_ids:
-        idx = csr_ids.index(last_assigned_id)
-        next_idx = (idx + 1) % len(csr_ids)
-    else:
-        next_idx = 0
+    async def _reconcile() -> None:
+        async with AsyncSessionLocal() as db:
+            fixed = await reconcile_workloads(db)
+        await engine.dispose()
+        print(f"Corrected {fixed} CSR workload counters")
 
-    return csr_ids[next_idx]
\ No newline at end of file
+    asyncio.run(_reconcile())
@@ -0,0 +1,193 @@
+import asyncio
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import func, text
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal, engine
+from app.db.upsert import upsert_increment
+from app.models.dashboard import TicketRollup
+from app.models.ticket import Ticket, TicketPriority, TicketStatus
+from app.services.ticket_assignment import OPEN_STATUSES, TicketState
+
+# Stored in place of NULL, which primary key columns do not allow. The
+# all-ones "max" UUID rather than the nil one: SQLite would store an
+# all-digit value in a UUID column as the integer 0.
+UNSET_PRIORITY = ""
+UNASSIGNED = uuid.UUID(int=(1 << 128) - 1)
+
+
+def _cell(state: TicketState) -> tuple:
+    # New tickets get their OPEN default only at insert time
+    status = state.status or TicketStatus.OPEN
+    priority = state.priority.value if state.priority else UNSET_PRIORITY
+    return status.value, priority, state.assigned_to_id or UNASSIGNED
+
+
+def _keys(cell: tuple) -> dict:
+    return dict(zip(("status", "priority", "assigned_to_id"), cell))
+
+
+async def record_rollup_change(
+    db: AsyncSession,
+    before: Optional[TicketState],
+    after: Optional[TicketState],
+) -> None:
+    """
+    Move a ticket between rollup cells. Pass `before=None` for a new ticket.
+    Runs in the caller's transaction, so the rollups commit (or roll back)
+    together with the ticket change.
+    """
+    old = _cell(before) if before is not None else None
+    new = _cell(after) if after is not None else None
+    if old == new:
+        return
+    if old is not None:
+        await upsert_increment(db, TicketRollup.__table__, _keys(old), {"tickets": -1})
+    if new is not None:
+        await upsert_increment(db, TicketRollup.__table__, _keys(new), {"tickets": 1})
+
+
+async def record_new_rollups(db: AsyncSession, states: Iterable[TicketState]) -> None:
+    """
+    Add many new tickets to the rollups with one upsert per distinct cell.
+    """
+    for cell, count in Counter(_cell(state) for state in states).items():
+        await upsert_increment(db, TicketRollup.__table__, _keys(cell), {"tickets": count})
+
+
+async def load_dashboard(db: AsyncSession) -> dict:
+    """
+    Ticket counts by status, by priority and by assignee, summed from the
+    rollup cells.
+    """
+    result = await db.execute(
+        select(TicketRollup.status, TicketRollup.priority, TicketRollup.assigned_to_id, TicketRollup.tickets)
+        .where(TicketRollup.tickets > 0)
+    )
+    by_status = {status.value: 0 for status in TicketStatus}
+    by_priority = {priority.value: 0 for priority in TicketPriority}
+    by_priority["unset"] = 0
+    assignees = {}
+    open_values = {status.value for status in OPEN_STATUSES}
+
+    for status, priority, assigned_to_id, tickets in result.all():
+        by_status[status] = by_status.get(status, 0) + tickets
+        priority = priority or "unset"
+        by_priority[priority] = by_priority.get(priority, 0) + tickets
+        counts = assignees.setdefault(assigned_to_id, {"total": 0, "open": 0})
+        counts["total"] += tickets
+        if status in open_values:
+            counts["open"] += tickets
+
+    by_assignee = [
+        {"assigned_to_id": None if csr_id == UNASSIGNED else csr_id, **counts}
+        for csr_id, counts in assignees.items()
+    ]
+    by_assignee.sort(key=lambda entry: (-entry["open"], -entry["total"], str(entry["assigned_to_id"])))
+    return {
+        "total": sum(by_status.values()),
+        "by_status": by_status,
+        "by_priority": by_priority,
+        "by_assignee": by_assignee,
+        "as_of": datetime.utcnow(),
+    }
+
+
+class DashboardSnapshot:
+    """
+    This worker's copy of the dashboard, read again once it is older than
+    `ttl` seconds. Concurrent requests for a stale snapshot share a single
+    reload, so a wallboard refresh storm costs one query per TTL.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._summary: Optional[dict] = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> bool:
+        return self._summary is not None and time.monotonic() - self._loaded_at <= self.ttl
+
+    def invalidate(self) -> None:
+        self._summary = None
+
+    async def get(self, db: AsyncSession) -> dict:
+        if self._fresh():
+            return self._summary
+        async with self._lock:
+            if not self._fresh():
+                self._summary = await load_dashboard(db)
+                self._loaded_at = time.monotonic()
+        return self._summary
+
+
+# singleton
+dashboard_snapshot = DashboardSnapshot(ttl=settings.DASHBOARD_CACHE_TTL_SECONDS)
+
+
+async def rebuild_rollups(db: AsyncSession) -> int:
+    """
+    Recompute every rollup cell from the tickets table and fix any that
+    drifted. Returns how many cells were corrected. Commits.
+
+    On PostgreSQL the rollup table is locked first, so ticket changes that
+    commit meanwhile wait and then apply their increments on top of the
+    rebuilt counts instead of being lost.
+    """
+    if db.bind.dialect.name == "postgresql":
+        await db.execute(text("LOCK TABLE ticket_rollups IN EXCLUSIVE MODE"))
+
+    result = await db.execute(
+        select(Ticket.assigned_to_id, Ticket.status, Ticket.priority, func.count())
+        .group_by(Ticket.assigned_to_id, Ticket.status, Ticket.priority)
+    )
+    actual = Counter()
+    for assigned_to_id, status, priority, count in result.all():
+        actual[_cell(TicketState(assigned_to_id, status, priority))] += count
+
+    result = await db.execute(select(TicketRollup))
+    cells = {(row.status, row.priority, row.assigned_to_id): row for row in result.scalars().all()}
+
+    fixed = 0
+    for cell in set(actual) | set(cells):
+        count = actual.get(cell, 0)
+        row = cells.get(cell)
+        if row is None:
+            db.add(TicketRollup(**_keys(cell), tickets=count))
+        elif count == 0:
+            await db.delete(row)
+            if row.tickets == 0:
+                continue
+        elif row.tickets != count:
+            row.tickets = count
+        else:
+            continue
+        fixed += 1
+
+    await db.commit()
+    dashboard_snapshot.invalidate()
+    return fixed
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ticket dashboard maintenance")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+
+    async def _rebuild() -> None:
+        async with AsyncSessionLocal() as db:
+            fixed = await rebuild_rollups(db)
+        await engine.dispose()
+        print(f"Corrected {fixed} ticket rollup cells")
+
+    asyncio.run(_rebuild())
@@ -0,0 +1,94 @@
+import json
+import zlib
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import AsyncIterator, Iterable, List, Optional
+
+from sqlalchemy.future import select
+
+from app.db.session import AsyncSessionLocal
+from app.models.chat import Chat
+from app.models.ticket import Ticket, TicketStatus
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    Convert a timezone-aware datetime to the naive UTC that created_at is
+    stored in; naive values are taken to be UTC already.
+    """
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _dumps(record: dict) -> bytes:
+    return json.dumps(record, default=_default, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+async def iter_export_chunks(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    statuses: Optional[Iterable[TicketStatus]] = None,
+    include_messages: bool = False,
+    batch_size: int = 1000,
+    session_factory=None,
+) -> AsyncIterator[bytes]:
+    """
+    Yield the matching tickets as NDJSON, one chunk per `batch_size` rows,
+    oldest first. Rows come from a server-side cursor and are never turned
+    into ORM objects, so memory stays flat however many tickets match.
+    With `include_messages`, each ticket carries its chat transcript.
+
+    Opens its own session (from AsyncSessionLocal unless `session_factory`
+    is given): the response body is streamed after the request's get_db
+    session has already been closed.
+    """
+    tickets = Ticket.__table__
+    messages = Chat.__table__
+    since, until = naive_utc(since), naive_utc(until)
+
+    query = select(tickets)
+    if since is not None:
+        query = query.where(tickets.c.created_at >= since)
+    if until is not None:
+        query = query.where(tickets.c.created_at < until)
+    if statuses:
+        query = query.where(tickets.c.status.in_(list(statuses)))
+    query = query.order_by(tickets.c.created_at, tickets.c.id)
+
+    async with (session_factory or AsyncSessionLocal)() as db:
+        result = await db.stream(query.execution_options(yield_per=batch_size))
+        async for partition in result.partitions():
+            records: List[dict] = [dict(row._mapping) for row in partition]
+
+            if include_messages and records:
+                transcripts = defaultdict(list)
+                message_rows = await db.execute(
+                    select(messages)
+                    .where(messages.c.ticket_id.in_([r["id"] for r in records]))
+                    .order_by(messages.c.ticket_id, messages.c.timestamp, messages.c.id)
+                )
+                for message in message_rows:
+                    message = dict(message._mapping)
+                    transcripts[message.pop("ticket_id")].append(message)
+                for record in records:
+                    record["messages"] = transcripts.get(record["id"], [])
+
+            yield b"".join(_dumps(record) for record in records)
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    """
+    Gzip a chunk stream incrementally, flushing after every chunk so the
+    client can decode each batch as soon as it arrives.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
@@ -0,0 +1,242 @@
+import asyncio
+import codecs
+import csv
+import json
+import uuid
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.models.ticket import Ticket, TicketPriority, TicketStatus
+from app.models.user import User
+from app.schemas.ticket import TicketImportError, TicketImportResult, TicketImportRow
+from app.services.ticket_assignment import OPEN_STATUSES, TicketState, assign_csrs, record_new_tickets
+from app.services.ticket_dashboard import record_new_rollups
+
+FORMATS = ("jsonl", "csv")
+
+# Rows per INSERT statement: at 10 columns each, well under the 32766 bind
+# parameters PostgreSQL and SQLite accept in one statement
+INSERT_ROWS = 1000
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Split a byte stream into text lines without holding more than one
+    partial line in memory.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def iter_records(lines: AsyncIterator[str], fmt: str) -> AsyncIterator[Tuple[int, object]]:
+    """
+    Yield (line_number, record) pairs, where record is a dict of fields or
+    the exception raised while parsing that line.
+    """
+    line_no = 0
+    if fmt == "jsonl":
+        async for line in lines:
+            line_no += 1
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("expected a JSON object")
+                yield line_no, record
+            except ValueError as e:
+                yield line_no, e
+        return
+
+    header: Optional[List[str]] = None
+    buffered, start = "", 0
+    async for line in lines:
+        line_no += 1
+        if not buffered:
+            start = line_no
+            if not line.strip():
+                continue
+        buffered += line if not buffered else "\n" + line
+        # A quoted field may span lines; wait until the quotes balance
+        if buffered.count('"') % 2:
+            continue
+        try:
+            values = next(csv.reader([buffered.rstrip("\r")]))
+        except csv.Error as e:
+            buffered = ""
+            yield start, e
+            continue
+        buffered = ""
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield start, ValueError(f"expected {len(header)} columns, got {len(values)}")
+            continue
+        yield start, {name: (value if value != "" else None) for name, value in zip(header, values)}
+    if buffered:
+        yield start, ValueError("unterminated quoted field")
+
+
+class TicketImporter:
+    """
+    Inserts validated rows in batches: one user lookup, one CSR assignment
+    round and one commit per batch, the rows going in as multi-row INSERTs
+    of up to INSERT_ROWS rows each.
+    """
+
+    def __init__(self, db: AsyncSession, batch_size: int, strategy: str):
+        self.db = db
+        self.batch_size = batch_size
+        self.strategy = strategy
+        self.result = TicketImportResult()
+        self._batch: List[Tuple[int, TicketImportRow]] = []
+
+    def fail(self, line: int, error: str) -> None:
+        self.result.failed += 1
+        if len(self.result.errors) < settings.TICKET_IMPORT_MAX_ERRORS:
+            self.result.errors.append(TicketImportError(line=line, error=error))
+
+    async def add(self, line: int, record: object) -> None:
+        if isinstance(record, Exception):
+            self.fail(line, str(record))
+            return
+        try:
+            row = TicketImportRow.model_validate(record)
+        except ValidationError as e:
+            self.fail(line, "; ".join(
+                f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+            ))
+            return
+        self._batch.append((line, row))
+        if len(self._batch) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        batch, self._batch = self._batch, []
+        if not batch:
+            return
+
+        referenced = {row.user_id for _, row in batch} | {
+            row.assigned_to_id for _, row in batch if row.assigned_to_id
+        }
+        result = await self.db.execute(select(User.id).where(User.id.in_(referenced)))
+        known = set(result.scalars().all())
+
+        valid = []
+        for line, row in batch:
+            if row.user_id not in known:
+                self.fail(line, f"user_id: unknown user {row.user_id}")
+            elif row.assigned_to_id and row.assigned_to_id not in known:
+                self.fail(line, f"assigned_to_id: unknown user {row.assigned_to_id}")
+            else:
+                valid.append((line, row))
+        if not valid:
+            return
+
+        now = datetime.utcnow()
+        values = []
+        for _, row in valid:
+            values.append({
+                "id": uuid.uuid4(),
+                "title": row.title,
+                "description": row.description,
+                "category": row.category,
+                "type": row.type,
+                "status": TicketStatus(row.status.value),
+                "priority": TicketPriority(row.priority.value) if row.priority else None,
+                "user_id": row.user_id,
+                "assigned_to_id": row.assigned_to_id,
+                "created_at": row.created_at or now,
+            })
+
+        # Open tickets without an assignee get CSRs for the whole batch at once
+        unassigned = [v for v in values if v["assigned_to_id"] is None and v["status"] in OPEN_STATUSES]
+        for value, csr_id in zip(unassigned, await assign_csrs(self.db, len(unassigned), self.strategy)):
+            value["assigned_to_id"] = csr_id
+
+        try:
+            # .values() with a list renders one INSERT ... VALUES (...), (...);
+            # passing the list as parameters would be an executemany
+            for start in range(0, len(values), INSERT_ROWS):
+                await self.db.execute(insert(Ticket).values(values[start:start + INSERT_ROWS]))
+            states = [TicketState(v["assigned_to_id"], v["status"], v["priority"]) for v in values]
+            await record_new_tickets(self.db, states)
+            await record_new_rollups(self.db, states)
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Ticket import batch failed: {str(e)}")
+            for line, _ in valid:
+                self.fail(line, f"batch insert failed: {e.__class__.__name__}")
+            return
+        self.result.inserted += len(values)
+
+
+async def import_tickets(
+    db: AsyncSession,
+    chunks: AsyncIterator[bytes],
+    fmt: str = "jsonl",
+    batch_size: int = settings.TICKET_IMPORT_BATCH_SIZE,
+    strategy: str = settings.TICKET_ASSIGNMENT_STRATEGY,
+) -> TicketImportResult:
+    """
+    Stream JSONL or CSV ticket records from `chunks` into the tickets table.
+    Each record needs title, description, category, type and user_id, and
+    may carry status, priority, assigned_to_id and created_at. Invalid rows
+    are reported by line number and do not stop the import.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported import format: {fmt}")
+    importer = TicketImporter(db, batch_size, strategy)
+    async for line, record in iter_records(iter_lines(chunks), fmt):
+        await importer.add(line, record)
+    await importer.flush()
+    return importer.result
+
+
+async def _read_file(path: str, chunk_size: int = 1 << 16) -> AsyncIterator[bytes]:
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from app.db.session import AsyncSessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="Bulk-import tickets from a JSONL or CSV file")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS, help="defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, default=settings.TICKET_IMPORT_BATCH_SIZE)
+    parser.add_argument("--strategy", default=settings.TICKET_ASSIGNMENT_STRATEGY)
+    args = parser.parse_args()
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "jsonl")
+
+    async def _main() -> None:
+        started = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            result = await import_tickets(db, _read_file(args.path), fmt, args.batch_size, args.strategy)
+        await engine.dispose()
+        elapsed = time.perf_counter() - started
+        print(result.model_dump_json(indent=2))
+        print(f"{result.inserted} tickets in {elapsed:.1f}s ({result.inserted / max(elapsed, 1e-9):.0f}/s)")
+
+    asyncio.run(_main())
@@ -0,0 +1,137 @@
+import re
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import column, func, literal_column, table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.sql import ColumnElement, Select
+
+from app.core.config import settings
+from app.models.ticket import Ticket, TicketStatus
+
+tickets = Ticket.__table__
+
+
+class SearchUnavailable(Exception):
+    """
+    Raised when the database in use has no full-text search backend.
+    """
+
+
+class SearchBackend(ABC):
+    """
+    Builds the search query for one database's full-text index.
+
+    `build` returns a select of the ticket columns plus a `rank` (higher is
+    better) for tickets matching `q` and `conditions`, or None when nothing
+    can match. With a `window`, only the `window` newest matches are ranked,
+    which keeps the cost of very common words bounded.
+    """
+
+    @abstractmethod
+    def build(self, q: str, conditions: List[ColumnElement], window: int) -> Optional[Select]:
+        ...
+
+
+class PostgresSearch(SearchBackend):
+    """
+    Generated `search_vector` tsvector column (title weighted above
+    description) with a GIN index. Accepts web-search syntax: quoted
+    phrases, `or`, and `-word` exclusions.
+    """
+
+    def build(self, q, conditions, window):
+        tsquery = func.websearch_to_tsquery(literal_column("'english'::regconfig"), q)
+        vector = literal_column("tickets.search_vector")
+        rank = func.ts_rank_cd(vector, tsquery).label("rank")
+        if not window:
+            return select(*tickets.c, rank).where(vector.op("@@")(tsquery), *conditions)
+        candidates = (
+            select(tickets.c.id)
+            .where(vector.op("@@")(tsquery), *conditions)
+            .order_by(tickets.c.created_at.desc())
+            .limit(window)
+            .subquery("candidates")
+        )
+        return select(*tickets.c, rank).join(candidates, candidates.c.id == tickets.c.id)
+
+
+tickets_fts = table("tickets_fts", column("rowid"))
+
+
+class SQLiteSearch(SearchBackend):
+    """
+    External-content FTS5 table `tickets_fts`, ranked by BM25 with title
+    matches weighted above description ones. Every word must match. The
+    window takes the most recently inserted matches.
+    """
+
+    TITLE_WEIGHT = 10.0
+    DESCRIPTION_WEIGHT = 1.0
+
+    def build(self, q, conditions, window):
+        words = re.findall(r"\w+", q)
+        if not words:
+            return None
+        match = " ".join(f'"{word}"' for word in words)
+        bm25 = literal_column(f"bm25(tickets_fts, {self.TITLE_WEIGHT}, {self.DESCRIPTION_WEIGHT})")
+        query = (
+            select(*tickets.c, (-bm25).label("rank"))
+            .select_from(tickets_fts.join(tickets, literal_column("tickets.rowid") == tickets_fts.c.rowid))
+            .where(text("tickets_fts MATCH :match").bindparams(match=match), *conditions)
+        )
+        if window:
+            query = query.order_by(tickets_fts.c.rowid.desc()).limit(window)
+        return query
+
+
+BACKENDS: Dict[str, SearchBackend] = {
+    "postgresql": PostgresSearch(),
+    "sqlite": SQLiteSearch(),
+}
+
+
+async def search_tickets(
+    db: AsyncSession,
+    q: str,
+    status: Optional[TicketStatus] = None,
+    category: Optional[str] = None,
+    assigned_to_id: Optional[UUID] = None,
+    unassigned: bool = False,
+    limit: int = 20,
+    offset: int = 0,
+    window: int = settings.TICKET_SEARCH_RANK_WINDOW,
+) -> List[dict]:
+    """
+    Tickets whose title or description match `q`, best match first, as
+    ticket column dicts with an extra `rank`. Raises SearchUnavailable on
+    a database without a search backend.
+    """
+    dialect = db.get_bind().dialect.name
+    backend = BACKENDS.get(dialect)
+    if backend is None:
+        raise SearchUnavailable(f"Ticket search is not available on {dialect}")
+
+    conditions = []
+    if status is not None:
+        conditions.append(tickets.c.status == status)
+    if category:
+        conditions.append(tickets.c.category == category)
+    if unassigned:
+        conditions.append(tickets.c.assigned_to_id.is_(None))
+    elif assigned_to_id is not None:
+        conditions.append(tickets.c.assigned_to_id == assigned_to_id)
+
+    matches = backend.build(q, conditions, window)
+    if matches is None:
+        return []
+    ranked = matches.subquery("ranked")
+    result = await db.execute(
+        select(ranked)
+        .order_by(ranked.c.rank.desc(), ranked.c.created_at.desc(), ranked.c.id.desc())
+        .limit(limit)
+        .offset(offset)
+    )
+    return [dict(row._mapping) for row in result]
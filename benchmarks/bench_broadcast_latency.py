@@ -0,0 +1,93 @@
+"""
+Cross-worker chat fan-out latency through the local (Unix-socket) broadcast
+backend.
+
+    python -m benchmarks.bench_broadcast_latency [--workers 4] [--messages 2000] [--rate 500]
+
+Spawns `--workers` processes that each run a LocalSocketBackend, the way
+uvicorn/gunicorn workers would. The first one publishes timestamped frames;
+every other worker records how long each frame took to reach it.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+from benchmarks.common import print_report, summarize
+
+from app.core.broadcast import LocalSocketBackend
+
+
+async def run_worker(index: int, args, path: str, ready, go, results) -> None:
+    latencies = []
+    done = asyncio.Event()
+
+    def deliver(room: str, data: str) -> None:
+        frame = json.loads(data)
+        if frame.get("stop"):
+            done.set()
+            return
+        latencies.append((time.time() - frame["sent"]) * 1000)
+
+    backend = LocalSocketBackend(path, retry_interval=0.05)
+    await backend.start(deliver)
+    while backend._writer is None:
+        await asyncio.sleep(0.01)
+    ready.put(index)
+
+    if index == 0:
+        await asyncio.to_thread(go.wait)
+        interval = 1 / args.rate if args.rate else 0
+        for i in range(args.messages):
+            await backend.publish("bench-room", json.dumps({"seq": i, "sent": time.time()}))
+            if interval:
+                await asyncio.sleep(interval)
+        await backend.publish("bench-room", json.dumps({"stop": True}))
+        # Keep the broker up until the last frame has been relayed
+        await asyncio.sleep(1)
+    else:
+        await done.wait()
+        results.put(latencies)
+    await backend.stop()
+
+
+def worker_main(index: int, args, path: str, ready, go, results) -> None:
+    asyncio.run(run_worker(index, args, path, ready, go, results))
+
+
+def main(args) -> None:
+    path = os.path.join(tempfile.mkdtemp(prefix="sts-bench-"), "broadcast.sock")
+    ctx = multiprocessing.get_context("spawn")
+    ready, results, go = ctx.Queue(), ctx.Queue(), ctx.Event()
+
+    procs = [
+        ctx.Process(target=worker_main, args=(i, args, path, ready, go, results))
+        for i in range(args.workers)
+    ]
+    for proc in procs:
+        proc.start()
+    for _ in procs:
+        ready.get(timeout=30)
+    go.set()
+
+    latencies = []
+    for _ in range(args.workers - 1):
+        latencies.extend(results.get(timeout=60 + args.messages / max(args.rate, 1)))
+    for proc in procs:
+        proc.join()
+
+    expected = args.messages * (args.workers - 1)
+    print(f"workers={args.workers} messages={args.messages} rate={args.rate}/s")
+    print(f"delivered {len(latencies)}/{expected} cross-worker frames")
+    print_report("publish -> remote deliver", summarize(latencies))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--rate", type=int, default=500, help="frames per second, 0 for as fast as possible")
+    main(parser.parse_args())
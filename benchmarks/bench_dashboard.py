@@ -0,0 +1,108 @@
+"""
+CSR dashboard latency as the tickets table grows.
+
+    python -m benchmarks.bench_dashboard [--tickets 10000 100000 1000000] [--repeat 50]
+
+For each size, times GET /csr/dashboard served from the rollup table (with
+the snapshot cache disabled, so every request reads the rollups) against
+the GROUP BY over tickets it replaces, plus cached reads.
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import func, insert
+from sqlalchemy.future import select
+
+from benchmarks.common import API, client_for, print_report, setup_app, summarize, teardown_app
+
+from app.core.hashing import password_hasher
+from app.core.security import create_access_token, get_password_hash
+from app.models.ticket import Ticket, TicketPriority, TicketStatus
+from app.models.user import User, UserRole
+from app.services.ticket_assignment import TicketState
+from app.services.ticket_dashboard import dashboard_snapshot, record_new_rollups
+
+
+async def seed(sessionmaker, csr_ids, count: int, batch_size: int = 10000) -> None:
+    rng = random.Random(11)
+    priorities = [None, *TicketPriority]
+    now = datetime.utcnow()
+    async with sessionmaker() as db:
+        for start in range(0, count, batch_size):
+            rows = [
+                {
+                    "id": uuid.uuid4(), "title": "t", "description": "d", "category": "bench", "type": "issue",
+                    "status": rng.choice(list(TicketStatus)), "priority": rng.choice(priorities),
+                    "user_id": csr_ids[0], "assigned_to_id": rng.choice([None, *csr_ids]), "created_at": now,
+                }
+                for _ in range(min(batch_size, count - start))
+            ]
+            await db.execute(insert(Ticket), rows)
+            await record_new_rollups(db, (TicketState(r["assigned_to_id"], r["status"], r["priority"]) for r in rows))
+            await db.commit()
+
+
+async def timed(repeat: int, call) -> list:
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await call()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+async def main(args) -> None:
+    password_hasher.rounds = 4
+    app, sessionmaker = await setup_app()
+
+    async with sessionmaker() as db:
+        csrs = [
+            User(email=f"dash{i}@example.com", full_name=f"Dashboard CSR {i}",
+                 hashed_password=get_password_hash("benchpassword"), role=UserRole.CSR)
+            for i in range(args.csrs)
+        ]
+        db.add_all(csrs)
+        await db.commit()
+        csr_ids = [csr.id for csr in csrs]
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(csr_ids[0])})}"}
+
+    seeded = 0
+    async with client_for(app) as client:
+        for size in sorted(args.tickets):
+            await seed(sessionmaker, csr_ids, size - seeded)
+            seeded = size
+            print(f"--- {size} tickets")
+
+            async def rollup():
+                dashboard_snapshot.invalidate()
+                resp = await client.get(f"{API}/csr/dashboard", headers=headers)
+                assert resp.status_code == 200, resp.text
+
+            async def cached():
+                resp = await client.get(f"{API}/csr/dashboard", headers=headers)
+                assert resp.status_code == 200, resp.text
+
+            async def group_by():
+                async with sessionmaker() as db:
+                    await db.execute(
+                        select(Ticket.status, Ticket.priority, Ticket.assigned_to_id, func.count())
+                        .group_by(Ticket.status, Ticket.priority, Ticket.assigned_to_id)
+                    )
+
+            print_report("dashboard (rollups)", summarize(await timed(args.repeat, rollup)))
+            print_report("dashboard (cached)", summarize(await timed(args.repeat, cached)))
+            print_report("GROUP BY tickets", summarize(await timed(max(1, args.repeat // 10), group_by)))
+
+    await teardown_app(sessionmaker)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickets", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--csrs", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
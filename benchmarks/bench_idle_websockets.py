@@ -0,0 +1,99 @@
+"""
+REST latency and DB pool usage while thousands of chat sockets sit idle.
+
+    python -m benchmarks.bench_idle_websockets [--sockets 5000] [--requests 500] [--concurrency 16]
+
+Sockets are opened by driving the ASGI app directly with websocket scopes,
+so the real chat endpoint runs without a network client. Once they are all
+connected, REST requests run against the same engine and pool the app uses
+in production (pool_size=20, max_overflow=10); with sessions pinned per
+socket they would time out waiting for a connection.
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import API, ASGIWebSocket, client_for, print_report, setup_app, summarize, teardown_app
+
+from app.core.hashing import password_hasher
+from app.core.security import create_access_token, get_password_hash
+from app.db.session import engine
+from app.models.ticket import Ticket
+from app.models.user import User
+
+
+async def seed(sessionmaker, tickets: int):
+    async with sessionmaker() as db:
+        user = User(email="idle@example.com", full_name="Idle Sockets", hashed_password=get_password_hash("benchpassword"))
+        db.add(user)
+        await db.flush()
+        rows = [
+            Ticket(title=f"Idle {i}", description="idle", category="bench", type="chat", user_id=user.id)
+            for i in range(tickets)
+        ]
+        db.add_all(rows)
+        await db.commit()
+        return user, [str(t.id) for t in rows]
+
+
+async def rest_traffic(client, headers, requests: int, concurrency: int):
+    latencies, errors = [], 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            resp = await client.get(f"{API}/user/tickets?limit=20", headers=headers)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if resp.status_code != 200:
+                errors += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors
+
+
+async def main(args) -> None:
+    password_hasher.rounds = 4
+    app, sessionmaker = await setup_app()
+    # REST requests use the app's own engine, so they share its pool with the sockets
+    app.dependency_overrides.clear()
+    user, ticket_ids = await seed(sessionmaker, args.tickets)
+    token = create_access_token({"sub": str(user.id)})
+
+    sockets = []
+    gate = asyncio.Semaphore(args.connect_concurrency)
+
+    async def connect(i: int):
+        async with gate:
+            socket = ASGIWebSocket(app, f"{API}/chat/ws/tickets/{ticket_ids[i % len(ticket_ids)]}", {"token": token})
+            if await socket.open():
+                sockets.append(socket)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(connect(i) for i in range(args.sockets)))
+    connect_seconds = time.perf_counter() - started
+
+    pool = engine.pool
+    print(f"sockets open={len(sockets)}/{args.sockets} in {connect_seconds:.1f}s")
+    print(f"pool while idle: checked_out={pool.checkedout()} size={pool.size()} overflow={pool.overflow()}")
+
+    async with client_for(app) as client:
+        latencies, errors = await rest_traffic(
+            client, {"Authorization": f"Bearer {token}"}, args.requests, args.concurrency
+        )
+    print_report("GET /user/tickets", summarize(latencies))
+    print(f"REST errors={errors}  pool after: checked_out={pool.checkedout()}")
+
+    await asyncio.gather(*(socket.close() for socket in sockets))
+    await teardown_app(sessionmaker)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sockets", type=int, default=5000)
+    parser.add_argument("--tickets", type=int, default=100)
+    parser.add_argument("--connect-concurrency", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    asyncio.run(main(parser.parse_args()))
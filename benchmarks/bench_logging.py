@@ -0,0 +1,146 @@
+"""
+Cost of logging to the code that logs: handlers writing directly (the
+previous setup) against the queue and listener thread in app.core.logging.
+
+    python -m benchmarks.bench_logging [--records 50000] [--statements 5000] [--sink-latency-us 200]
+
+Both write the same records to a file standing in for the console: once as
+is (page cache, never blocks) and once taking `--sink-latency-us` per flush,
+like a terminal or a container log pipe that is behind. Reports microseconds
+per log call on the calling thread, the time for the listener to catch up,
+and SQL statements per second with DB_ECHO-style logging of every statement.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import queue
+import tempfile
+import time
+from logging.handlers import QueueListener
+
+from benchmarks.common import BENCH_DB_PATH
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.logging import ContextQueueHandler, JsonFormatter, TextFormatter
+
+ECHO_LOGGER = "sqlalchemy.engine.Engine"
+
+
+class SlowStream:
+    """
+    A file whose flush blocks for `latency` seconds.
+    """
+
+    def __init__(self, stream, latency: float):
+        self.stream = stream
+        self.latency = latency
+
+    def write(self, data):
+        return self.stream.write(data)
+
+    def flush(self):
+        self.stream.flush()
+        if self.latency:
+            time.sleep(self.latency)
+
+    def close(self):
+        self.stream.close()
+
+
+sink_latency = 0.0
+
+
+def sink() -> logging.Handler:
+    stream = open(os.path.join(tempfile.gettempdir(), "sts-bench.log"), "w")
+    handler = logging.StreamHandler(SlowStream(stream, sink_latency))
+    return handler
+
+
+def direct(name: str):
+    handler = sink()
+    handler.setFormatter(TextFormatter("%(asctime)s - %(levelname)s - %(name)s - %(message)s"))
+    return [handler], None
+
+
+def queued(name: str):
+    handler = sink()
+    handler.setFormatter(JsonFormatter())
+    queue_handler = ContextQueueHandler(queue.Queue(maxsize=1_000_000))
+    listener = QueueListener(queue_handler.queue, handler)
+    listener.start()
+    return [queue_handler], listener
+
+
+def use(name: str, setup):
+    log = logging.getLogger(name)
+    handlers, listener = setup(name)
+    log.handlers = handlers
+    log.propagate = False
+    log.setLevel(logging.INFO)
+    return log, listener
+
+
+def finish(log, listener) -> float:
+    started = time.perf_counter()
+    if listener is not None:
+        listener.stop()
+        listener.handlers[0].close()
+    for handler in log.handlers:
+        if isinstance(handler, logging.StreamHandler):
+            handler.stream.close()
+        handler.close()
+    log.handlers = []
+    return time.perf_counter() - started
+
+
+def log_calls(setup, records: int) -> tuple:
+    log, listener = use("bench.logging", setup)
+    started = time.perf_counter()
+    for i in range(records):
+        log.info(f"Ticket {i} assigned to CSR {i % 17}")
+    caller = (time.perf_counter() - started) * 1_000_000 / records
+    return caller, finish(log, listener)
+
+
+async def echo_statements(setup, statements: int) -> float:
+    if os.path.exists(BENCH_DB_PATH):
+        os.remove(BENCH_DB_PATH)
+    # Handlers first, so echo does not add its own stdout handler
+    log, listener = use(ECHO_LOGGER, setup)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{BENCH_DB_PATH}", future=True, echo=True)
+    async with engine.connect() as conn:
+        await conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+        started = time.perf_counter()
+        for i in range(statements):
+            await conn.execute(text("SELECT name FROM items WHERE id = :id"), {"id": i})
+        elapsed = time.perf_counter() - started
+    await engine.dispose()
+    finish(log, listener)
+    return statements / elapsed
+
+
+async def main(args) -> None:
+    global sink_latency
+    for latency_us in (0, args.sink_latency_us):
+        sink_latency = latency_us / 1_000_000
+        print(f"=== sink flush latency {latency_us}us")
+        print(f"--- {args.records} log calls")
+        for name, setup in (("direct handlers", direct), ("queue + listener", queued)):
+            caller_us, drain = log_calls(setup, args.records)
+            print(f"{name:<32} caller={caller_us:.2f}us/call  listener catch-up={drain * 1000:.0f}ms")
+
+        print(f"--- {args.statements} SQL statements with echo")
+        for name, setup in (("direct handlers", direct), ("queue + listener", queued)):
+            rate = await echo_statements(setup, args.statements)
+            print(f"{name:<32} {rate:,.0f} statements/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=50000)
+    parser.add_argument("--statements", type=int, default=5000)
+    parser.add_argument("--sink-latency-us", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,89 @@
+"""
+Latency of an unrelated endpoint while a login storm is running.
+
+    python -m benchmarks.bench_login_storm [--logins 200] [--concurrency 32] [--inline]
+
+`--inline` runs bcrypt directly on the event loop (the old behaviour) so the
+two modes can be compared on the same machine.
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import API, client_for, print_report, setup_app, summarize, teardown_app
+
+from app.core.hashing import password_hasher
+from app.core.security import get_password_hash
+from app.models.user import User
+
+
+async def seed_users(sessionmaker, count: int) -> None:
+    hashed = get_password_hash("benchpassword")
+    async with sessionmaker() as db:
+        db.add_all(
+            User(email=f"storm{i}@example.com", full_name=f"Storm User {i}", hashed_password=hashed)
+            for i in range(count)
+        )
+        await db.commit()
+
+
+async def login_storm(client, logins: int, concurrency: int) -> list:
+    queue = asyncio.Queue()
+    for i in range(logins):
+        queue.put_nowait(i)
+    latencies = []
+
+    async def worker():
+        while not queue.empty():
+            i = queue.get_nowait()
+            started = time.perf_counter()
+            resp = await client.post(
+                f"{API}/auth/login",
+                json={"email": f"storm{i % 50}@example.com", "password": "benchpassword"},
+            )
+            latencies.append((time.perf_counter() - started) * 1000)
+            assert resp.status_code in (200, 503), resp.text
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+async def probe(client, stop: asyncio.Event, interval: float = 0.005) -> list:
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get("/health")
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def main(args) -> None:
+    if args.inline:
+        async def run_inline(fn, *fn_args):
+            return fn(*fn_args)
+        password_hasher._run = run_inline
+
+    app, sessionmaker = await setup_app()
+    await seed_users(sessionmaker, 50)
+
+    async with client_for(app) as client:
+        stop = asyncio.Event()
+        probe_task = asyncio.create_task(probe(client, stop))
+        login_latencies = await login_storm(client, args.logins, args.concurrency)
+        stop.set()
+        probe_latencies = await probe_task
+
+    mode = "inline" if args.inline else f"{password_hasher.kind}x{password_hasher.workers}"
+    print(f"bcrypt rounds={password_hasher.rounds} mode={mode}")
+    print_report("login", summarize(login_latencies))
+    print_report("/health during storm", summarize(probe_latencies))
+    await teardown_app(sessionmaker)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--inline", action="store_true")
+    asyncio.run(main(parser.parse_args()))
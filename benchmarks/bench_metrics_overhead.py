@@ -0,0 +1,90 @@
+"""
+Cost of MetricsMiddleware on a trivial endpoint.
+
+    python -m benchmarks.bench_metrics_overhead [--requests 20000] [--rounds 10]
+
+Calls the ASGI app directly (no HTTP client, so nothing hides the
+middleware's own cost) for `GET /ping/{n}` returning `{}`, alternating
+rounds with and without the middleware, and reports microseconds per
+request and the overhead. Also times rendering `/metrics` with many routes.
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import print_report, summarize
+
+from fastapi import FastAPI
+
+from app.core.metrics import MetricsMiddleware, MetricsRegistry, LATENCY_BUCKETS
+
+
+def make_app(with_metrics: bool) -> FastAPI:
+    app = FastAPI()
+    if with_metrics:
+        app.add_middleware(MetricsMiddleware)
+
+    @app.get("/ping/{n}")
+    async def ping(n: int):
+        return {}
+
+    return app
+
+
+async def run(app, requests: int) -> float:
+    """
+    Microseconds per request.
+    """
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for i in range(requests):
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": f"/ping/{i}", "raw_path": f"/ping/{i}".encode(), "query_string": b"",
+            "root_path": "", "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+        }
+        await app(scope, receive, send)
+    return (time.perf_counter() - started) * 1_000_000 / requests
+
+
+async def main(args) -> None:
+    plain, measured = make_app(False), make_app(True)
+    # Warm up both (routing, validators, the first histogram)
+    await run(plain, 1000)
+    await run(measured, 1000)
+
+    without, with_ = [], []
+    for _ in range(args.rounds):
+        without.append(await run(plain, args.requests))
+        with_.append(await run(measured, args.requests))
+
+    print(f"--- GET /ping/{{n}}, {args.rounds} rounds of {args.requests}, microseconds per request (reported as _ms)")
+    base, instrumented = summarize(without), summarize(with_)
+    print_report("without metrics", base)
+    print_report("with MetricsMiddleware", instrumented)
+    overhead = (instrumented["p50_ms"] - base["p50_ms"]) / base["p50_ms"] * 100
+    print(f"  overhead at p50: {overhead:+.2f}%")
+
+    registry = MetricsRegistry()
+    registry.histogram("http_request_duration_seconds", "latency", ("method", "route"), LATENCY_BUCKETS)
+    for route in range(100):
+        for _ in range(10):
+            registry.observe("http_request_duration_seconds", 0.01, "GET", f"/route/{route}")
+    renders = []
+    for _ in range(200):
+        started = time.perf_counter()
+        registry.render()
+        renders.append((time.perf_counter() - started) * 1000)
+    print_report("render, 100 routes", summarize(renders))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
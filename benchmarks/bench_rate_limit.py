@@ -0,0 +1,64 @@
+"""
+Cost of a rate limit check.
+
+    python -m benchmarks.bench_rate_limit [--checks 200000] [--workers 4]
+
+Times `SharedTokenBuckets.take` in one process over a spread of keys, then
+the same from `--workers` forked processes at once sharing one table (the
+gunicorn --preload case), which adds contention on the group locks.
+"""
+import argparse
+import multiprocessing
+import time
+
+from benchmarks.common import print_report, summarize
+
+from app.core.rate_limiting import SharedTokenBuckets
+
+
+def run(table: SharedTokenBuckets, checks: int, keys: int, batches: int = 10) -> list:
+    """
+    Microseconds per check, per batch.
+    """
+    per_check = []
+    per_batch = checks // batches
+    for batch in range(batches):
+        started = time.perf_counter()
+        for i in range(per_batch):
+            table.take(f"ip:{(batch * per_batch + i) % keys}", 10.0, 20.0)
+        per_check.append((time.perf_counter() - started) * 1_000_000 / per_batch)
+    return per_check
+
+
+def worker(table, checks, keys, results):
+    results.extend(run(table, checks, keys))
+
+
+def main(args) -> None:
+    table = SharedTokenBuckets(slots=65536)
+    print(f"--- {args.checks} checks over {args.keys} keys, microseconds per check (reported as _ms)")
+    print_report("1 process", summarize(run(table, args.checks, args.keys)))
+
+    context = multiprocessing.get_context("fork")
+    with context.Manager() as manager:
+        results = manager.list()
+        workers = [
+            context.Process(target=worker, args=(table, args.checks, args.keys, results))
+            for _ in range(args.workers)
+        ]
+        started = time.perf_counter()
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join()
+        elapsed = time.perf_counter() - started
+        print_report(f"{args.workers} processes, shared", summarize(list(results)))
+    print(f"  {args.workers * args.checks / elapsed:,.0f} checks/s in total")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--checks", type=int, default=200000)
+    parser.add_argument("--keys", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=4)
+    main(parser.parse_args())
@@ -0,0 +1,97 @@
+"""
+Serialization cost of ticket lists and chat frames.
+
+    python -m benchmarks.bench_serialization [--tickets 1000] [--repeat 200]
+
+Times turning a page of ORM tickets into a response body the way FastAPI
+does for `response_model=TicketPage` (validate, dump to JSON-safe Python,
+json.dumps) against `typed_response` over `loaded_values` (one cached
+TypeAdapter pass from the instance dicts straight to JSON bytes), and a chat frame as previously built (`WSChat(...).dict()`
+plus `json.dumps(default=str)`) against `encode_frame`. A broadcast
+encodes its frame once whatever the number of recipients, so the per-frame
+cost is the per-broadcast cost.
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime
+
+from benchmarks.common import print_report, summarize
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.core.serialization import encode_frame, loaded_values, typed_response
+from app.models.ticket import Ticket, TicketStatus
+from app.schemas.chat import WSChat
+from app.schemas.ticket import TicketPage
+
+
+def make_tickets(count: int):
+    now = datetime.utcnow()
+    return [
+        Ticket(
+            id=uuid.uuid4(), title=f"Ticket {i}", description="Printer on fire, please advise " * 4,
+            category="tech", type="issue", status=TicketStatus.OPEN, priority=None,
+            user_id=uuid.uuid4(), assigned_to_id=uuid.uuid4(), created_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+def make_record():
+    return {
+        "id": uuid.uuid4(), "ticket_id": uuid.uuid4(), "sender_id": uuid.uuid4(),
+        "content": "Have you tried turning it off and on again?", "timestamp": datetime.utcnow(),
+    }
+
+
+async def timed(repeat: int, call) -> list:
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await call()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+async def main(args) -> None:
+    page = {"items": make_tickets(args.tickets), "next_cursor": "x", "prev_cursor": None}
+    field = create_model_field(name="Response_page", type_=TicketPage, mode="serialization")
+
+    async def fastapi_path():
+        content = await serialize_response(field=field, response_content=page)
+        return JSONResponse(content).body
+
+    async def typed_path():
+        return typed_response(TicketPage, {**page, "items": loaded_values(page["items"])}).body
+
+    assert json.loads(await fastapi_path()) == json.loads(await typed_path())
+    print(f"--- page of {args.tickets} tickets")
+    print_report("response_model + JSONResponse", summarize(await timed(args.repeat, fastapi_path)))
+    print_report("typed_response", summarize(await timed(args.repeat, typed_path)))
+
+    records = [make_record() for _ in range(args.frames)]
+
+    async def old_frames():
+        for record in records:
+            json.dumps(WSChat(**record).dict(), default=str)
+
+    async def new_frames():
+        for record in records:
+            encode_frame(dict(record))
+
+    print(f"--- {args.frames} chat frames (ms per batch)")
+    print_report("WSChat.dict + json.dumps", summarize(await timed(args.repeat, old_frames)))
+    print_report("encode_frame", summarize(await timed(args.repeat, new_frames)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickets", type=int, default=1000)
+    parser.add_argument("--frames", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
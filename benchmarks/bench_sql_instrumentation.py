@@ -0,0 +1,70 @@
+"""
+Per-statement cost of SQL instrumentation.
+
+    python -m benchmarks.bench_sql_instrumentation [--statements 5000]
+
+Runs the same primary-key lookup on a fresh SQLite engine with no
+listeners, with the timing listeners from `app.db.instrumentation` (inside
+`track_queries`, as under QueryStatsMiddleware), and with SQLAlchemy echo
+(logging every statement), and reports the time per statement.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+from benchmarks.common import BENCH_DB_PATH, print_report, summarize
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.instrumentation import instrument, track_queries
+
+
+async def run(engine, statements: int, batches: int = 10) -> list:
+    async with engine.connect() as conn:
+        await conn.execute(text("CREATE TABLE IF NOT EXISTS items (id INTEGER PRIMARY KEY, name TEXT)"))
+        await conn.execute(text("INSERT OR IGNORE INTO items VALUES (1, 'one')"))
+        per_statement = []
+        per_batch = statements // batches
+        # First batch warms the statement cache and is not reported
+        for batch in range(batches + 1):
+            started = time.perf_counter()
+            for _ in range(per_batch):
+                await conn.execute(text("SELECT name FROM items WHERE id = :id"), {"id": 1})
+            if batch:
+                per_statement.append((time.perf_counter() - started) * 1_000_000 / per_batch)
+    await engine.dispose()
+    return per_statement
+
+
+def fresh_engine(**kwargs):
+    if os.path.exists(BENCH_DB_PATH):
+        os.remove(BENCH_DB_PATH)
+    return create_async_engine(f"sqlite+aiosqlite:///{BENCH_DB_PATH}", future=True, **kwargs)
+
+
+async def main(args) -> None:
+    print(f"--- {args.statements} statements, microseconds per statement (reported as _ms)")
+    print_report("no instrumentation", summarize(await run(fresh_engine(), args.statements)))
+
+    engine = fresh_engine()
+    instrument(engine)
+    with track_queries() as stats:
+        samples = await run(engine, args.statements)
+    print_report("timing listeners", summarize(samples))
+    print(f"  counted {stats.count} statements, {stats.seconds * 1000:.0f} ms")
+
+    engine = fresh_engine(echo=True)
+    # Keep the echo logging but send it nowhere: measure logging, not the terminal
+    echo_logger = logging.getLogger("sqlalchemy.engine.Engine")
+    echo_logger.handlers = [logging.NullHandler()]
+    echo_logger.propagate = False
+    print_report("echo=True", summarize(await run(engine, args.statements)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--statements", type=int, default=5000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,123 @@
+"""
+Worker cold start: a fresh interpreter importing the app and running its
+startup handlers.
+
+    python -m benchmarks.bench_startup [--runs 10]
+
+Each run spawns a new process and times it from spawn until the app has
+started, which is what a rolling restart waits for per worker. Runs are
+repeated with the old behaviour of checking migrations while booting, to
+show what moving them to `python -m app.db.migrate` saves, and with
+workers forked from a master that already imported the app (gunicorn
+--preload, as in the Dockerfile), which leaves only the startup handlers.
+Per-phase timings reported by the app are averaged as well.
+
+The goal of under 500 ms holds for workers forked from a preloaded master
+only. A spawned worker spends most of its start importing FastAPI,
+SQLAlchemy and pydantic (roughly 0.5 s on its own); the app's optional
+subsystems add a few milliseconds, so deferring them would not bring a
+spawned worker under the goal.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from benchmarks.common import BENCH_DB_PATH, print_report, summarize
+
+CHILD = """
+import asyncio, json, time
+started = time.perf_counter()
+if {migrate}:
+    from app.db.migrate import upgrade
+    upgrade()
+import app.main as main
+
+async def boot():
+    await main.app.router.startup()
+    print(json.dumps({{"ready_ms": (time.perf_counter() - started) * 1000, "phases": main.startup_timings}}), flush=True)
+    await main.app.router.shutdown()
+    await main.engine.dispose()
+
+asyncio.run(boot())
+"""
+
+# Imports the app once, then forks one worker per run like gunicorn --preload
+PRELOADED = """
+import asyncio, json, os, time
+import app.main as main
+
+async def boot(started):
+    await main.app.router.startup()
+    print(json.dumps({{"ready_ms": (time.perf_counter() - started) * 1000, "phases": main.startup_timings}}), flush=True)
+    await main.app.router.shutdown()
+    await main.engine.dispose()
+
+for _ in range({runs}):
+    started = time.perf_counter()
+    pid = os.fork()
+    if pid == 0:
+        main.startup_timings.pop("import", None)
+        asyncio.run(boot(started))
+        os._exit(0)
+    os.waitpid(pid, 0)
+"""
+
+
+def run_worker(migrate: bool) -> dict:
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-c", CHILD.format(migrate=migrate)],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, env=os.environ.copy(),
+    )
+    for line in proc.stdout:
+        if line.startswith("{"):
+            report = json.loads(line)
+            report["wall_ms"] = (time.perf_counter() - started) * 1000
+            break
+    else:
+        raise RuntimeError("worker did not start")
+    proc.wait()
+    return report
+
+
+def run_preloaded(runs: int) -> list:
+    output = subprocess.run(
+        [sys.executable, "-c", PRELOADED.format(runs=runs)],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, env=os.environ.copy(), check=True,
+    ).stdout
+    return [json.loads(line) for line in output.splitlines() if line.startswith("{")]
+
+
+def report(name: str, reports: list) -> None:
+    print(f"--- {name}")
+    if "wall_ms" in reports[0]:
+        print_report("spawn to started", summarize([r["wall_ms"] for r in reports]))
+    print_report("in-process to started", summarize([r["ready_ms"] for r in reports]))
+    phases = defaultdict(list)
+    for entry in reports:
+        for phase, ms in entry["phases"].items():
+            phases[phase].append(ms)
+    print("    " + ", ".join(f"{phase}={sum(ms) / len(ms):.1f}ms" for phase, ms in phases.items()))
+
+
+def main(args) -> None:
+    from app.db.migrate import upgrade
+
+    if os.path.exists(BENCH_DB_PATH):
+        os.remove(BENCH_DB_PATH)
+    print(f"fresh database migrated in {upgrade() * 1000:.0f}ms")
+
+    for name, migrate in (("migrate in worker (before)", True), ("no migration (after)", False)):
+        run_worker(migrate)  # warm the OS page cache and .pyc files
+        report(name, [run_worker(migrate) for _ in range(args.runs)])
+    report("forked from preloaded master", run_preloaded(args.runs))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    main(parser.parse_args())
@@ -0,0 +1,109 @@
+"""
+Ticket search latency on a large table.
+
+    python -m benchmarks.bench_ticket_search [--tickets 1000000] [--repeat 50]
+
+Seeds `--tickets` tickets whose words follow a Zipf distribution, then
+times GET /csr/tickets/search for rare, mid-frequency and common words,
+multi-word queries and filtered queries. Pass a PostgreSQL URL with
+--db-url to measure the tsvector/GIN backend instead of SQLite FTS5.
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+from sqlalchemy import insert
+
+from benchmarks.common import API, client_for, print_report, setup_app, summarize, teardown_app
+
+from app.core.hashing import password_hasher
+from app.core.security import create_access_token, get_password_hash
+from app.models.ticket import Ticket, TicketStatus
+from app.models.user import User, UserRole
+
+SYLLABLES = ["ka", "lo", "mi", "ten", "ra", "su", "vek", "po", "dan", "el", "qui", "mor", "tis", "fa", "zu", "ben"]
+
+
+def vocabulary(size: int, rng: random.Random):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words, key=lambda _: rng.random())
+
+
+async def seed(sessionmaker, count: int, words, batch_size: int = 10000):
+    rng = random.Random(7)
+    cum_weights = list(accumulate(1 / rank for rank in range(1, len(words) + 1)))
+    statuses = list(TicketStatus)
+    now = datetime.utcnow()
+
+    async with sessionmaker() as db:
+        csr = User(email="search@example.com", full_name="Search CSR",
+                   hashed_password=get_password_hash("benchpassword"), role=UserRole.CSR)
+        db.add(csr)
+        await db.commit()
+
+        for start in range(0, count, batch_size):
+            rows = []
+            for i in range(start, min(count, start + batch_size)):
+                rows.append({
+                    "id": uuid.uuid4(),
+                    "title": " ".join(rng.choices(words, cum_weights=cum_weights, k=rng.randint(3, 6))),
+                    "description": " ".join(rng.choices(words, cum_weights=cum_weights, k=rng.randint(15, 30))),
+                    "category": rng.choice(["billing", "tech", "account", "general"]),
+                    "type": "issue",
+                    "status": rng.choice(statuses),
+                    "user_id": csr.id,
+                    "assigned_to_id": csr.id if i % 3 else None,
+                    "created_at": now - timedelta(seconds=i),
+                })
+            await db.execute(insert(Ticket), rows)
+            await db.commit()
+        return csr
+
+
+async def main(args) -> None:
+    password_hasher.rounds = 4
+    app, sessionmaker = await setup_app(args.db_url)
+    words = vocabulary(args.vocabulary, random.Random(3))
+
+    started = time.perf_counter()
+    csr = await seed(sessionmaker, args.tickets, words)
+    print(f"seeded {args.tickets} tickets in {time.perf_counter() - started:.0f}s")
+
+    # Word frequency falls off with rank: words[0] is in most tickets
+    queries = {
+        "rare word": lambda: random.choice(words[len(words) // 4:]),
+        "mid word": lambda: random.choice(words[100:400]),
+        "common word": lambda: random.choice(words[:10]),
+        "two words": lambda: f"{random.choice(words[10:200])} {random.choice(words[10:200])}",
+        "mid word + status": lambda: f"{random.choice(words[100:400])}&status=open",
+        "common word + category": lambda: f"{random.choice(words[:10])}&category=billing",
+    }
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(csr.id)})}"}
+
+    async with client_for(app) as client:
+        for name, make_query in queries.items():
+            latencies = []
+            for _ in range(args.repeat):
+                url = f"{API}/csr/tickets/search?limit=20&q={make_query()}"
+                started = time.perf_counter()
+                resp = await client.get(url, headers=headers)
+                latencies.append((time.perf_counter() - started) * 1000)
+                assert resp.status_code == 200, resp.text
+            print_report(name, summarize(latencies))
+
+    await teardown_app(sessionmaker)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickets", type=int, default=1_000_000)
+    parser.add_argument("--vocabulary", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--db-url", default=None)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,152 @@
+"""
+Shared setup for the benchmark scripts in this directory.
+
+Benchmarks drive the real ASGI app in-process (httpx.ASGITransport) against
+a throwaway SQLite database, the same way tests/conftest.py overrides get_db.
+Run them from the repository root, e.g. `python -m benchmarks.bench_login_storm`.
+"""
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlencode
+
+BENCH_DB_PATH = os.path.join(tempfile.gettempdir(), "sts-bench.sqlite3")
+
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{BENCH_DB_PATH}")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "15")
+os.environ.setdefault("REFRESH_TOKEN_EXPIRE_DAYS", "7")
+os.environ.setdefault("API_BASE_URL", "http://bench")
+os.environ.setdefault("FRONTEND_BASE_URL", "http://bench")
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.session import Base, get_db
+
+API = "/api/v1"
+
+
+def percentile(sorted_samples: List[float], pct: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(round(pct / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+def summarize(samples_ms: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples_ms)
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) if ordered else 0.0,
+        "p50_ms": percentile(ordered, 50),
+        "p95_ms": percentile(ordered, 95),
+        "p99_ms": percentile(ordered, 99),
+        "max_ms": ordered[-1] if ordered else 0.0,
+    }
+
+
+def print_report(name: str, summary: Dict[str, float]) -> None:
+    fields = "  ".join(
+        f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}"
+        for key, value in summary.items()
+    )
+    print(f"{name:<32} {fields}")
+
+
+async def setup_app(db_url: str = None):
+    """
+    Create a fresh schema and return (app, sessionmaker) with get_db bound
+    to it.
+    """
+    if db_url is None:
+        if os.path.exists(BENCH_DB_PATH):
+            os.remove(BENCH_DB_PATH)
+        db_url = f"sqlite+aiosqlite:///{BENCH_DB_PATH}"
+
+    # Imported first so every model is registered before create_all
+    from app.main import app
+
+    engine = create_async_engine(db_url, future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessionmaker = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_db():
+        async with sessionmaker() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    return app, sessionmaker
+
+
+async def teardown_app(sessionmaker) -> None:
+    """
+    Dispose of the benchmark engine and the app's own, so the process can
+    exit (aiosqlite keeps a thread per open connection).
+    """
+    from app.db.session import engine
+
+    await sessionmaker.kw["bind"].dispose()
+    await engine.dispose()
+
+
+def client_for(app) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+
+class ASGIWebSocket:
+    """
+    One WebSocket driven straight through the ASGI interface, so the real
+    endpoint runs without a network client. Text frames the app sends are
+    queued in `frames` as (time.perf_counter() on arrival, text).
+    """
+
+    def __init__(self, app, path: str, query: dict):
+        self.app = app
+        self.scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": "ws",
+            "server": ("bench", 80),
+            "client": ("127.0.0.1", 50000),
+            "root_path": "",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": urlencode(query).encode(),
+            "headers": [],
+            "subprotocols": [],
+        }
+        self.incoming: asyncio.Queue = asyncio.Queue()
+        self.frames: asyncio.Queue = asyncio.Queue()
+        self.accepted = asyncio.Event()
+        self.closed = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    async def send(self, message: dict) -> None:
+        if message["type"] == "websocket.accept":
+            self.accepted.set()
+        elif message["type"] == "websocket.send":
+            self.frames.put_nowait((time.perf_counter(), message.get("text")))
+        elif message["type"] == "websocket.close":
+            self.closed.set()
+
+    async def open(self) -> bool:
+        self.incoming.put_nowait({"type": "websocket.connect"})
+        self.task = asyncio.create_task(self.app(self.scope, self.incoming.get, self.send))
+        waiters = [asyncio.create_task(self.accepted.wait()), asyncio.create_task(self.closed.wait())]
+        await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+        for waiter in waiters:
+            waiter.cancel()
+        return self.accepted.is_set()
+
+    def send_text(self, text: str) -> None:
+        self.incoming.put_nowait({"type": "websocket.receive", "text": text})
+
+    async def close(self) -> None:
+        self.incoming.put_nowait({"type": "websocket.disconnect", "code": 1000})
+        await self.task
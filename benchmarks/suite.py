@@ -0,0 +1,490 @@
+"""
+End-to-end benchmark suite for the API and chat, with JSON baselines.
+
+    python -m benchmarks.suite run [--scale full|smoke] [--scenarios login,search] [--output results.json]
+    python -m benchmarks.suite run --scale smoke --baseline baseline.json
+    python -m benchmarks.suite compare baseline.json results.json [--threshold 10]
+
+`run` seeds users, CSRs, tickets and chat messages (the `full` scale is
+100k users, 500 CSRs, 1M tickets and 10M messages; `smoke` is small enough
+for a quick check), starts the app as a worker would and drives it
+in-process: REST scenarios through httpx, chat fan-out through WebSockets
+on the real endpoint. Each scenario runs a fixed number of requests from
+concurrent clients and reports throughput and p50/p95/p99.
+
+The seeded database is kept and reused by later runs at the same scale
+(`--reseed` to start over); scenarios that write add a few rows to it.
+Set DATABASE_URL to run against PostgreSQL instead of SQLite.
+
+`compare` (or `run --baseline`) reports each scenario's change against a
+baseline and exits with status 1 if p50, p95 or throughput got worse by
+more than `--threshold` percent. Baselines are specific to the machine
+that recorded them; compare runs from the same box.
+"""
+import os
+import tempfile
+
+SUITE_DB_PATH = os.path.join(tempfile.gettempdir(), "sts-bench-suite.sqlite3")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{SUITE_DB_PATH}")
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import insert, text
+
+from benchmarks.bench_ticket_search import vocabulary
+from benchmarks.common import API, ASGIWebSocket, client_for, summarize
+
+from app.core.config import settings
+from app.core.hashing import password_hasher
+from app.core.security import create_access_token, get_password_hash
+from app.db.session import AsyncSessionLocal, Base, engine
+from app.models.chat import Chat
+from app.models.ticket import Ticket, TicketPriority, TicketStatus
+from app.models.user import User, UserRole
+from app.services.ticket_assignment import reconcile_workloads
+from app.services.ticket_dashboard import rebuild_rollups
+
+SCALES = {
+    "smoke": {"users": 1_000, "csrs": 20, "tickets": 20_000, "messages": 100_000, "requests": 0.2},
+    "full": {"users": 100_000, "csrs": 500, "tickets": 1_000_000, "messages": 10_000_000, "requests": 1.0},
+}
+PASSWORD = "benchpassword"
+
+# Seeded rows get ids derived from their index, so scenarios can pick any
+# of them without loading ids back from the database
+USER_IDS, CSR_IDS, TICKET_IDS, MESSAGE_IDS = 1, 2, 3, 4
+# Leading hex letters: SQLite gives the UUID columns numeric affinity and
+# would store an all-digit id as a (lossy) number
+_SEEDED = 0xBE0C << 112
+
+
+def seeded_id(kind: int, index: int) -> uuid.UUID:
+    return uuid.UUID(int=_SEEDED | (kind << 96) | index)
+
+
+class Dataset:
+    """
+    The seeded population: ticket i belongs to user i % users and, unless
+    i % 10 == 0, is assigned to CSR i % csrs.
+    """
+
+    def __init__(self, users: int, csrs: int, tickets: int, messages: int, **_):
+        self.users, self.csrs, self.tickets, self.messages = users, csrs, tickets, messages
+        self.words = vocabulary(5000, random.Random(3))
+        self._tokens: Dict[uuid.UUID, str] = {}
+
+    def spec(self) -> dict:
+        return {"users": self.users, "csrs": self.csrs, "tickets": self.tickets, "messages": self.messages}
+
+    def owner(self, ticket: int) -> uuid.UUID:
+        return seeded_id(USER_IDS, ticket % self.users)
+
+    def assignee(self, ticket: int) -> Optional[uuid.UUID]:
+        return seeded_id(CSR_IDS, ticket % self.csrs) if ticket % 10 else None
+
+    def hot_ticket(self, rng: random.Random) -> int:
+        # Skewed towards the newest (lowest-numbered) tickets, like real chat traffic
+        return int(self.tickets * rng.random() ** 3)
+
+    def headers(self, user_id: uuid.UUID) -> dict:
+        return {"Authorization": f"Bearer {self.token(user_id)}"}
+
+    def token(self, user_id: uuid.UUID) -> str:
+        token = self._tokens.get(user_id)
+        if token is None:
+            token = self._tokens[user_id] = create_access_token({"sub": str(user_id)})
+        return token
+
+
+async def seed(data: Dataset, batch_size: int = 20000) -> None:
+    rng = random.Random(11)
+    now = datetime.utcnow()
+    hashed = get_password_hash(PASSWORD)
+    statuses = list(TicketStatus)
+    priorities = [None, *TicketPriority]
+
+    async def insert_batches(table, count: int, make_row) -> None:
+        for start in range(0, count, batch_size):
+            async with AsyncSessionLocal() as db:
+                await db.execute(insert(table), [make_row(i) for i in range(start, min(count, start + batch_size))])
+                await db.commit()
+
+    started = time.perf_counter()
+    await insert_batches(User.__table__, data.users, lambda i: {
+        "id": seeded_id(USER_IDS, i), "email": f"user{i}@bench.example", "full_name": f"User {i}",
+        "hashed_password": hashed, "role": UserRole.USER, "is_active": True, "created_at": now,
+    })
+    await insert_batches(User.__table__, data.csrs, lambda i: {
+        "id": seeded_id(CSR_IDS, i), "email": f"csr{i}@bench.example", "full_name": f"CSR {i}",
+        "hashed_password": hashed, "role": UserRole.CSR, "is_active": True, "created_at": now,
+    })
+    await insert_batches(Ticket.__table__, data.tickets, lambda i: {
+        "id": seeded_id(TICKET_IDS, i),
+        "title": " ".join(rng.choices(data.words[:2000], k=rng.randint(3, 6))),
+        "description": " ".join(rng.choices(data.words, k=rng.randint(15, 30))),
+        "category": ("billing", "tech", "account", "general")[i % 4],
+        "type": "issue",
+        "status": statuses[i % len(statuses)],
+        "priority": priorities[i % len(priorities)],
+        "user_id": data.owner(i),
+        "assigned_to_id": data.assignee(i),
+        "created_at": now - timedelta(seconds=i),
+    })
+    print(f"seeded {data.users} users, {data.csrs} CSRs, {data.tickets} tickets in {time.perf_counter() - started:.0f}s")
+
+    started = time.perf_counter()
+
+    def message(i: int) -> dict:
+        ticket = data.hot_ticket(rng)
+        sender = data.assignee(ticket) if i % 2 and data.assignee(ticket) else data.owner(ticket)
+        return {
+            "id": seeded_id(MESSAGE_IDS, i), "ticket_id": seeded_id(TICKET_IDS, ticket), "sender_id": sender,
+            "content": " ".join(rng.choices(data.words[:500], k=rng.randint(3, 12))),
+            "timestamp": now - timedelta(seconds=data.messages - i),
+        }
+
+    await insert_batches(Chat.__table__, data.messages, message)
+    print(f"seeded {data.messages} messages in {time.perf_counter() - started:.0f}s")
+
+    async with AsyncSessionLocal() as db:
+        await rebuild_rollups(db)
+    async with AsyncSessionLocal() as db:
+        await reconcile_workloads(db)
+
+
+async def prepare_database(data: Dataset, reseed: bool) -> None:
+    """
+    Reuse the seeded database if it holds `data`, otherwise seed it afresh.
+    """
+    spec = json.dumps(data.spec(), sort_keys=True)
+    if not reseed:
+        try:
+            async with engine.connect() as conn:
+                seeded = (await conn.execute(text("SELECT spec FROM bench_seed"))).scalar()
+            if seeded == spec:
+                print(f"reusing seeded database {engine.url.render_as_string(hide_password=True)}")
+                return
+        except Exception:
+            pass
+
+    if engine.dialect.name == "sqlite":
+        await engine.dispose()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(SUITE_DB_PATH + suffix):
+                os.remove(SUITE_DB_PATH + suffix)
+    else:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await seed(data)
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE IF NOT EXISTS bench_seed (spec TEXT)"))
+        await conn.execute(text("DELETE FROM bench_seed"))
+        await conn.execute(text("INSERT INTO bench_seed (spec) VALUES (:spec)"), {"spec": spec})
+
+
+Call = Callable[[int], Awaitable[bool]]
+
+
+async def measure(call: Call, requests: int, concurrency: int, warmup: int) -> dict:
+    """
+    Run `call(i)` for i in range(requests) from `concurrency` clients and
+    summarize. `call` returns whether the request succeeded.
+    """
+    for i in range(warmup):
+        await call(i)
+
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def client():
+        nonlocal errors
+        for i in remaining:
+            started = time.perf_counter()
+            ok = await call(i)
+            latencies.append((time.perf_counter() - started) * 1000)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    seconds = time.perf_counter() - started
+    return {**summarize(latencies), "errors": errors, "seconds": round(seconds, 3), "throughput_per_s": len(latencies) / seconds}
+
+
+def rest_scenarios(client, data: Dataset) -> Dict[str, tuple]:
+    """
+    name -> (call, default requests, concurrency)
+    """
+    rng = random.Random(5)
+
+    def user(i: int) -> uuid.UUID:
+        return seeded_id(USER_IDS, rng.randrange(data.users))
+
+    def csr(i: int) -> uuid.UUID:
+        return seeded_id(CSR_IDS, i % data.csrs)
+
+    async def ok(method: str, url: str, expect: int = 200, **kwargs) -> bool:
+        resp = await client.request(method, url, **kwargs)
+        return resp.status_code == expect
+
+    async def login(i):
+        email = f"user{rng.randrange(data.users)}@bench.example"
+        return await ok("POST", f"{API}/auth/login", json={"email": email, "password": PASSWORD})
+
+    async def create_ticket(i):
+        body = {"title": f"Bench ticket {i}", "description": "Created by the benchmark suite",
+                "category": "general", "type": "issue"}
+        return await ok("POST", f"{API}/user/tickets", json=body, headers=data.headers(user(i)))
+
+    async def list_user_tickets(i):
+        return await ok("GET", f"{API}/user/tickets?limit=20", headers=data.headers(user(i)))
+
+    async def list_csr_tickets(i):
+        return await ok("GET", f"{API}/csr/tickets?limit=50&status=open", headers=data.headers(csr(i)))
+
+    async def ticket_detail(i):
+        ticket = rng.randrange(data.tickets)
+        return await ok("GET", f"{API}/user/tickets/{seeded_id(TICKET_IDS, ticket)}", headers=data.headers(data.owner(ticket)))
+
+    async def search(i):
+        q = " ".join(rng.sample(data.words[50:2000], rng.randint(1, 2)))
+        return await ok("GET", f"{API}/csr/tickets/search?limit=20&q={q}", headers=data.headers(csr(i)))
+
+    async def dashboard(i):
+        return await ok("GET", f"{API}/csr/dashboard", headers=data.headers(csr(i)))
+
+    async def chat_history(i):
+        ticket = data.hot_ticket(rng)
+        return await ok(
+            "GET", f"{API}/chat/tickets/{seeded_id(TICKET_IDS, ticket)}/messages?limit=50",
+            headers=data.headers(data.owner(ticket)),
+        )
+
+    return {
+        "login": (login, 100, 8),
+        "create_ticket": (create_ticket, 1000, 16),
+        "list_user_tickets": (list_user_tickets, 2000, 16),
+        "list_csr_tickets": (list_csr_tickets, 2000, 16),
+        "ticket_detail": (ticket_detail, 2000, 16),
+        "search": (search, 500, 8),
+        "dashboard": (dashboard, 2000, 16),
+        "chat_history": (chat_history, 2000, 16),
+    }
+
+
+async def chat_fanout(app, data: Dataset, rooms: int, sockets_per_user: int, messages: int) -> dict:
+    """
+    Open `sockets_per_user` sockets for the owner and the assigned CSR of
+    `rooms` tickets, then have each room's owner send `messages` messages,
+    one after another, each once every socket in the room has the previous
+    one. Latency is per delivered frame, from send to arrival.
+    """
+    rng = random.Random(9)
+    tickets = []
+    while len(tickets) < rooms:
+        ticket = data.hot_ticket(rng)
+        if data.assignee(ticket) and ticket not in tickets:
+            tickets.append(ticket)
+
+    room_sockets = []
+    for ticket in tickets:
+        path = f"{API}/chat/ws/tickets/{seeded_id(TICKET_IDS, ticket)}"
+        members = [data.owner(ticket), data.assignee(ticket)]
+        sockets = [ASGIWebSocket(app, path, {"token": data.token(member)}) for member in members for _ in range(sockets_per_user)]
+        opened = await asyncio.gather(*(socket.open() for socket in sockets))
+        if not all(opened):
+            raise RuntimeError(f"Chat socket refused for ticket {ticket}")
+        room_sockets.append((seeded_id(TICKET_IDS, ticket), sockets))
+
+    latencies: List[float] = []
+    errors = 0
+
+    async def converse(ticket_id, sockets):
+        nonlocal errors
+        for n in range(messages):
+            content = f"fanout {n}"
+            sent = time.perf_counter()
+            sockets[0].send_text(json.dumps({"ticket_id": str(ticket_id), "content": content}))
+            for socket in sockets:
+                while True:
+                    try:
+                        arrived, frame = await asyncio.wait_for(socket.frames.get(), timeout=10)
+                    except asyncio.TimeoutError:
+                        errors += 1
+                        break
+                    if json.loads(frame).get("content") == content:
+                        latencies.append((arrived - sent) * 1000)
+                        break
+
+    started = time.perf_counter()
+    await asyncio.gather(*(converse(ticket_id, sockets) for ticket_id, sockets in room_sockets))
+    seconds = time.perf_counter() - started
+    await asyncio.gather(*(socket.close() for _, sockets in room_sockets for socket in sockets))
+    return {**summarize(latencies), "errors": errors, "seconds": round(seconds, 3), "throughput_per_s": len(latencies) / seconds}
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def print_result(name: str, result: dict) -> None:
+    print(
+        f"{name:<20} {result['throughput_per_s']:>9.1f}/s  p50={result['p50_ms']:.2f}  p95={result['p95_ms']:.2f}  "
+        f"p99={result['p99_ms']:.2f}  errors={result['errors']}"
+    )
+
+
+async def run_scenarios(app, data: Dataset, factor: float, selected: Optional[set]) -> dict:
+    results = {}
+    async with client_for(app) as client:
+        for name, (call, requests, concurrency) in rest_scenarios(client, data).items():
+            if selected is not None and name not in selected:
+                continue
+            count = max(1, int(requests * factor))
+            results[name] = await measure(call, count, concurrency, warmup=min(20, count))
+            print_result(name, results[name])
+    if selected is None or "chat_fanout" in selected:
+        messages = max(1, int(50 * factor))
+        results["chat_fanout"] = await chat_fanout(app, data, rooms=50, sockets_per_user=2, messages=messages)
+        print_result("chat_fanout", results["chat_fanout"])
+    return results
+
+
+async def run(args) -> dict:
+    scale = SCALES[args.scale]
+    data = Dataset(**scale)
+    if args.bcrypt_rounds:
+        password_hasher.rounds = args.bcrypt_rounds
+    # One client hammering login would only measure the rate limiter
+    settings.RATE_LIMIT_ENABLED = False
+
+    from app.main import app
+
+    selected = set(args.scenarios.split(",")) if args.scenarios else None
+    try:
+        await prepare_database(data, args.reseed)
+        await app.router.startup()
+        try:
+            results = await run_scenarios(app, data, scale["requests"] * args.requests_factor, selected)
+        finally:
+            await app.router.shutdown()
+    finally:
+        await engine.dispose()
+
+    return {
+        "meta": {
+            "recorded_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "database": engine.dialect.name,
+            "scale": args.scale,
+            "dataset": data.spec(),
+            "bcrypt_rounds": password_hasher.rounds,
+            "chat_write_mode": settings.CHAT_WRITE_MODE,
+        },
+        "scenarios": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float, min_delta_ms: float) -> List[str]:
+    """
+    Print every scenario in both runs with its change, and return the
+    regressions: p50 or p95 up, or throughput down, by more than
+    `threshold` percent (latency also by at least `min_delta_ms`).
+    """
+    regressions = []
+    print(f"{'scenario':<20} {'metric':<16} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, before in baseline["scenarios"].items():
+        after = current["scenarios"].get(name)
+        if after is None:
+            print(f"{name:<20} missing from the current run")
+            continue
+        for metric, higher_is_worse, gated in (
+            ("throughput_per_s", False, True),
+            ("p50_ms", True, True),
+            ("p95_ms", True, True),
+            ("p99_ms", True, False),
+        ):
+            old, new = before[metric], after[metric]
+            change = (new - old) / old * 100 if old else 0.0
+            worse = change > threshold if higher_is_worse else change < -threshold
+            if higher_is_worse and new - old < min_delta_ms:
+                worse = False
+            flag = ""
+            if worse and gated:
+                flag = "  REGRESSION"
+                regressions.append(f"{name} {metric} {change:+.1f}%")
+            print(f"{name:<20} {metric:<16} {old:>10.2f} {new:>10.2f} {change:>+7.1f}%{flag}")
+        if after["errors"] > before["errors"]:
+            regressions.append(f"{name} errors {before['errors']} -> {after['errors']}")
+    return regressions
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="seed (or reuse) the dataset and run the scenarios")
+    run_parser.add_argument("--scale", choices=sorted(SCALES), default="full")
+    run_parser.add_argument("--scenarios", help="comma-separated subset, e.g. login,chat_fanout")
+    run_parser.add_argument("--requests-factor", type=float, default=1.0, help="scale every scenario's request count")
+    run_parser.add_argument("--bcrypt-rounds", type=int, help="override BCRYPT_ROUNDS for seeding and login")
+    run_parser.add_argument("--reseed", action="store_true")
+    run_parser.add_argument("--output", help="write the results as JSON here")
+    run_parser.add_argument("--baseline", help="compare against this earlier result file")
+
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+
+    for sub in (run_parser, compare_parser):
+        sub.add_argument("--threshold", type=float, default=10.0, help="percent change that counts as a regression")
+        sub.add_argument("--min-delta-ms", type=float, default=0.5, help="ignore latency changes smaller than this")
+
+    args = parser.parse_args()
+    if args.command == "compare":
+        baseline, current = load(args.baseline), load(args.current)
+    else:
+        current = asyncio.run(run(args))
+        if args.output:
+            os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+            with open(args.output, "w") as f:
+                json.dump(current, f, indent=2)
+            print(f"results written to {args.output}")
+        if not args.baseline:
+            return
+        baseline = load(args.baseline)
+
+    regressions = compare(baseline, current, args.threshold, args.min_delta_ms)
+    if regressions:
+        print(f"{len(regressions)} regression(s): " + "; ".join(regressions))
+        sys.exit(1)
+    print("no regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sess
 from sqlalchemy.orm import sessionmaker
 from app.db.session import Base, get_db
 from fastapi import FastAPI
-from httpx import AsyncClient
+from httpx import ASGITransport, AsyncClient
 
 # Create an in-memory SQLite database for testing
 test_engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False, future=True)
@@ -19,6 +19,9 @@ async def initialize_db():
     # Drop tables after tests
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
+    # Close the pooled connection, whose aiosqlite thread would otherwise
+    # keep the interpreter from exiting
+    await test_engine.dispose()
 
 @pytest.fixture
 async def db_session(initialize_db):
@@ -26,17 +29,22 @@ async def db_session(initialize_db):
         yield session
 
 @pytest.fixture
-async def app_override(db_session) -> FastAPI:
+async def app_override(db_session, monkeypatch) -> FastAPI:
     from app.main import app
+    from app.api.v1.endpoints.chat import chat
+    from app.services.chat_persistence import chat_writer
 
     # Override get_db dependency
     async def override_get_db():
         yield db_session
 
     app.dependency_overrides[get_db] = override_get_db
+    # Chat opens its own short-lived sessions rather than using get_db
+    monkeypatch.setattr(chat, "AsyncSessionLocal", TestSessionLocal)
+    monkeypatch.setattr(chat_writer, "session_factory", TestSessionLocal)
     return app
 
 @pytest.fixture
 async def async_client(app_override) -> AsyncClient:
-    async with AsyncClient(app=app_override, base_url="http://test") as client:
+    async with AsyncClient(transport=ASGITransport(app=app_override), base_url="http://test") as client:
         yield client
\ No newline at end of file
@@ -0,0 +1,99 @@
+import pytest
+from collections import Counter
+from sqlalchemy import delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.assignment import CSRWorkload
+from app.models.ticket import TicketPriority, TicketStatus
+from app.models.user import User, UserRole
+from app.services.ticket_assignment import (
+    TicketState,
+    advance_cursor,
+    assign_csr_to_ticket,
+    csr_roster,
+    least_loaded_csr,
+    reconcile_workloads,
+    record_ticket_change,
+)
+
+@pytest.fixture
+async def csrs(db_session: AsyncSession):
+    users = [
+        User(email=f"rr{i}@example.com", hashed_password="x", full_name=f"Rotation CSR {i}", role=UserRole.CSR)
+        for i in range(3)
+    ]
+    db_session.add_all(users)
+    await db_session.commit()
+    yield users
+    # The database is shared by the whole session; remove these CSRs so the
+    # next test can create them again and rosters only hold its own
+    ids = [user.id for user in users]
+    await db_session.rollback()
+    await db_session.execute(delete(CSRWorkload).where(CSRWorkload.csr_id.in_(ids)))
+    await db_session.execute(delete(User).where(User.id.in_(ids)))
+    await db_session.commit()
+    csr_roster.invalidate()
+
+@pytest.mark.anyio
+async def test_cursor_positions_are_disjoint(db_session: AsyncSession):
+    first = await advance_cursor(db_session, count=5, name="test_cursor")
+    second = await advance_cursor(db_session, name="test_cursor")
+    assert second == first + 1
+
+@pytest.mark.anyio
+async def test_round_robin_is_fair(db_session: AsyncSession, csrs):
+    roster = await csr_roster.get(db_session)
+    picks = [await assign_csr_to_ticket(db_session) for _ in range(len(roster) * 4)]
+    assert set(Counter(picks).values()) == {4}
+
+@pytest.mark.anyio
+async def test_role_change_invalidates_roster(db_session: AsyncSession, csrs):
+    before = await csr_roster.get(db_session)
+    csrs[0].role = UserRole.USER
+    await db_session.commit()
+    after = await csr_roster.get(db_session)
+    assert csrs[0].id in before
+    assert csrs[0].id not in after
+
+@pytest.mark.anyio
+async def test_workload_counters_follow_ticket_changes(db_session: AsyncSession, csrs):
+    a, b = csrs[0].id, csrs[1].id
+    await record_ticket_change(db_session, None, TicketState(a, TicketStatus.OPEN, None))
+    # Reassign to b and raise the priority
+    await record_ticket_change(
+        db_session,
+        TicketState(a, TicketStatus.OPEN, None),
+        TicketState(b, TicketStatus.OPEN, TicketPriority.HIGH),
+    )
+    await db_session.commit()
+    assert (await db_session.get(CSRWorkload, a)).open_tickets == 0
+    load_b = await db_session.get(CSRWorkload, b)
+    assert (load_b.open_tickets, load_b.weighted_load) == (1, 3)
+
+    # Closing the ticket releases it
+    await record_ticket_change(
+        db_session,
+        TicketState(b, TicketStatus.OPEN, TicketPriority.HIGH),
+        TicketState(b, TicketStatus.CLOSED, TicketPriority.HIGH),
+    )
+    await db_session.commit()
+    await db_session.refresh(load_b)
+    assert (load_b.open_tickets, load_b.weighted_load) == (0, 0)
+
+@pytest.mark.anyio
+async def test_least_loaded_prefers_idle_csr(db_session: AsyncSession, csrs):
+    await reconcile_workloads(db_session)
+    busy = [csr.id for csr in csrs[:-1]]
+    for csr_id in busy:
+        await record_ticket_change(db_session, None, TicketState(csr_id, TicketStatus.OPEN, None))
+    await db_session.commit()
+    assert await least_loaded_csr(db_session) not in busy
+
+@pytest.mark.anyio
+async def test_reconcile_repairs_drift(db_session: AsyncSession, csrs):
+    await reconcile_workloads(db_session)
+    db_session.add(CSRWorkload(csr_id=csrs[0].id, open_tickets=0, weighted_load=0))
+    await db_session.commit()
+    await db_session.execute(update(CSRWorkload).values(open_tickets=42))
+    await db_session.commit()
+    assert await reconcile_workloads(db_session) > 0
+    assert await reconcile_workloads(db_session) == 0
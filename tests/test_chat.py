@@ -2,7 +2,7 @@ import json
 import pytest
 from fastapi.testclient import TestClient
 from uuid import UUID
-from app.schemas.message import MessageCreate, WSMessage
+from app.schemas.chat import ChatCreate, WSChat
 from app.schemas.user import UserCreate, UserLogin
 
 @pytest.fixture
@@ -37,7 +37,7 @@ def test_websocket_chat_flow(client, user_and_ticket):
     # Open WebSocket connection
     with client.websocket_connect(f"/ws/tickets/{ticket_id}?token={token}") as ws:
         # Send a chat message
-        incoming = MessageCreate(ticket_id=UUID(ticket_id), content="Hello CSR").json()
+        incoming = ChatCreate(ticket_id=UUID(ticket_id), content="Hello CSR").json()
         ws.send_text(incoming)
         # Receive broadcasted message
         data = ws.receive_text()
@@ -0,0 +1,119 @@
+import uuid
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.core.pagination import keyset_paginate
+from app.models.chat import Chat
+from app.services.chat_history import ChatHistory
+
+async def seed_messages(db_session: AsyncSession, count: int):
+    ticket_id, sender_id = uuid.uuid4(), uuid.uuid4()
+    start = datetime.utcnow()
+    rows = [
+        {"id": uuid.uuid4(), "ticket_id": ticket_id, "sender_id": sender_id, "content": f"m{i}",
+         # pairs of messages share a timestamp, so ids break the ties
+         "timestamp": start + timedelta(seconds=i // 2)}
+        for i in range(count)
+    ]
+    if rows:
+        await db_session.execute(insert(Chat), rows)
+        await db_session.commit()
+    # in history order
+    return ticket_id, sorted(rows, key=lambda row: (row["timestamp"], row["id"]))
+
+async def walk(page, direction="next", cursor=None, limit=7):
+    """Follow cursors to the end, returning the ids of every page."""
+    pages = []
+    while True:
+        items, next_cursor, prev_cursor = await page(cursor, direction, limit)
+        pages.append([item["id"] if isinstance(item, dict) else item.id for item in items])
+        cursor = next_cursor if direction == "next" else prev_cursor
+        if cursor is None:
+            return pages, next_cursor, prev_cursor
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("count", [0, 5, 30, 60])
+async def test_buffered_pages_match_the_database(db_session: AsyncSession, count):
+    ticket_id, _ = await seed_messages(db_session, count)
+    history = ChatHistory(size=20, tickets=10, ttl=60, enabled=True)
+
+    async def from_history(cursor, direction, limit):
+        return await history.page(db_session, ticket_id, cursor, direction, limit)
+
+    async def from_db(cursor, direction, limit):
+        return await keyset_paginate(
+            db_session, select(Chat).where(Chat.ticket_id == ticket_id), Chat.timestamp, Chat.id, cursor, direction, limit
+        )
+
+    forward, _, last_prev = await walk(from_history)
+    assert forward == (await walk(from_db))[0]
+    # pages that fit inside the 20 buffered messages never touched the DB
+    assert history.db_pages == max(0, len(forward) - 20 // 7)
+    if count:
+        # and back again from the oldest page
+        assert (await walk(from_history, "prev", last_prev))[0] == (await walk(from_db, "prev", last_prev))[0]
+
+@pytest.mark.anyio
+async def test_replay_after_last_seen(db_session: AsyncSession):
+    ticket_id, rows = await seed_messages(db_session, 30)
+    history = ChatHistory(size=20, tickets=10, ttl=60, enabled=True)
+    buffer = await history.load(db_session, ticket_id)
+
+    ids = [row["id"] for row in rows]
+
+    assert [m["id"] for m in buffer.since(ids[25])] == ids[26:]
+    assert buffer.since(ids[-1]) == []
+    # older than the buffer: it cannot tell what came after
+    assert buffer.since(ids[0]) is None
+
+    # new messages reach the buffer without another load
+    message = {**rows[-1], "id": uuid.uuid4(), "content": "live", "timestamp": rows[-1]["timestamp"] + timedelta(seconds=1)}
+    history.add(message)
+    assert [m["content"] for m in (await history.load(db_session, ticket_id)).since(ids[-1])] == ["live"]
+    assert history.stats()["misses"] == 1
+
+@pytest.mark.anyio
+async def test_history_is_read_from_the_db_when_buffering_is_disabled(db_session: AsyncSession):
+    # e.g. WS_BROADCAST_BACKEND=memory with several workers: messages sent
+    # through another worker never reach this one's buffers
+    ticket_id, rows = await seed_messages(db_session, 5)
+    history = ChatHistory(size=20, tickets=10, ttl=60, enabled=False)
+    await history.load(db_session, ticket_id)
+
+    late = {**rows[-1], "id": uuid.uuid4(), "timestamp": rows[-1]["timestamp"] + timedelta(seconds=1)}
+    await db_session.execute(insert(Chat), [late])
+    await db_session.commit()
+
+    items, _, _ = await history.page(db_session, ticket_id)
+    assert items[0].id == late["id"]
+    assert [m["id"] for m in (await history.load(db_session, ticket_id)).since(rows[-1]["id"])] == [late["id"]]
+    assert history.stats()["db_pages"] == 1
+    assert history.stats()["size"] == 0
+
+@pytest.mark.anyio
+async def test_replay_past_the_buffer_reads_the_gap_from_the_db(db_session: AsyncSession):
+    ticket_id, rows = await seed_messages(db_session, 30)
+    history = ChatHistory(size=20, tickets=10, ttl=60, enabled=True)
+    ids = [row["id"] for row in rows]
+
+    # missed more than the 20 buffered messages: no gap before the buffer
+    assert [m["id"] for m in (await history.replay(db_session, ticket_id, ids[2]))()] == ids[3:]
+    assert [m["id"] for m in (await history.replay(db_session, ticket_id, ids[25]))()] == ids[26:]
+    assert (await history.replay(db_session, ticket_id, ids[-1]))() == []
+    # unknown message: the newest buffered ones
+    assert [m["id"] for m in (await history.replay(db_session, ticket_id, uuid.uuid4()))()] == ids[10:]
+
+@pytest.mark.anyio
+async def test_lost_relays_drop_the_buffers(db_session: AsyncSession):
+    ticket_id, rows = await seed_messages(db_session, 5)
+    other_id, _ = await seed_messages(db_session, 5)
+    history = ChatHistory(size=20, tickets=10, ttl=60, enabled=True)
+    await history.load(db_session, ticket_id)
+    await history.load(db_session, other_id)
+
+    history.on_lost(str(ticket_id))
+    assert history.stats()["size"] == 1
+    history.on_lost(None)
+    assert history.stats()["size"] == 0
@@ -0,0 +1,85 @@
+import asyncio
+import uuid
+import pytest
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.future import select
+from app.models.chat import Chat
+from app.services.chat_persistence import ChatWriter
+
+class Recorder:
+    def __init__(self):
+        self.published = []
+
+    async def __call__(self, ticket_id: str, message: dict):
+        self.published.append((ticket_id, message["content"]))
+
+def session_factory(db_session: AsyncSession):
+    return async_sessionmaker(bind=db_session.bind, class_=AsyncSession, expire_on_commit=False)
+
+async def count_messages(db_session: AsyncSession, ticket_ids) -> int:
+    result = await db_session.execute(select(func.count()).select_from(Chat).where(Chat.ticket_id.in_(ticket_ids)))
+    return result.scalar_one()
+
+@pytest.mark.anyio
+async def test_durable_mode_group_commits_and_keeps_order(db_session: AsyncSession):
+    recorder = Recorder()
+    writer = ChatWriter(mode="durable", batch_size=50, flush_interval=0.01,
+                        session_factory=session_factory(db_session), publish=recorder)
+    tickets = [uuid.uuid4(), uuid.uuid4()]
+    sender = uuid.uuid4()
+
+    await asyncio.gather(*(writer.submit(tickets[i % 2], sender, f"m{i}") for i in range(100)))
+    await writer.stop()
+
+    assert writer.written == 100
+    assert writer.batches < 100
+    assert await count_messages(db_session, tickets) == 100
+    for n, ticket in enumerate(tickets):
+        sent = [content for ticket_id, content in recorder.published if ticket_id == str(ticket)]
+        assert sent == [f"m{i}" for i in range(n, 100, 2)]
+
+@pytest.mark.anyio
+async def test_broadcast_first_publishes_before_commit(db_session: AsyncSession):
+    recorder = Recorder()
+    writer = ChatWriter(mode="broadcast_first", batch_size=10, flush_interval=0.01,
+                        session_factory=session_factory(db_session), publish=recorder)
+    ticket = uuid.uuid4()
+
+    for i in range(5):
+        await writer.submit(ticket, uuid.uuid4(), f"m{i}")
+    assert [content for _, content in recorder.published] == [f"m{i}" for i in range(5)]
+    await writer.stop()
+    assert await count_messages(db_session, [ticket]) == 5
+
+@pytest.mark.anyio
+async def test_durable_mode_reports_failed_writes():
+    def broken_session():
+        raise RuntimeError("database unavailable")
+
+    recorder = Recorder()
+    writer = ChatWriter(mode="durable", retries=1, session_factory=broken_session, publish=recorder)
+    with pytest.raises(RuntimeError):
+        await writer.submit(uuid.uuid4(), uuid.uuid4(), "lost")
+    await writer.stop()
+    assert writer.failed == 1
+    assert recorder.published == []
+
+@pytest.mark.anyio
+async def test_one_bad_row_does_not_drop_its_batch(db_session: AsyncSession):
+    recorder = Recorder()
+    writer = ChatWriter(mode="durable", batch_size=50, flush_interval=0.05, retries=0,
+                        session_factory=session_factory(db_session), publish=recorder)
+    ticket, sender = uuid.uuid4(), uuid.uuid4()
+
+    # content is NOT NULL, so only the third message cannot be saved
+    results = await asyncio.gather(
+        *(writer.submit(ticket, sender, None if i == 2 else f"m{i}") for i in range(6)), return_exceptions=True
+    )
+    await writer.stop()
+
+    assert [isinstance(result, Exception) for result in results] == [False, False, True, False, False, False]
+    assert writer.batches == 1
+    assert (writer.written, writer.failed) == (5, 1)
+    assert await count_messages(db_session, [ticket]) == 5
+    assert [content for _, content in recorder.published] == ["m0", "m1", "m3", "m4", "m5"]
@@ -0,0 +1,12 @@
+import bcrypt
+from app.core.hashing import PasswordHasher
+
+def test_rehash_only_raises_the_cost():
+    hasher = PasswordHasher(kind="thread", workers=1, max_pending=1, rounds=11)
+    hashes = {rounds: bcrypt.hashpw(b"secret", bcrypt.gensalt(rounds=rounds)).decode() for rounds in (10, 11, 12)}
+
+    assert hasher.needs_rehash(hashes[10])
+    assert not hasher.needs_rehash(hashes[11])
+    # e.g. made by a worker that calibrated a round higher than this one
+    assert not hasher.needs_rehash(hashes[12])
+    assert hasher.needs_rehash("not-a-bcrypt-hash")
@@ -0,0 +1,81 @@
+import random
+import uuid
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user import User
+from app.models.ticket import Ticket, TicketStatus
+from app.models.chat import Chat
+
+# The access paths the API uses, written out as SQL, and the index each must hit
+QUERY_PLANS = [
+    (
+        "SELECT * FROM tickets WHERE user_id = :uid ORDER BY created_at DESC, id DESC LIMIT 11",
+        "ix_tickets_user_id_created_at_id",
+    ),
+    (
+        "SELECT * FROM tickets WHERE user_id = :uid AND status = 'OPEN' ORDER BY created_at DESC, id DESC LIMIT 11",
+        "ix_tickets_user_id_status_created_at",
+    ),
+    (
+        "SELECT * FROM tickets WHERE status = 'OPEN' ORDER BY created_at DESC, id DESC LIMIT 11",
+        "ix_tickets_status_created_at",
+    ),
+    (
+        "SELECT * FROM tickets WHERE category = 'billing' ORDER BY created_at DESC, id DESC LIMIT 11",
+        "ix_tickets_category_created_at",
+    ),
+    (
+        "SELECT * FROM tickets WHERE assigned_to_id IS NULL AND status = 'OPEN' "
+        "ORDER BY created_at DESC, id DESC LIMIT 11",
+        "ix_tickets_unassigned_status_created_at",
+    ),
+    (
+        "SELECT count(*) FROM tickets WHERE assigned_to_id = :uid AND status IN ('OPEN', 'IN_PROGRESS')",
+        "ix_tickets_assigned_to_id_status",
+    ),
+    (
+        "SELECT * FROM messages WHERE ticket_id = :tid ORDER BY timestamp, id LIMIT 50",
+        "ix_messages_ticket_id_timestamp_id",
+    ),
+]
+
+@pytest.fixture
+async def seeded_ids(db_session: AsyncSession):
+    users = [uuid.uuid4() for _ in range(10)]
+    await db_session.execute(insert(User), [
+        {"id": u, "email": f"{u}@plan.example.com", "full_name": "Plan User", "hashed_password": "x"}
+        for u in users
+    ])
+    now = datetime.utcnow()
+    tickets = [
+        {
+            "id": uuid.uuid4(),
+            "title": "Plan",
+            "description": "Query plan seed",
+            "category": random.choice(["billing", "tech", "general"]),
+            "type": "issue",
+            "status": random.choice(list(TicketStatus)),
+            "user_id": random.choice(users),
+            "assigned_to_id": random.choice(users) if i % 10 else None,
+            "created_at": now - timedelta(seconds=i),
+        }
+        for i in range(1000)
+    ]
+    await db_session.execute(insert(Ticket), tickets)
+    await db_session.execute(insert(Chat), [
+        {"id": uuid.uuid4(), "ticket_id": tickets[i % 50]["id"], "sender_id": users[0], "content": "hi", "timestamp": now}
+        for i in range(1000)
+    ])
+    await db_session.execute(text("ANALYZE"))
+    await db_session.commit()
+    return {"uid": users[0].hex, "tid": tickets[0]["id"].hex}
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("sql,index", QUERY_PLANS)
+async def test_query_uses_index(db_session: AsyncSession, seeded_ids, sql, index):
+    result = await db_session.execute(text(f"EXPLAIN QUERY PLAN {sql}"), seeded_ids)
+    plan = " | ".join(row[-1] for row in result.all())
+    assert index in plan, plan
+    assert "TEMP B-TREE" not in plan, plan
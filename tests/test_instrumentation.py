@@ -0,0 +1,64 @@
+import logging
+import pytest
+from fastapi import Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db import instrumentation
+from app.core.logging import logger
+from app.db.instrumentation import (
+    QueryStatsMiddleware, SlowQueryLog, describe_parameters, fingerprint, instrument, track_queries,
+)
+from app.db.session import get_db
+from tests.conftest import test_engine
+
+instrument(test_engine)
+
+def test_fingerprint_normalizes_values():
+    assert fingerprint("SELECT * FROM tickets  WHERE id = ? AND title = 'it''s'\n LIMIT 20") == \
+        "SELECT * FROM tickets WHERE id = ? AND title = ? LIMIT ?"
+    assert fingerprint("SELECT 1 FROM users WHERE id IN ($1, $2, $3)") == fingerprint("SELECT 2 FROM users WHERE id IN (%s)")
+    assert fingerprint("SELECT :q::regconfig, %(name)s") == "SELECT ?::regconfig, ?"
+
+@pytest.mark.anyio
+async def test_queries_are_counted_and_slow_ones_logged(db_session: AsyncSession, monkeypatch):
+    log = SlowQueryLog(threshold_ms=0)
+    monkeypatch.setattr(instrumentation, "slow_query_log", log)
+    with track_queries() as stats:
+        await db_session.execute(text("SELECT 1"))
+        await db_session.execute(text("SELECT 2"))
+    await db_session.execute(text("SELECT 3"))
+    assert stats.count == 2 and stats.seconds > 0
+    assert [entry["count"] for entry in log.stats()] == [3]
+
+@pytest.mark.anyio
+async def test_debug_headers_report_request_totals(db_session: AsyncSession):
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware, headers=True)
+    app.dependency_overrides[get_db] = lambda: db_session
+
+    @app.get("/two")
+    async def two_queries(db: AsyncSession = Depends(get_db)):
+        await db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 2"))
+        return {}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        resp = await client.get("/two")
+    assert resp.headers["x-db-query-count"] == "2"
+    assert float(resp.headers["x-db-time-ms"]) >= 0
+
+@pytest.mark.anyio
+async def test_sampled_statements_never_log_parameter_values(db_session: AsyncSession, monkeypatch):
+    messages = []
+    handler = logging.Handler()
+    handler.emit = lambda record: messages.append(record.getMessage())
+    monkeypatch.setattr(instrumentation, "sample_rate", 1.0)
+    logger.addHandler(handler)
+    try:
+        await db_session.execute(text("SELECT :secret, :n"), {"secret": "$2b$12$secret-hash", "n": 7})
+    finally:
+        logger.removeHandler(handler)
+    assert any("(str[18], int)" in message for message in messages)
+    assert not any("secret-hash" in message for message in messages)
+    assert describe_parameters([("a@b.c", None), ("x", 1)], executemany=True) == "2 rows of (str[5], None)"
@@ -0,0 +1,70 @@
+import json
+import logging
+import queue
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from app.core.logging import (
+    ContextQueueHandler, JsonFormatter, RateLimitFilter, RequestContextMiddleware, SamplingFilter,
+)
+
+def queued_logger(name: str, maxsize: int = 0):
+    handler = ContextQueueHandler(queue.Queue(maxsize=maxsize))
+    log = logging.getLogger(name)
+    log.handlers = [handler]
+    log.propagate = False
+    log.setLevel(logging.DEBUG)
+    return log, handler
+
+def drain(handler) -> list:
+    records = []
+    while not handler.queue.empty():
+        records.append(handler.queue.get_nowait())
+    return records
+
+@pytest.mark.anyio
+async def test_records_carry_request_id_and_route():
+    log, handler = queued_logger("tests.logging.request")
+    app = FastAPI()
+    app.add_middleware(RequestContextMiddleware)
+
+    @app.get("/things/{thing_id}")
+    async def thing(thing_id: int):
+        log.info(f"Looking up {thing_id}")
+        return {}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        resp = await client.get("/things/7", headers={"X-Request-ID": "abc123"})
+    log.info("Outside any request")
+
+    assert resp.headers["x-request-id"] == "abc123"
+    inside, outside = (json.loads(JsonFormatter().format(record)) for record in drain(handler))
+    assert inside["message"] == "Looking up 7"
+    assert inside["request_id"] == "abc123" and inside["route"] == "/things/{thing_id}"
+    assert "request_id" not in outside
+
+def test_full_queue_drops_instead_of_blocking():
+    log, handler = queued_logger("tests.logging.full", maxsize=2)
+    for i in range(5):
+        log.info(f"record {i}")
+    assert [record.getMessage() for record in drain(handler)] == ["record 0", "record 1"]
+    assert handler.dropped == 3
+
+def test_sampling_only_drops_low_levels_of_matching_loggers():
+    sampling = SamplingFilter({"tests.sampled": 0.0})
+    def make(name, level):
+        return logging.LogRecord(name, level, __file__, 1, "msg", None, None)
+    assert not sampling.filter(make("tests.sampled.engine", logging.INFO))
+    assert sampling.filter(make("tests.sampled", logging.WARNING))
+    assert sampling.filter(make("tests.sampledother", logging.INFO))
+
+def test_repeated_errors_are_rate_limited_per_call_site():
+    limit = RateLimitFilter(burst=2, window=3600)
+    def error(line):
+        return logging.LogRecord("tests", logging.ERROR, __file__, line, "boom", None, None)
+    assert [limit.filter(error(10)) for _ in range(5)] == [True, True, False, False, False]
+    assert limit.filter(error(11))
+
+    limit.window = 0
+    record = error(10)
+    assert limit.filter(record) and record.suppressed == 3
@@ -0,0 +1,53 @@
+import pytest
+from fastapi import FastAPI, HTTPException
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from app.core.metrics import Histogram, MetricsMiddleware, MetricsRegistry, instrument_pool, metrics
+from tests.conftest import test_engine
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    registry.histogram("job_seconds", "Job time", ("queue",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        registry.observe("job_seconds", value, 'say "hi"')
+    registry.gauge("workers", "Workers", (), lambda: {(): 3})
+    body = registry.render()
+    assert 'job_seconds_bucket{queue="say \\"hi\\"",le="0.1"} 2' in body
+    assert 'job_seconds_bucket{queue="say \\"hi\\"",le="1.0"} 3' in body
+    assert 'job_seconds_bucket{queue="say \\"hi\\"",le="+Inf"} 4' in body
+    assert 'job_seconds_count{queue="say \\"hi\\""} 4' in body
+    assert "# TYPE workers gauge\nworkers 3\n" in body
+
+@pytest.mark.anyio
+async def test_requests_are_labelled_by_route_template():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics-test/items/{item_id}")
+    async def item(item_id: int):
+        if item_id == 0:
+            raise HTTPException(status_code=404)
+        return {}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        for item_id in (1, 2, 0):
+            await client.get(f"/metrics-test/items/{item_id}")
+        await client.get("/metrics-test/nowhere")
+
+    body = metrics.render()
+    route = 'method="GET",route="/metrics-test/items/{item_id}"'
+    assert f'http_requests_total{{{route},status="200"}} 2' in body
+    assert f'http_requests_total{{{route},status="404"}} 1' in body
+    assert f'http_request_duration_seconds_count{{{route}}} 3' in body
+    assert '/metrics-test/nowhere' not in body
+    assert "http_requests_in_flight 0" in body
+
+@pytest.mark.anyio
+async def test_pool_checkouts_are_timed(initialize_db):
+    instrument_pool(test_engine)
+    series = metrics.histogram("db_pool_checkout_seconds", "")
+    before = sum(series[()].counts) if () in series else 0
+    async with test_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    assert sum(series[()].counts) == before + 1
+    assert "# TYPE db_pool_connections gauge" in metrics.render()
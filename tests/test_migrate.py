@@ -0,0 +1,19 @@
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from app.db.migrate import ALEMBIC_INI, sync_database_url, upgrade
+
+def test_sync_database_url():
+    assert sync_database_url("postgresql+asyncpg://u:p@db/sts") == "postgresql://u:p@db/sts"
+    assert sync_database_url("postgres://u:p@db/sts") == "postgresql://u:p@db/sts"
+    assert sync_database_url("sqlite+aiosqlite:///./sts.db") == "sqlite:///./sts.db"
+
+def test_concurrent_upgrades_take_turns(tmp_path):
+    path = tmp_path / "migrate.sqlite3"
+    # Each run waits for the migration lock; the later ones find nothing to do
+    with ThreadPoolExecutor(3) as pool:
+        list(pool.map(lambda _: upgrade(url=f"sqlite:///{path}"), range(3)))
+    head = ScriptDirectory.from_config(Config(ALEMBIC_INI)).get_current_head()
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT version_num FROM alembic_version").fetchall() == [(head,)]
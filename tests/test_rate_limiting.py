@@ -0,0 +1,60 @@
+import multiprocessing
+import pytest
+from fastapi import Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+from app.core.rate_limiting import RateLimit, SharedTokenBuckets, limit_by_ip, parse_limit
+
+def test_parse_limit():
+    assert parse_limit("30/minute") == (0.5, 30.0)
+    assert parse_limit("10/seconds") == (10.0, 10.0)
+    assert parse_limit("") is None
+    with pytest.raises(ValueError):
+        parse_limit("5/fortnight")
+
+def test_bucket_allows_a_burst_then_refills():
+    table = SharedTokenBuckets(slots=64)
+    results = [table.take("ip:1", rate=1.0, capacity=3, now=100.0) for _ in range(4)]
+    assert results[:3] == [0.0, 0.0, 0.0]
+    assert results[3] == pytest.approx(1.0)
+    assert table.take("ip:2", rate=1.0, capacity=3, now=100.0) == 0.0
+    assert table.take("ip:1", rate=1.0, capacity=3, now=100.5) == pytest.approx(0.5)
+    assert table.take("ip:1", rate=1.0, capacity=3, now=101.5) == 0.0
+
+def test_full_groups_evict_the_least_recently_used_key():
+    table = SharedTokenBuckets(slots=8)  # a single group
+    for i in range(8):
+        table.take(f"key:{i}", rate=0.001, capacity=1, now=float(i))
+    assert table.take("key:8", rate=0.001, capacity=1, now=10.0) == 0.0
+    # key:0 was evicted and starts over with a full bucket; key:7 was not
+    assert table.take("key:0", rate=0.001, capacity=1, now=11.0) == 0.0
+    assert table.take("key:7", rate=0.001, capacity=1, now=12.0) > 0
+
+def _drain(table, key, count):
+    for _ in range(count):
+        table.take(key, rate=0.001, capacity=5)
+
+def test_buckets_are_shared_with_forked_workers(tmp_path):
+    table = SharedTokenBuckets(slots=64, path=str(tmp_path / "buckets"))
+    workers = [multiprocessing.get_context("fork").Process(target=_drain, args=(table, "user:1", 2)) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert table.take("user:1", rate=0.001, capacity=5) == 0.0
+    assert table.take("user:1", rate=0.001, capacity=5) > 0
+
+@pytest.mark.anyio
+async def test_over_limit_requests_are_rejected_before_the_endpoint():
+    calls = []
+    app = FastAPI()
+
+    @app.post("/expensive", dependencies=[Depends(limit_by_ip(RateLimit("test_expensive", "2/minute")))])
+    async def expensive():
+        calls.append(1)
+        return {}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        statuses = [(await client.post("/expensive")) for _ in range(3)]
+    assert [resp.status_code for resp in statuses] == [200, 200, 429]
+    assert int(statuses[2].headers["retry-after"]) >= 1
+    assert len(calls) == 2
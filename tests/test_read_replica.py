@@ -0,0 +1,151 @@
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from app.core.security import Principal, create_access_token
+from app.db import replica
+from app.db.replica import HEARTBEAT_ID, ReadYourWritesMiddleware, RecentWriters, ReplicaRouter, get_read_db
+from app.db.session import Base
+from app.models.replication import ReplicationHeartbeat
+from app.models.user import UserRole
+
+@pytest.fixture
+async def databases(tmp_path):
+    # Two SQLite files standing in for a primary and its replica; tests
+    # "replicate" by writing the replica's heartbeat themselves
+    engines = []
+    for name in ("primary", "replica"):
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / name}.sqlite3")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        engines.append(engine)
+    yield [async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False) for engine in engines]
+    for engine in engines:
+        await engine.dispose()
+
+def make_router(primary, replica_db, read_after_write=5.0, writers_path=""):
+    writers = RecentWriters(read_after_write, slots=64, path=writers_path)
+    return ReplicaRouter(primary, replica_db, max_lag=5.0, probe_interval=1.0, recent_writers=writers)
+
+async def replicate_heartbeat(primary, replica_db, age: float = 0.0):
+    async with primary() as db:
+        beat_at = await db.get(ReplicationHeartbeat, HEARTBEAT_ID)
+        beat_at = beat_at.beat_at if beat_at else datetime.utcnow()
+    async with replica_db() as db:
+        await db.merge(ReplicationHeartbeat(id=HEARTBEAT_ID, beat_at=beat_at - timedelta(seconds=age)))
+        await db.commit()
+
+@pytest.mark.anyio
+async def test_replica_serves_reads_once_caught_up(databases):
+    primary, replica_db = databases
+    router = make_router(primary, replica_db)
+    assert not router.use_replica(None)
+
+    # The first probe stamps the primary, but the replica has no heartbeat yet
+    await router.probe()
+    assert router.lag is None
+    assert not router.available
+
+    await replicate_heartbeat(primary, replica_db)
+    await router.probe()
+    assert 0 <= router.lag < 1
+    assert router.use_replica("someone")
+
+@pytest.mark.anyio
+async def test_lagging_or_unreachable_replica_falls_back_to_primary(databases, tmp_path):
+    primary, replica_db = databases
+    router = make_router(primary, replica_db)
+    await router.probe()
+    await replicate_heartbeat(primary, replica_db, age=60)
+    await router.probe()
+    assert router.lag >= 60
+    assert not router.use_replica("someone")
+
+    missing = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'replica.sqlite3'}")
+    down = make_router(primary, async_sessionmaker(bind=missing, class_=AsyncSession))
+    await down.probe()
+    assert not down.available
+    assert down.stats()["error"]
+    await missing.dispose()
+
+@pytest.mark.anyio
+async def test_get_read_db_keeps_recent_writers_on_primary(databases, monkeypatch):
+    primary, replica_db = databases
+    router = make_router(primary, replica_db, read_after_write=0.2)
+    await router.probe()
+    await replicate_heartbeat(primary, replica_db)
+    await router.probe()
+    monkeypatch.setattr(replica, "replica_router", router)
+
+    writer = Principal(id="writer", role=UserRole.USER, is_active=True)
+    reader = Principal(id="reader", role=UserRole.USER, is_active=True)
+
+    async def session_for(user, db):
+        dependency = get_read_db(user, db)
+        session = await dependency.__anext__()
+        await dependency.aclose()
+        return session
+
+    async with primary() as db:
+        router.record_write("writer")
+        assert await session_for(writer, db) is db
+        replica_session = await session_for(reader, db)
+        assert replica_session.bind is replica_db.kw["bind"]
+
+        # Once the read-after-write window has passed, the writer reads from the replica too
+        await asyncio.sleep(0.3)
+        assert await session_for(writer, db) is not db
+
+@pytest.mark.anyio
+async def test_recent_writers_are_shared_between_workers(databases, tmp_path):
+    # Two routers on one table, as two workers of a host are
+    primary, replica_db = databases
+    path = str(tmp_path / "writers")
+    workers = [make_router(primary, replica_db, writers_path=path) for _ in range(2)]
+    for router in workers:
+        await router.probe()
+    await replicate_heartbeat(primary, replica_db)
+    for router in workers:
+        await router.probe()
+
+    workers[0].record_write("writer")
+    assert not workers[1].use_replica("writer")
+    assert workers[1].use_replica("reader")
+
+def test_recent_writers_forget_writes_after_the_window():
+    writers = RecentWriters(window=5.0, slots=64)
+    writers.record("writer", now=100.0)
+    assert writers.wrote_recently("writer", now=104.9)
+    assert not writers.wrote_recently("writer", now=105.0)
+    assert not writers.wrote_recently("someone-else", now=101.0)
+
+@pytest.mark.anyio
+async def test_middleware_records_writers(databases, monkeypatch):
+    primary, replica_db = databases
+    router = make_router(primary, replica_db)
+    await router.probe()
+    await replicate_heartbeat(primary, replica_db)
+    await router.probe()
+    monkeypatch.setattr(replica, "replica_router", router)
+
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware)
+
+    @app.get("/things")
+    async def list_things():
+        return []
+
+    @app.post("/things")
+    async def create_thing():
+        return {}
+
+    reader, writer = create_access_token({"sub": "reader"}), create_access_token({"sub": "writer"})
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        await client.get("/things", headers={"Authorization": f"Bearer {reader}"})
+        await client.post("/things", headers={"Authorization": f"Bearer {writer}"})
+        await client.post("/things")
+
+    assert router.use_replica("reader")
+    assert not router.use_replica("writer")
@@ -0,0 +1,70 @@
+import time
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.revocation import RevocationCache, revocation_cache
+from app.core.security import create_refresh_token, decode_token, revoke_token
+from app.models.token_blacklist import TokenBlacklist
+from app.models.user import User
+
+def test_cache_defers_to_db_until_loaded():
+    cache = RevocationCache(max_staleness=30)
+    cache.add("revoked-jti")
+    assert cache.lookup("revoked-jti") is None
+    assert cache.stats()["db_fallbacks"] == 1
+
+@pytest.mark.anyio
+async def test_cache_answers_from_memory_after_load(db_session: AsyncSession):
+    db_session.add(TokenBlacklist(jti="loaded-jti", token_type="refresh"))
+    await db_session.commit()
+
+    cache = RevocationCache(max_staleness=30)
+    await cache.load(db_session)
+    assert cache.lookup("loaded-jti") is True
+    assert cache.lookup("unknown-jti") is False
+
+    # Rows written later (e.g. by another worker) show up on the next sync
+    db_session.add(TokenBlacklist(jti="synced-jti", token_type="refresh"))
+    await db_session.commit()
+    assert cache.lookup("synced-jti") is False
+    await cache.sync(db_session)
+    assert cache.lookup("synced-jti") is True
+
+    stats = cache.stats()
+    assert stats["hits"] == 4
+    assert stats["db_fallbacks"] == 0
+
+@pytest.mark.anyio
+async def test_expired_entries_are_pruned(db_session: AsyncSession):
+    cache = RevocationCache(max_staleness=30)
+    await cache.load(db_session)
+    cache.add("expired-jti", time.time() - 1)
+    assert cache.lookup("expired-jti") is False
+    cache.prune()
+    assert "expired-jti" not in cache._entries
+
+@pytest.mark.anyio
+async def test_refresh_replay_is_rejected_when_cache_is_stale(async_client: AsyncClient, db_session: AsyncSession):
+    user = User(email="replay@example.com", hashed_password="x", full_name="Replay")
+    db_session.add(user)
+    await db_session.commit()
+    await revocation_cache.load(db_session)
+
+    # Another worker already exchanged this refresh token; our cache has not synced yet
+    token = create_refresh_token({"sub": str(user.id)})
+    db_session.add(TokenBlacklist(jti=decode_token(token)["jti"], token_type="refresh"))
+    await db_session.commit()
+    assert revocation_cache.lookup(decode_token(token)["jti"]) is False
+
+    resp = await async_client.post("/api/v1/auth/refresh", json={"refresh_token": token})
+    assert resp.status_code == 401
+    assert resp.json()["detail"] == "Refresh token has been revoked"
+
+    resp = await async_client.post("/api/v1/auth/logout", json={"refresh_token": token})
+    assert resp.json() == {"msg": "Token already revoked"}
+
+@pytest.mark.anyio
+async def test_revoking_twice_reports_already_revoked(db_session: AsyncSession):
+    payload = decode_token(create_refresh_token({"sub": "twice"}))
+    assert await revoke_token(payload, db_session) is True
+    assert await revoke_token(payload, db_session) is False
@@ -0,0 +1,37 @@
+import json
+import uuid
+from datetime import datetime
+from app.core.serialization import FastJSONResponse, encode_frame, loaded_values, typed_response
+from app.models.ticket import Ticket, TicketStatus
+from app.schemas.ticket import TicketPage
+
+def make_ticket() -> Ticket:
+    return Ticket(
+        id=uuid.uuid4(), title="Help", description="d", category="general", type="issue",
+        status=TicketStatus.OPEN, priority=None, user_id=uuid.uuid4(), assigned_to_id=None,
+        created_at=datetime(2026, 1, 2, 3, 4, 5),
+    )
+
+def test_typed_response_reads_orm_objects():
+    ticket = make_ticket()
+    resp = typed_response(TicketPage, {"items": [ticket], "next_cursor": "abc"})
+    assert resp.media_type == "application/json"
+    body = json.loads(resp.body)
+    assert body["items"][0]["id"] == str(ticket.id)
+    assert body["items"][0]["status"] == "open"
+    assert body["items"][0]["created_at"] == "2026-01-02T03:04:05"
+    assert body["prev_cursor"] is None
+
+def test_loaded_values_only_unwraps_fully_loaded_objects():
+    ticket, partial = make_ticket(), Ticket(title="Only a title")
+    values = loaded_values([ticket, partial, {"plain": "dict"}])
+    assert values[0] is ticket.__dict__
+    assert values[1:] == [partial, {"plain": "dict"}]
+    body = json.loads(typed_response(TicketPage, {"items": values[:1]}).body)
+    assert body["items"][0]["id"] == str(ticket.id)
+
+def test_frames_and_responses_encode_uuids_and_datetimes():
+    message = {"id": uuid.uuid4(), "content": "hi", "timestamp": datetime(2026, 1, 2, 3, 4, 5)}
+    expected = {"id": str(message["id"]), "content": "hi", "timestamp": "2026-01-02T03:04:05"}
+    assert json.loads(encode_frame(message)) == expected
+    assert json.loads(FastJSONResponse(message).body) == expected
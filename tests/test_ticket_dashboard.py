@@ -0,0 +1,71 @@
+import uuid
+import pytest
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.dashboard import TicketRollup
+from app.models.ticket import Ticket, TicketPriority, TicketStatus
+from app.services.ticket_assignment import TicketState, ticket_state
+from app.services.ticket_dashboard import (
+    DashboardSnapshot,
+    load_dashboard,
+    rebuild_rollups,
+    record_rollup_change,
+)
+
+def assignee(summary: dict, csr_id):
+    return next((entry for entry in summary["by_assignee"] if entry["assigned_to_id"] == csr_id), None)
+
+@pytest.mark.anyio
+async def test_rollups_follow_ticket_changes(db_session: AsyncSession):
+    # Other tests insert tickets without touching the rollups
+    await rebuild_rollups(db_session)
+    before = await load_dashboard(db_session)
+    csr_id = uuid.uuid4()
+
+    ticket = Ticket(title="Rollup", description="d", category="c", type="issue", user_id=uuid.uuid4())
+    db_session.add(ticket)
+    await record_rollup_change(db_session, None, TicketState(None, TicketStatus.OPEN, None))
+    await db_session.commit()
+
+    state = ticket_state(ticket)
+    ticket.assigned_to_id, ticket.priority = csr_id, TicketPriority.HIGH
+    await record_rollup_change(db_session, state, ticket_state(ticket))
+    await db_session.commit()
+
+    state = ticket_state(ticket)
+    ticket.status = TicketStatus.RESOLVED
+    await record_rollup_change(db_session, state, ticket_state(ticket))
+    await db_session.commit()
+
+    after = await load_dashboard(db_session)
+    assert after["total"] == before["total"] + 1
+    assert after["by_status"]["resolved"] == before["by_status"]["resolved"] + 1
+    assert after["by_status"]["open"] == before["by_status"]["open"]
+    assert after["by_priority"]["high"] == before["by_priority"]["high"] + 1
+    assert after["by_priority"]["unset"] == before["by_priority"]["unset"]
+    assert assignee(after, csr_id) == {"assigned_to_id": csr_id, "total": 1, "open": 0}
+    assert await rebuild_rollups(db_session) == 0
+
+@pytest.mark.anyio
+async def test_rebuild_repairs_drift(db_session: AsyncSession):
+    db_session.add(Ticket(title="Drift", description="d", category="c", type="issue", user_id=uuid.uuid4()))
+    await db_session.commit()
+    await rebuild_rollups(db_session)
+    await db_session.execute(update(TicketRollup).values(tickets=42))
+    await db_session.commit()
+    assert await rebuild_rollups(db_session) > 0
+    assert await rebuild_rollups(db_session) == 0
+    summary = await load_dashboard(db_session)
+    assert summary["total"] == sum(entry["total"] for entry in summary["by_assignee"])
+
+@pytest.mark.anyio
+async def test_snapshot_is_reused_until_it_expires(db_session: AsyncSession):
+    snapshot = DashboardSnapshot(ttl=60)
+    first = await snapshot.get(db_session)
+    await record_rollup_change(db_session, None, TicketState(None, TicketStatus.OPEN, None))
+    await db_session.commit()
+    assert await snapshot.get(db_session) is first
+    snapshot.invalidate()
+    assert (await snapshot.get(db_session))["total"] == first["total"] + 1
+    # Undo the counter-only change for the tests that follow
+    await rebuild_rollups(db_session)
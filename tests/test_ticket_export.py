@@ -0,0 +1,140 @@
+import gzip
+import itertools
+import json
+import uuid
+import pytest
+from datetime import datetime, timedelta, timezone
+from httpx import AsyncClient
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.security import create_access_token
+from app.models.chat import Chat
+from app.models.ticket import Ticket, TicketStatus
+from app.models.user import User, UserRole
+from app.services import ticket_export
+from app.services.ticket_assignment import csr_roster
+from tests.conftest import TestSessionLocal
+
+# Each test's tickets get their own day, far enough ahead that no other
+# test's tickets fall inside it
+DAYS = itertools.count()
+
+@pytest.fixture
+async def exported(db_session: AsyncSession, monkeypatch):
+    # The export streams from its own session, opened after the request's
+    monkeypatch.setattr(ticket_export, "AsyncSessionLocal", TestSessionLocal)
+    start = datetime(2100, 1, 1) + timedelta(days=next(DAYS))
+    suffix = uuid.uuid4().hex
+    owner = User(email=f"export-owner-{suffix}@example.com", hashed_password="x", full_name="Export Owner")
+    csr = User(email=f"export-csr-{suffix}@example.com", hashed_password="x", full_name="Export CSR", role=UserRole.CSR)
+    db_session.add_all([owner, csr])
+    await db_session.flush()
+    statuses = [TicketStatus.OPEN, TicketStatus.CLOSED, TicketStatus.OPEN, TicketStatus.RESOLVED]
+    # Created out of order, so the export has to sort them
+    tickets = [
+        Ticket(title=f"Export {i}", description="d", category="general", type="issue", status=status,
+               user_id=owner.id, created_at=start + timedelta(hours=i))
+        for i, status in enumerate(statuses)
+    ]
+    db_session.add_all(tickets[::-1])
+    await db_session.flush()
+    db_session.add_all([
+        Chat(ticket_id=tickets[0].id, sender_id=owner.id, content="second", timestamp=start + timedelta(minutes=2)),
+        Chat(ticket_id=tickets[0].id, sender_id=csr.id, content="first", timestamp=start + timedelta(minutes=1)),
+    ])
+    await db_session.commit()
+    yield {
+        "start": start,
+        "tickets": [str(ticket.id) for ticket in tickets],
+        "headers": {"Authorization": f"Bearer {create_access_token({'sub': str(csr.id)})}"},
+        "owner": owner,
+    }
+    # The database is shared by the whole session; remove these rows so the
+    # CSR is not picked up by other tests' round-robin assignment
+    ticket_ids, user_ids = [ticket.id for ticket in tickets], [owner.id, csr.id]
+    await db_session.rollback()
+    await db_session.execute(delete(Chat).where(Chat.ticket_id.in_(ticket_ids)))
+    await db_session.execute(delete(Ticket).where(Ticket.id.in_(ticket_ids)))
+    await db_session.execute(delete(User).where(User.id.in_(user_ids)))
+    await db_session.commit()
+    csr_roster.invalidate()
+
+async def export(client: AsyncClient, exported: dict, **params):
+    # Only this test's tickets, unless the test sets its own window
+    params.setdefault("since", exported["start"].isoformat())
+    params.setdefault("until", (exported["start"] + timedelta(days=1)).isoformat())
+    params = {key: value for key, value in params.items() if value is not None}
+    resp = await client.get("/api/v1/csr/tickets/export", params=params, headers=exported["headers"])
+    assert resp.status_code == 200, resp.text
+    assert resp.headers["content-type"] == "application/x-ndjson"
+    return resp
+
+def records(body: bytes) -> list:
+    return [json.loads(line) for line in body.decode("utf-8").splitlines()]
+
+@pytest.mark.anyio
+async def test_export_streams_tickets_oldest_first(async_client: AsyncClient, exported):
+    resp = await export(async_client, exported, batch_size=3)
+    rows = records(resp.content)
+    assert [row["id"] for row in rows] == exported["tickets"]
+    assert "messages" not in rows[0]
+
+    # Without filters every ticket comes out, still ordered by creation
+    rows = records((await export(async_client, exported, since=None, until=None)).content)
+    assert [(row["created_at"], row["id"]) for row in rows] == sorted((row["created_at"], row["id"]) for row in rows)
+    assert [row["id"] for row in rows if row["id"] in exported["tickets"]] == exported["tickets"]
+
+@pytest.mark.anyio
+async def test_export_filters(async_client: AsyncClient, exported):
+    ids = exported["tickets"]
+    start = exported["start"]
+    window = {"since": (start + timedelta(hours=1)).isoformat(), "until": (start + timedelta(hours=3)).isoformat()}
+    rows = records((await export(async_client, exported, **window)).content)
+    assert [row["id"] for row in rows] == ids[1:3]
+
+    rows = records((await export(async_client, exported, status=["open", "resolved"])).content)
+    assert [row["id"] for row in rows] == [ids[0], ids[2], ids[3]]
+
+@pytest.mark.anyio
+async def test_export_window_converts_offsets_to_utc(async_client: AsyncClient, exported):
+    ids = exported["tickets"]
+    plus_two = timezone(timedelta(hours=2))
+    # 03:00+02:00 is 01:00 UTC, the naive UTC the tickets are stored in
+    since = (exported["start"] + timedelta(hours=3)).replace(tzinfo=plus_two)
+    until = (exported["start"] + timedelta(hours=5)).replace(tzinfo=plus_two)
+    rows = records((await export(async_client, exported, since=since.isoformat(), until=until.isoformat())).content)
+    assert [row["id"] for row in rows] == ids[1:3]
+
+@pytest.mark.anyio
+async def test_export_rejects_an_empty_window_before_streaming(async_client: AsyncClient, exported):
+    since = exported["start"].replace(tzinfo=timezone.utc)
+    params = {"since": since.isoformat(), "until": exported["start"].isoformat()}
+    resp = await async_client.get("/api/v1/csr/tickets/export", params=params, headers=exported["headers"])
+    assert resp.status_code == 422
+    assert resp.json()["detail"] == "since must be before until"
+
+@pytest.mark.anyio
+async def test_export_includes_messages_in_order(async_client: AsyncClient, exported):
+    rows = records((await export(async_client, exported, include_messages=True)).content)
+    assert [m["content"] for m in rows[0]["messages"]] == ["first", "second"]
+    assert all(row["messages"] == [] for row in rows[1:])
+
+@pytest.mark.anyio
+async def test_gzip_export_matches_plain(async_client: AsyncClient, exported):
+    plain = await export(async_client, exported, batch_size=2)
+    # Read the raw body: httpx would otherwise decode it for us
+    async with async_client.stream(
+        "GET", "/api/v1/csr/tickets/export",
+        params={"since": exported["start"].isoformat(), "until": (exported["start"] + timedelta(days=1)).isoformat(),
+                "batch_size": 2, "gzip": True},
+        headers=exported["headers"],
+    ) as resp:
+        assert resp.headers["content-encoding"] == "gzip"
+        body = b"".join([chunk async for chunk in resp.aiter_raw()])
+    assert gzip.decompress(body) == plain.content
+
+@pytest.mark.anyio
+async def test_export_requires_a_csr(async_client: AsyncClient, exported):
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(exported['owner'].id)})}"}
+    resp = await async_client.get("/api/v1/csr/tickets/export", headers=headers)
+    assert resp.status_code == 403
@@ -0,0 +1,113 @@
+import json
+import pytest
+import uuid
+from httpx import AsyncClient
+from sqlalchemy import delete, event
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.security import create_access_token
+from app.models.assignment import CSRWorkload
+from app.models.ticket import Ticket
+from app.models.user import User, UserRole
+from app.services import ticket_import
+from app.services.ticket_assignment import csr_roster
+from app.services.ticket_import import import_tickets
+from tests.conftest import test_engine
+
+async def chunked(data: str, size: int = 7):
+    # Deliberately split records across chunk boundaries
+    raw = data.encode("utf-8")
+    for i in range(0, len(raw), size):
+        yield raw[i:i + size]
+
+@pytest.fixture
+async def owner_id(db_session: AsyncSession):
+    owner = User(email=f"importer-{uuid.uuid4().hex}@example.com", hashed_password="x", full_name="Import Owner")
+    db_session.add(owner)
+    await db_session.commit()
+    return str(owner.id)
+
+@pytest.mark.anyio
+async def test_jsonl_import_reports_bad_rows(db_session: AsyncSession, owner_id):
+    good = {"title": "Imported", "description": "From legacy", "category": "general", "type": "issue", "user_id": owner_id}
+    lines = [
+        json.dumps(good),
+        "{not json",
+        json.dumps({**good, "description": None}),
+        json.dumps({**good, "user_id": "00000000-0000-0000-0000-000000000000"}),
+        json.dumps({**good, "status": "closed", "priority": "low"}),
+    ]
+    result = await import_tickets(db_session, chunked("\n".join(lines)), "jsonl", batch_size=2)
+    assert result.inserted == 2
+    assert result.failed == 3
+    assert [e.line for e in result.errors] == [2, 3, 4]
+
+@pytest.mark.anyio
+async def test_csv_import_handles_quoted_newlines(db_session: AsyncSession, owner_id):
+    body = (
+        "title,description,category,type,user_id\n"
+        f'"Two\nlines",desc,general,issue,{owner_id}\n'
+        f"Plain,desc,general,issue,{owner_id}\n"
+        "too,few\n"
+    )
+    result = await import_tickets(db_session, chunked(body), "csv")
+    assert result.inserted == 2
+    assert [(e.line, e.error) for e in result.errors] == [(5, "expected 5 columns, got 2")]
+
+@pytest.fixture
+async def csr_headers(db_session: AsyncSession, owner_id):
+    csr = User(email=f"import-csr-{uuid.uuid4().hex}@example.com", hashed_password="x", full_name="Import CSR", role=UserRole.CSR)
+    db_session.add(csr)
+    await db_session.commit()
+    yield {"Authorization": f"Bearer {create_access_token({'sub': str(csr.id)})}"}
+    # The database is shared by the whole session; remove this CSR and what
+    # it was assigned so other tests' assignment does not pick it up
+    await db_session.rollback()
+    await db_session.execute(delete(Ticket).where(Ticket.user_id == uuid.UUID(owner_id)))
+    await db_session.execute(delete(CSRWorkload).where(CSRWorkload.csr_id == csr.id))
+    await db_session.execute(delete(User).where(User.id == csr.id))
+    await db_session.commit()
+    csr_roster.invalidate()
+
+@pytest.mark.anyio
+async def test_import_endpoint_streams_csv_and_jsonl(async_client: AsyncClient, csr_headers, owner_id):
+    body = (
+        "title,description,category,type,user_id\n"
+        f"One,desc,general,issue,{owner_id}\n"
+        "too,few\n"
+        f"Two,desc,general,issue,{owner_id}\n"
+    )
+    resp = await async_client.post(
+        "/api/v1/csr/tickets/import", params={"format": "csv", "batch_size": 1},
+        content=chunked(body), headers=csr_headers,
+    )
+    assert resp.status_code == 200, resp.text
+    assert resp.json() == {"inserted": 2, "failed": 1, "errors": [{"line": 3, "error": "expected 5 columns, got 2"}]}
+
+    good = {"title": "Imported", "description": "d", "category": "general", "type": "issue", "user_id": owner_id}
+    body = "\n".join([json.dumps(good), "[1, 2]", json.dumps({**good, "priority": "urgent"})])
+    resp = await async_client.post("/api/v1/csr/tickets/import", content=chunked(body), headers=csr_headers)
+    assert resp.status_code == 200, resp.text
+    result = resp.json()
+    assert (result["inserted"], result["failed"]) == (1, 2)
+    assert [e["line"] for e in result["errors"]] == [2, 3]
+    assert result["errors"][0]["error"] == "expected a JSON object"
+
+@pytest.mark.anyio
+async def test_batches_go_in_as_multi_row_inserts(db_session: AsyncSession, owner_id, monkeypatch):
+    monkeypatch.setattr(ticket_import, "INSERT_ROWS", 2)
+    inserts = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO tickets"):
+            inserts.append((statement.count("VALUES") + statement.count("), ("), executemany))
+
+    event.listen(test_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        good = {"title": "Bulk", "description": "d", "category": "general", "type": "issue", "user_id": owner_id}
+        body = "\n".join(json.dumps(good) for _ in range(5))
+        result = await import_tickets(db_session, chunked(body), "jsonl", batch_size=5)
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", record)
+    assert result.inserted == 5
+    # One statement per INSERT_ROWS rows, each carrying its rows as VALUES
+    assert inserts == [(2, False), (2, False), (1, False)]
@@ -0,0 +1,79 @@
+import uuid
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import delete, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.security import create_access_token
+from app.models.ticket import Ticket, TicketStatus
+from app.models.user import User, UserRole
+from app.services import ticket_search
+from app.services.ticket_assignment import csr_roster
+from app.services.ticket_search import search_tickets
+
+TICKETS = [
+    ("Refund not received", "I asked for my money back last week", TicketStatus.OPEN),
+    ("Login broken", "Password reset email never arrives", TicketStatus.OPEN),
+    ("Billing question", "Why was I charged twice? Is a refund possible?", TicketStatus.CLOSED),
+    ("Dark mode request", "Please add a dark theme", TicketStatus.OPEN),
+]
+
+@pytest.fixture
+async def searchable(db_session: AsyncSession):
+    # a category of their own keeps other tests' tickets out of the results
+    user_id, csr_id, category = uuid.uuid4(), uuid.uuid4(), f"search-{uuid.uuid4()}"
+    rows = [
+        {"id": uuid.uuid4(), "title": title, "description": description, "category": category, "type": "issue",
+         "status": status, "user_id": user_id, "assigned_to_id": csr_id if i % 2 else None}
+        for i, (title, description, status) in enumerate(TICKETS)
+    ]
+    await db_session.execute(insert(Ticket), rows)
+    await db_session.commit()
+    return {"rows": rows, "csr_id": csr_id, "category": category}
+
+async def titles(db_session: AsyncSession, searchable, q: str, **filters):
+    hits = await search_tickets(db_session, q, category=searchable["category"], **filters)
+    return [hit["title"] for hit in hits]
+
+@pytest.mark.anyio
+async def test_search_ranks_title_matches_first(db_session: AsyncSession, searchable):
+    assert await titles(db_session, searchable, "refund") == ["Refund not received", "Billing question"]
+    # stemmed, and every word must match
+    assert await titles(db_session, searchable, "password emails") == ["Login broken"]
+    assert await titles(db_session, searchable, "password refund") == []
+    # punctuation and operators are treated as plain words
+    assert await titles(db_session, searchable, "\"dark\" -theme OR *") == []
+    assert await titles(db_session, searchable, "?!") == []
+
+@pytest.mark.anyio
+async def test_search_filters(db_session: AsyncSession, searchable):
+    csr_id = searchable["csr_id"]
+    assert await titles(db_session, searchable, "refund", status=TicketStatus.CLOSED) == ["Billing question"]
+    assert await titles(db_session, searchable, "refund", assigned_to_id=csr_id) == []
+    assert await titles(db_session, searchable, "dark", assigned_to_id=csr_id) == ["Dark mode request"]
+    assert await titles(db_session, searchable, "dark", unassigned=True) == []
+    assert await titles(db_session, searchable, "refund", limit=1, offset=1) == ["Billing question"]
+
+@pytest.mark.anyio
+async def test_index_follows_updates(db_session: AsyncSession, searchable):
+    await db_session.execute(update(Ticket).where(Ticket.id == searchable["rows"][1]["id"]).values(title="Sign-in broken"))
+    await db_session.commit()
+    assert await titles(db_session, searchable, "login") == []
+    assert await titles(db_session, searchable, "sign") == ["Sign-in broken"]
+
+@pytest.mark.anyio
+async def test_unsupported_database_gets_501(async_client: AsyncClient, db_session: AsyncSession, monkeypatch):
+    monkeypatch.setattr(ticket_search, "BACKENDS", {})
+    csr = User(email=f"search-csr-{uuid.uuid4().hex}@example.com", hashed_password="x", full_name="Search CSR", role=UserRole.CSR)
+    db_session.add(csr)
+    await db_session.commit()
+    try:
+        resp = await async_client.get(
+            "/api/v1/csr/tickets/search", params={"q": "refund"},
+            headers={"Authorization": f"Bearer {create_access_token({'sub': str(csr.id)})}"},
+        )
+        assert resp.status_code == 501
+        assert resp.json()["detail"] == "Ticket search is not available on sqlite"
+    finally:
+        await db_session.execute(delete(User).where(User.id == csr.id))
+        await db_session.commit()
+        csr_roster.invalidate()
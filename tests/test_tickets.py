@@ -1,5 +1,5 @@
 import pytest
-from uuid import UUID
+from uuid import UUID, uuid4
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import User, UserRole
@@ -11,17 +11,17 @@ from app.schemas.ticket import TicketCreate
 async def test_user_ticket_crud(async_client: AsyncClient):
     # Sign up user
     signup = {"email": "user1@example.com", "password": "strongpass", "full_name": "User OneName"}
-    res = await async_client.post("/auth/signup", json=signup)
+    res = await async_client.post("/api/v1/auth/signup", json=signup)
     assert res.status_code == 201
     # Login user
     login = {"email": signup["email"], "password": signup["password"]}
-    res = await async_client.post("/auth/login", json=login)
+    res = await async_client.post("/api/v1/auth/login", json=login)
     tokens = res.json()
     headers = {"Authorization": f"Bearer {tokens['access_token']}"}
 
     # Create a ticket without any CSRs -> unassigned
     ticket_data = {"title": "Help", "description": "Need help", "category": "general", "type": "issue"}
-    res = await async_client.post("/api/v1/users/tickets", json=ticket_data, headers=headers)
+    res = await async_client.post("/api/v1/user/tickets", json=ticket_data, headers=headers)
     assert res.status_code == 200
     ticket = res.json()
     assert ticket["title"] == ticket_data["title"]
@@ -29,13 +29,13 @@ async def test_user_ticket_crud(async_client: AsyncClient):
     assert ticket.get("assigned_to_id") is None
 
     # List my tickets
-    res = await async_client.get("/api/v1/users/tickets", headers=headers)
+    res = await async_client.get("/api/v1/user/tickets", headers=headers)
     assert res.status_code == 200
-    tickets = res.json()
+    tickets = res.json()["items"]
     assert any(t["id"] == ticket_id for t in tickets)
 
     # Get ticket detail
-    res = await async_client.get(f"/api/v1/users/tickets/{ticket_id}", headers=headers)
+    res = await async_client.get(f"/api/v1/user/tickets/{ticket_id}", headers=headers)
     assert res.status_code == 200
     detail = res.json()
     assert detail["id"] == ticket_id
@@ -51,32 +51,32 @@ async def test_csr_ticket_management(async_client: AsyncClient, db_session: Asyn
 
     # Login CSR to get token
     login_data = {"email": csr.email, "password": "csrpass"}
-    res = await async_client.post("/auth/login", json=login_data)
+    res = await async_client.post("/api/v1/auth/login", json=login_data)
     tokens = res.json()
     headers = {"Authorization": f"Bearer {tokens['access_token']}"}
 
     # Ensure at least one ticket exists: create as user
     # Sign up another user
     signup = {"email": "user2@example.com", "password": "strongpass", "full_name": "User TwoName"}
-    await async_client.post("/auth/signup", json=signup)
+    await async_client.post("/api/v1/auth/signup", json=signup)
     login2 = {"email": signup["email"], "password": signup["password"]}
-    res2 = await async_client.post("/auth/login", json=login2)
+    res2 = await async_client.post("/api/v1/auth/login", json=login2)
     tokens2 = res2.json()
     headers2 = {"Authorization": f"Bearer {tokens2['access_token']}"}
 
     ticket_data = {"title": "Issue2", "description": "Issue description", "category": "tech", "type": "bug"}
-    res_ticket = await async_client.post("/api/v1/users/tickets", json=ticket_data, headers=headers2)
+    res_ticket = await async_client.post("/api/v1/user/tickets", json=ticket_data, headers=headers2)
     ticket = res_ticket.json()
     ticket_id = ticket["id"]
 
-    # CSR lists unassigned tickets
-    res = await async_client.get("/api/v1/csr/tickets?unassigned=true", headers=headers)
+    # CSR lists tickets (the new one was auto-assigned, as a CSR exists)
+    res = await async_client.get("/api/v1/csr/tickets?limit=100", headers=headers)
     assert res.status_code == 200
-    csrtickets = res.json()
+    csrtickets = res.json()["items"]
     assert any(t["id"] == ticket_id for t in csrtickets)
 
     # CSR assigns the ticket to self with priority
-    assign_payload = {"assignee_id": csr.id, "priority": "high"}
+    assign_payload = {"assignee_id": str(csr.id), "priority": "high"}
     res = await async_client.post(f"/api/v1/csr/tickets/{ticket_id}/assign", json=assign_payload, headers=headers)
     assert res.status_code == 200
     updated = res.json()
@@ -96,3 +96,40 @@ async def test_csr_ticket_management(async_client: AsyncClient, db_session: Asyn
     assert res.status_code == 404
     res = await async_client.patch(f"/api/v1/csr/tickets/{fake_id}", json=status_payload, headers=headers)
     assert res.status_code == 404
+
+@pytest.mark.anyio
+async def test_ticket_cursor_pagination(async_client: AsyncClient):
+    signup = {"email": f"pager-{uuid4().hex}@example.com", "password": "strongpass", "full_name": "Pager UserName"}
+    res = await async_client.post("/api/v1/auth/signup", json=signup)
+    assert res.status_code == 201
+    res = await async_client.post("/api/v1/auth/login", json={"email": signup["email"], "password": signup["password"]})
+    headers = {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+    created = []
+    for i in range(5):
+        ticket_data = {"title": f"Page {i}", "description": "Paging", "category": "general", "type": "issue"}
+        res = await async_client.post("/api/v1/user/tickets", json=ticket_data, headers=headers)
+        assert res.status_code == 200
+        created.append(res.json()["id"])
+
+    async def page(query: str) -> dict:
+        res = await async_client.get(f"/api/v1/user/tickets?limit=2{query}", headers=headers)
+        assert res.status_code == 200
+        return res.json()
+
+    # Newest first; following next_cursor visits every ticket exactly once
+    pages = [await page("")]
+    assert pages[0]["prev_cursor"] is None
+    while pages[-1]["next_cursor"]:
+        pages.append(await page(f"&cursor={pages[-1]['next_cursor']}"))
+    assert [[t["title"] for t in p["items"]] for p in pages] == [["Page 4", "Page 3"], ["Page 2", "Page 1"], ["Page 0"]]
+    assert [t["id"] for p in pages for t in p["items"]] == created[::-1]
+
+    # Following prev_cursor from the last page returns the same pages in reverse
+    back = [pages[-1]]
+    while back[-1]["prev_cursor"]:
+        back.append(await page(f"&direction=prev&cursor={back[-1]['prev_cursor']}"))
+    assert [[t["id"] for t in p["items"]] for p in back] == [[t["id"] for t in p["items"]] for p in reversed(pages)]
+
+    res = await async_client.get("/api/v1/user/tickets?cursor=not-a-cursor", headers=headers)
+    assert res.status_code == 400
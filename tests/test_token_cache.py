@@ -0,0 +1,102 @@
+import time
+import jwt
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.security import (
+    create_access_token, decode_token, get_current_user, load_principal, principal_cache, revoke_token, token_cache,
+)
+from app.models.user import User, UserRole
+
+def test_repeat_decodes_are_served_from_cache():
+    token = create_access_token({"sub": "cached-subject"})
+    hits = token_cache.hits
+
+    first = decode_token(token)
+    first["sub"] = "tampered"
+    second = decode_token(token)
+
+    assert token_cache.hits == hits + 1
+    # callers get their own copy of the claims
+    assert second["sub"] == "cached-subject"
+    assert second == decode_token(token)
+
+def test_entries_do_not_outlive_the_token():
+    token = jwt.encode({"sub": "short-lived", "exp": int(time.time()) + 1}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    assert decode_token(token)["sub"] == "short-lived"
+
+    time.sleep(1.1)
+    assert decode_token(token) is None
+
+def test_invalid_tokens_are_not_cached():
+    size = len(token_cache)
+    forged = jwt.encode({"sub": "forged", "exp": int(time.time()) + 60}, "not-the-secret", algorithm=settings.ALGORITHM)
+    assert decode_token(forged) is None
+    assert decode_token("not-a-jwt") is None
+    assert len(token_cache) == size
+
+@pytest.mark.anyio
+async def test_revoked_token_is_rejected_even_when_cached(db_session: AsyncSession):
+    user = User(email="token-cache@example.com", hashed_password="x", full_name="Token Cache")
+    db_session.add(user)
+    await db_session.commit()
+
+    token = create_access_token({"sub": str(user.id)})
+    assert (await get_current_user(token, db_session)).id == user.id
+
+    await revoke_token(decode_token(token), db_session)
+    with pytest.raises(HTTPException) as exc:
+        await get_current_user(token, db_session)
+    assert exc.value.status_code == 401
+    assert exc.value.detail == "Token has been revoked"
+
+@pytest.mark.anyio
+async def test_cached_principal_skips_the_db(db_session: AsyncSession):
+    user = User(email="principal-cache@example.com", hashed_password="x", full_name="Principal Cache")
+    db_session.add(user)
+    await db_session.commit()
+
+    principal = await load_principal(str(user.id), db_session)
+    # A hit never touches the session
+    assert await load_principal(str(user.id), None) == principal
+    assert principal_cache.peek(str(user.id)) == principal
+
+@pytest.mark.anyio
+async def test_user_changes_invalidate_the_principal(db_session: AsyncSession):
+    user = User(email="principal-change@example.com", hashed_password="x", full_name="Principal Change")
+    db_session.add(user)
+    await db_session.commit()
+    token = create_access_token({"sub": str(user.id)})
+    assert (await get_current_user(token, db_session)).role == UserRole.USER
+
+    user.role = UserRole.CSR
+    await db_session.commit()
+    assert principal_cache.peek(str(user.id)) is None
+    assert (await get_current_user(token, db_session)).role == UserRole.CSR
+
+    user.is_active = False
+    await db_session.commit()
+    with pytest.raises(HTTPException) as exc:
+        await get_current_user(token, db_session)
+    assert exc.value.status_code == 401
+    assert exc.value.detail == "User is inactive"
+
+    # Don't leave a CSR behind for other tests' assignment
+    await db_session.delete(user)
+    await db_session.commit()
+
+@pytest.mark.anyio
+async def test_deleted_user_is_rejected(db_session: AsyncSession):
+    user = User(email="principal-delete@example.com", hashed_password="x", full_name="Principal Delete")
+    db_session.add(user)
+    await db_session.commit()
+    token = create_access_token({"sub": str(user.id)})
+    assert (await get_current_user(token, db_session)).id == user.id
+
+    await db_session.delete(user)
+    await db_session.commit()
+    with pytest.raises(HTTPException) as exc:
+        await get_current_user(token, db_session)
+    assert exc.value.status_code == 401
+    assert exc.value.detail == "User not found"
@@ -0,0 +1,225 @@
+import asyncio
+import itertools
+import json
+import sys
+import types
+import pytest
+from app.core.broadcast import LocalSocketBackend, PostgresNotifyBackend
+from app.core.websocket_manager import ConnectionManager
+
+class FakeWebSocket:
+    def __init__(self, stall: bool = False, broken: bool = False):
+        self.sent = []
+        self.closed = False
+        self.stall = stall
+        self.broken = broken
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data: str):
+        if self.broken:
+            raise RuntimeError("connection reset")
+        if self.stall:
+            await asyncio.sleep(3600)
+        self.sent.append(data)
+
+    async def close(self, code: int = 1000):
+        self.closed = True
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+@pytest.mark.anyio
+async def test_broadcast_reaches_every_connection():
+    manager = ConnectionManager(queue_size=10, send_timeout=1, slow_consumer_policy="disconnect")
+    sockets = [FakeWebSocket() for _ in range(3)]
+    for ws in sockets:
+        await manager.connect("t1", ws)
+    await manager.broadcast("t1", {"content": "hello"})
+    await settle()
+    assert all([json.loads(m)["content"] for m in ws.sent] == ["hello"] for ws in sockets)
+
+@pytest.mark.anyio
+async def test_slow_consumer_is_disconnected_without_blocking_others():
+    manager = ConnectionManager(queue_size=2, send_timeout=60, slow_consumer_policy="disconnect")
+    slow, fast = FakeWebSocket(stall=True), FakeWebSocket()
+    await manager.connect("t1", slow)
+    await manager.connect("t1", fast)
+    for i in range(5):
+        await manager.broadcast("t1", {"n": i})
+        await settle()
+    assert len(fast.sent) == 5
+    assert slow not in manager.active_connections["t1"]
+    assert manager.stats()["t1"]["dropped_connections"] == 1
+
+@pytest.mark.anyio
+async def test_drop_oldest_keeps_connection():
+    manager = ConnectionManager(queue_size=2, send_timeout=60, slow_consumer_policy="drop_oldest")
+    slow = FakeWebSocket(stall=True)
+    await manager.connect("t1", slow)
+    for i in range(5):
+        await manager.broadcast("t1", {"n": i})
+    stats = manager.stats()["t1"]
+    assert stats["connections"] == 1
+    assert stats["dropped_messages"] > 0
+    manager.disconnect("t1", slow)
+    # The empty room's counters are folded into the totals, not kept forever
+    assert "t1" not in manager.dropped_messages and "t1" not in manager.stats()
+    assert manager.total_dropped_messages == stats["dropped_messages"]
+
+@pytest.mark.anyio
+async def test_dead_socket_is_removed():
+    manager = ConnectionManager(queue_size=10, send_timeout=1, slow_consumer_policy="disconnect")
+    dead = FakeWebSocket(broken=True)
+    await manager.connect("t1", dead)
+    await manager.broadcast("t1", {"n": 1})
+    await settle()
+    assert "t1" not in manager.active_connections
+
+@pytest.mark.anyio
+async def test_local_backend_relays_between_workers(tmp_path):
+    path = str(tmp_path / "broadcast.sock")
+    workers = [
+        ConnectionManager(backend=LocalSocketBackend(path, retry_interval=0.01)) for _ in range(2)
+    ]
+    for manager in workers:
+        await manager.start()
+    for _ in range(100):
+        if all(manager.backend._writer is not None for manager in workers):
+            break
+        await asyncio.sleep(0.01)
+
+    here, there = FakeWebSocket(), FakeWebSocket()
+    await workers[0].connect("t1", here)
+    await workers[1].connect("t1", there)
+    await workers[0].broadcast("t1", {"content": "hello"})
+    for _ in range(100):
+        if there.sent:
+            break
+        await asyncio.sleep(0.01)
+    await settle()
+    assert [json.loads(m)["content"] for m in here.sent] == ["hello"]
+    assert [json.loads(m)["content"] for m in there.sent] == ["hello"]
+
+    for manager in workers:
+        manager.disconnect("t1", here)
+        manager.disconnect("t1", there)
+        await manager.stop()
+
+@pytest.mark.anyio
+async def test_local_backend_announces_dropped_frames(tmp_path):
+    path = str(tmp_path / "broadcast.sock")
+    workers = [
+        ConnectionManager(backend=LocalSocketBackend(path, retry_interval=0.01)) for _ in range(2)
+    ]
+    lost = []
+    workers[1].lost_listeners.append(lost.append)
+    for manager in workers:
+        await manager.start()
+    for _ in range(100):
+        if all(manager.backend._writer is not None for manager in workers):
+            break
+        await asyncio.sleep(0.01)
+    # Connecting counts as a possible gap: nothing was relayed to us before
+    assert lost == [None]
+
+    # Broker not keeping up: the frame stays local, and the others are told
+    # once frames flow again
+    limit, workers[0].backend.max_client_buffer = workers[0].backend.max_client_buffer, -1
+    await workers[0].broadcast("t1", {"content": "dropped"})
+    workers[0].backend.max_client_buffer = limit
+    await workers[0].broadcast("t2", {"content": "relayed"})
+    for _ in range(100):
+        if len(lost) > 1:
+            break
+        await asyncio.sleep(0.01)
+    assert lost == [None, "t1"]
+    assert workers[0].backend.unrelayed == 1
+
+    for manager in workers:
+        await manager.stop()
+
+class FakePostgres:
+    """Just enough of asyncpg and a server for LISTEN/NOTIFY, and restarts."""
+
+    def __init__(self):
+        self.connections = []
+        self.down = False
+        self.pids = itertools.count(1)
+
+    async def connect(self, dsn):
+        if self.down:
+            raise ConnectionRefusedError("server restarting")
+        connection = FakeConnection(self, next(self.pids))
+        self.connections.append(connection)
+        return connection
+
+    def restart(self):
+        self.down = True
+        for connection in self.connections:
+            connection.closed = True
+        self.connections = []
+
+class FakeConnection:
+    def __init__(self, server, pid):
+        self.server, self.pid, self.closed, self.listeners = server, pid, False, []
+
+    def get_server_pid(self):
+        return self.pid
+
+    def is_closed(self):
+        return self.closed
+
+    async def add_listener(self, channel, callback):
+        self.listeners.append(callback)
+
+    async def fetchval(self, query):
+        if self.closed:
+            raise ConnectionResetError("connection lost")
+        return 1
+
+    async def execute(self, query, channel, payload):
+        if self.closed:
+            raise ConnectionResetError("connection lost")
+        for connection in self.server.connections:
+            for callback in connection.listeners:
+                callback(connection, self.pid, channel, payload)
+
+    async def close(self):
+        self.closed = True
+
+    def terminate(self):
+        self.closed = True
+
+@pytest.mark.anyio
+async def test_postgres_backend_reconnects_after_an_outage(monkeypatch):
+    server = FakePostgres()
+    monkeypatch.setitem(sys.modules, "asyncpg", types.SimpleNamespace(connect=server.connect))
+    received = []
+    backends = [
+        PostgresNotifyBackend("postgresql://db", "chat", retry_interval=0.01, keepalive_interval=0.01)
+        for _ in range(2)
+    ]
+    await backends[0].start(lambda room, data: None)
+    await backends[1].start(lambda room, data: received.append((room, data)))
+
+    async def relayed(data):
+        await backends[0].publish("t1", data)
+        for _ in range(200):
+            if ("t1", data) in received:
+                return True
+            await asyncio.sleep(0.01)
+        return False
+
+    assert await relayed("before")
+    server.restart()
+    await asyncio.sleep(0.05)
+    assert all(not backend.connected for backend in backends)
+    server.down = False
+    assert await relayed("after")
+    assert [backend.outages for backend in backends] == [1, 1]
+
+    for backend in backends:
+        await backend.stop()